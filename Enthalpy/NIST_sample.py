@@ -1,7 +1,7 @@
-import os, numpy as np
-from ctREFPROP.ctREFPROP import REFPROPFunctionLibrary
+import os
 
 def NBP():
+    from ctREFPROP.ctREFPROP import REFPROPFunctionLibrary
     RP = REFPROPFunctionLibrary(os.environ['RPPREFIX'])
     print(RP.RPVersion())
     RP.SETPATHdll(os.environ['RPPREFIX'])
@@ -0,0 +1 @@
+"""Enthalpy and heat capacity models of water and the ionic liquids."""
@@ -1,13 +1,8 @@
-import pandas as pd
 import numpy as np
-
-# Install tabulate if not already installed
 try:
-    import tabulate
-except ModuleNotFoundError:
-    import subprocess
-    subprocess.check_call(['pip', 'install', 'tabulate'])
-    import tabulate
+    from Enthalpy.il_registry import DEFAULT_FILE, get_registry
+except ImportError:  # run as a script from inside Enthalpy/
+    from il_registry import DEFAULT_FILE, get_registry
 
 # Define a function to calculate enthalpy at a given temperature T
 def enthalpy_cal(T, C0, C1, C2, H_ref=200):
@@ -35,62 +30,45 @@ def enthalpy_cal(T, C0, C1, C2, H_ref=200):
   return H
 
 # Function to calculate enthalpy from CSV data
-def calculate_enthalpy_from_csv(file_path):
+def calculate_enthalpy_from_csv(file_path, T_start=298.15, T_stop=373.15, T_step=1, dtype=np.float64):
     """
     Calculates enthalpy values for ionic liquids from a CSV file containing heat capacity parameters and molar masses.
 
+    The whole (temperature x ionic liquid) matrix is computed in one broadcast
+    over the Cp integral (see `il_registry.ILRegistry.iter_h_surface`, which
+    can also stream it in blocks) and the DataFrame is built once.
+
     Args:
         file_path (str): The path to the CSV file.
+        T_start, T_stop, T_step (float, optional): Temperature grid in K, as np.arange(T_start, T_stop, T_step).
+        dtype (optional): np.float64, or np.float32 to halve the memory of the table.
 
     Returns:
-        pd.DataFrame: A DataFrame containing enthalpy values (in kJ/kg) for each ionic liquid at different temperatures.
+        pd.DataFrame: A DataFrame containing enthalpy values (in kJ/mol) for each ionic liquid at different temperatures.
     """
+    import pandas as pd  # loaded on first use only
+
     # Read the CSV file
     df_updated = pd.read_csv(file_path)
+    registry = get_registry(file_path)
 
-    # Create a Series of temperatures and convert to NumPy array
-    T = pd.Series(np.arange(298.15, 373.15, 1))
-    T_array = T.to_numpy()
-
-    # Create an empty DataFrame to store enthalpy values
-    enthalpy_df = pd.DataFrame(index=T)
-
-    # Iterate through each row
-    for index, row in df_updated.iterrows():
-        # Get molar mass, skip if 'NA'
-        molar_mass_str = row['Molar Mass (g/mol)']
-        if molar_mass_str == 'NA':
-            continue
-        molar_mass = float(molar_mass_str)
-
-        # Convert H_ref from kJ/kg to J/mol
-        H_ref = 200 * molar_mass
-
-        # Calculate the change in enthalpy using array operations
-        delta_H_array = row['C0'] * (T_array - 298.15) + 0.5 * row['C1'] * (
-                T_array ** 2 - 298.15 ** 2
-        ) + (1 / 3) * row['C2'] * (T_array ** 3 - 298.15 ** 3)
-
-        # Calculate the total enthalpy by adding H_ref
-        H_array = delta_H_array  + H_ref 
-
-        # Convert to Pandas Series
-        enthalpy_values_J_mol = pd.Series(H_array, index=T)
-
-        # Convert enthalpy values from J/mol to kJ/kg and store in the DataFrame
-        enthalpy_df[row['Ionic liquid']] = enthalpy_values_J_mol 
+    # Skip ionic liquids without a molar mass, H_ref = 200 kJ/kg at 298.15 K
+    il_ids = registry.ids_with_molar_mass()
+    T_array, H = registry.h_surface(il_ids, T_start, T_stop, T_step, h_ref=200, basis='molar', dtype=dtype)
+    enthalpy_df = pd.DataFrame(H, index=pd.Index(T_array), columns=[registry.names[i] for i in il_ids])
 
-        # Convert Cp parameters from J/mol/K to kJ/mol/K
-        df_updated.loc[index, ['C0', 'C1', 'C2']] /= 1000
+    # Convert Cp parameters from J/mol/K to kJ/mol/K
+    df_updated.loc[il_ids, ['C0', 'C1', 'C2']] /= 1000
 
-    return df_updated[['Ionic liquid', 'C0', 'C1', 'C2']], enthalpy_df /1000
+    return df_updated[['Ionic liquid', 'C0', 'C1', 'C2']], enthalpy_df
 
-# Call the function with the CSV file path
-cp_result_df, enthalpy_result_df = calculate_enthalpy_from_csv('IL_Cp_with_Molar_Mass.csv')
+if __name__ == '__main__':
+    # Call the function with the CSV file path
+    cp_result_df, enthalpy_result_df = calculate_enthalpy_from_csv(DEFAULT_FILE)
 
-# Print the results
-print("Cp in kJ/(mol*K)")
-print(cp_result_df.head().to_markdown(index=False, numalign="left", stralign="left"))
+    # Print the results (to_markdown needs the optional tabulate package)
+    print("Cp in kJ/(mol*K)")
+    print(cp_result_df.head().to_markdown(index=False, numalign="left", stralign="left"))
 
-print("\nenthalpy in kJ/mol")
-print(enthalpy_result_df.head().to_markdown(numalign="left", stralign="left"))
+    print("\nenthalpy in kJ/mol")
+    print(enthalpy_result_df.head().to_markdown(numalign="left", stralign="left"))
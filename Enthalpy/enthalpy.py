@@ -1,8 +1,10 @@
-import numpy as np
-import pandas as pd
-import enthalpy_IL_function as h_IL
+try:
+    from Enthalpy import enthalpy_IL_function as h_IL
+except ImportError:  # run as a script from inside Enthalpy/
+    import enthalpy_IL_function as h_IL
 
-temperature = 25
-h = h_IL.enthalpy_IL('[hmim][Tf2N]', temperature)
+if __name__ == '__main__':
+    temperature = 25
+    h = h_IL.enthalpy_IL('[hmim][Tf2N]', temperature)
 
-print("The enthalpy of [hmim][Tf2N] at 25 Celsius is:", h, "kJ/kg")
+    print("The enthalpy of [hmim][Tf2N] at 25 Celsius is:", h, "kJ/kg")
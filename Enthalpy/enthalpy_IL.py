@@ -1,8 +1,7 @@
-import pandas as pd
-
-# 加载比热系数数据
-cp_data = pd.read_csv('IL_Cp.csv')
-cp_data.set_index('Ionic liquid', inplace=True)
+try:
+    from Enthalpy.il_registry import get_registry
+except ImportError:  # run as a script from inside Enthalpy/
+    from il_registry import get_registry
 
 def calculate_specific_heat(ionic_liquid, temperature):
     """
@@ -15,20 +14,18 @@ def calculate_specific_heat(ionic_liquid, temperature):
     Returns:
     float: 比热，单位为 J/(mol*K)。
     """
-    if ionic_liquid in cp_data.index:
-        # 获取相应的系数
-        C0 = cp_data.loc[ionic_liquid, 'C0']
-        C1 = cp_data.loc[ionic_liquid, 'C1']
-        C2 = cp_data.loc[ionic_liquid, 'C2']
-        
+    # 系数只在首次使用时加载一次（名称 → 索引的哈希表查找）
+    registry = get_registry()
+    if ionic_liquid in registry.index:
         # 计算比热
-        specific_heat = C0 + C1 * temperature + C2 * temperature**2
+        specific_heat = registry.cp(ionic_liquid, temperature)
         return specific_heat
     else:
         raise ValueError("Ionic liquid not found in the database.")
 
-# 示例使用
-ionic_liquid = '[hmim][Tf2N]'
-temperature = 25  # 摄氏度
-cp = calculate_specific_heat(ionic_liquid, temperature)
-print(f"The specific heat of {ionic_liquid} at {temperature} °C is {cp} J/(mol*K)")
+if __name__ == '__main__':
+    # 示例使用
+    ionic_liquid = '[hmim][Tf2N]'
+    temperature = 25  # 摄氏度
+    cp = calculate_specific_heat(ionic_liquid, temperature)
+    print(f"The specific heat of {ionic_liquid} at {temperature} °C is {cp} J/(mol*K)")
@@ -1,13 +1,20 @@
-import pandas as pd
+import numpy as np
+try:
+    from Enthalpy.il_registry import get_registry
+except ImportError:  # run as a script from inside Enthalpy/
+    from il_registry import get_registry
 # Define the function to calculate enthalpy of an ionic liquid at a given temperature
-def enthalpy_IL(ionic_liquid, temperature, file_path='IL_Cp_with_Molar_Mass.csv'):
+def enthalpy_IL(ionic_liquid, temperature, file_path=None):
     """
     Calculates the enthalpy of an ionic liquid at a given temperature.
 
+    The data file is loaded once into the ionic-liquid registry (see
+    `il_registry.get_registry`) instead of being read on every call.
+
     Args:
         ionic_liquid (str): The name of the ionic liquid.
         temperature (float): The temperature in Celsius.
-        file_path (str, optional): The path to the CSV file containing ionic liquid data. Defaults to 'IL_Cp_with_Molar_Mass.csv'.
+        file_path (str, optional): The path to the CSV file containing ionic liquid data. Defaults to 'IL_Cp_with_Molar_Mass.csv' next to this module.
 
     Returns:
         float: The enthalpy of the ionic liquid in kJ/kg.
@@ -15,40 +22,46 @@ def enthalpy_IL(ionic_liquid, temperature, file_path='IL_Cp_with_Molar_Mass.csv'
     Raises:
         ValueError: If the ionic liquid is not found in the database or the molar mass is not available.
     """
-    # Read the CSV file
-    df_updated = pd.read_csv(file_path)
-
-    # Filter the DataFrame to the row where the `Ionic liquid` column matches the input `ionic_liquid`
-    filtered_row = df_updated[df_updated['Ionic liquid'] == ionic_liquid]
-    if filtered_row.empty:
-        raise ValueError(f"Ionic liquid '{ionic_liquid}' not found in the database.")
+    registry = get_registry(file_path)
 
-    # Get the molar mass from the `Molar Mass (g/mol)` column of `filtered_row`
-    molar_mass_str = filtered_row['Molar Mass (g/mol)'].values[0]
-    if molar_mass_str == 'NA':
+    # Look up the ionic liquid id (raises ValueError if it is not in the database)
+    il_id = registry.ids(ionic_liquid)
+    if np.isnan(registry.molar_mass[il_id]):
         raise ValueError(f"Molar mass for '{ionic_liquid}' is not available.")
 
-    # Convert the `Molar Mass (g/mol)` from a string to a float
-    molar_mass = float(molar_mass_str)
+    # Convert temperature from Celsius to Kelvin and calculate the enthalpy in kJ/kg
+    return float(registry.h(il_id, temperature + 273.15))
 
-    # Convert temperature from Celsius to Kelvin
-    temperature = temperature + 273.15
+def temperature_IL(ionic_liquid, enthalpy, file_path=None):
+    """
+    Calculates the temperature of an ionic liquid at a given enthalpy, the inverse of `enthalpy_IL`.
 
-    # Convert H_ref from kJ/kg to J/mol
-    H_ref = 200 * molar_mass
+    The Cp integral is inverted in closed form (see `ILRegistry.T_from_h`), so
+    arrays of enthalpies are converted in one call.
 
-    # Calculate the enthalpy
-    enthalpy_J_mol =filtered_row['C0'] * (temperature - 298.15) + 0.5 * filtered_row['C1'] * (
-                temperature ** 2 - 298.15 ** 2
-        ) + (1 / 3) * filtered_row['C2'] * (temperature ** 3 - 298.15 ** 3)
-    
-    # Convert enthalpy from J/mol to kJ/kg
-    enthalpy_kJ_kg = enthalpy_J_mol / 1000 / (molar_mass / 1000)
+    Args:
+        ionic_liquid (str): The name of the ionic liquid.
+        enthalpy (float or array-like): The enthalpy in kJ/kg relative to 25 Celsius.
+        file_path (str, optional): The path to the CSV file containing ionic liquid data. Defaults to 'IL_Cp_with_Molar_Mass.csv' next to this module.
+
+    Returns:
+        float or np.ndarray: The temperature in Celsius.
+
+    Raises:
+        ValueError: If the ionic liquid is not found in the database or the molar mass is not available.
+    """
+    registry = get_registry(file_path)
+
+    il_id = registry.ids(ionic_liquid)
+    if np.isnan(registry.molar_mass[il_id]):
+        raise ValueError(f"Molar mass for '{ionic_liquid}' is not available.")
 
-    return enthalpy_kJ_kg
+    # Invert the enthalpy integral and convert the temperature from Kelvin to Celsius
+    return registry.T_from_h(il_id, enthalpy) - 273.15
 
-# Call the function with the ionic liquid name and temperature
-enthalpy = enthalpy_IL('[hmim][Tf2N]', 100)
+if __name__ == '__main__':
+    # Call the function with the ionic liquid name and temperature
+    enthalpy = enthalpy_IL('[hmim][Tf2N]', 100)
 
-# Print the result
-print("The enthalpy of [hmim][Tf2N] at 298.15 Celsius is:", enthalpy, "kJ/kg")
+    # Print the result
+    print("The enthalpy of [hmim][Tf2N] at 298.15 Celsius is:", enthalpy, "kJ/kg")
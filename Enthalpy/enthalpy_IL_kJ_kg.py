@@ -1,14 +1,10 @@
-import pandas as pd
 import numpy as np
-import openpyxl
-
-# Install tabulate if not already installed
 try:
-    import tabulate
-except ModuleNotFoundError:
-    import subprocess
-    subprocess.check_call(['pip', 'install', 'tabulate'])
-    import tabulate
+    from Enthalpy.il_registry import DEFAULT_FILE, get_registry
+    from Enthalpy.results_writer import open_writer
+except ImportError:  # run as a script from inside Enthalpy/
+    from il_registry import DEFAULT_FILE, get_registry
+    from results_writer import open_writer
 
 # Define a function to calculate enthalpy at a given temperature T
 def enthalpy_cal(T, C0, C1, C2, H_ref=200):
@@ -36,69 +32,94 @@ def enthalpy_cal(T, C0, C1, C2, H_ref=200):
   return H
 
 # Function to calculate enthalpy from CSV data
-def calculate_enthalpy_from_csv(file_path):
+def calculate_enthalpy_from_csv(file_path, T_start=298.15, T_stop=373.15, T_step=0.1, dtype=np.float64):
     """
     Calculates enthalpy values for ionic liquids from a CSV file containing heat capacity parameters and molar masses.
 
+    The whole (temperature x ionic liquid) matrix is computed in one broadcast
+    over the Cp integral (see `il_registry.ILRegistry.iter_h_surface`, which
+    can also stream it in blocks) and the DataFrame is built once.
+
     Args:
         file_path (str): The path to the CSV file.
+        T_start, T_stop, T_step (float, optional): Temperature grid in K, as np.arange(T_start, T_stop, T_step).
+        dtype (optional): np.float64, or np.float32 to halve the memory of the table.
 
     Returns:
         pd.DataFrame: A DataFrame containing enthalpy values (in kJ/kg) for each ionic liquid at different temperatures.
     """
+    import pandas as pd  # loaded on first use only
+
     # Read the CSV file
     df_updated = pd.read_csv(file_path)
+    registry = get_registry(file_path)
 
-    # Create a Series of temperatures and convert to NumPy array
-    T = pd.Series(np.arange(298.15, 373.15, 0.1))
-    T_array = T.to_numpy()
-
-    # Create an empty DataFrame to store enthalpy values
-    enthalpy_df = pd.DataFrame(index=T)
-
-    # Iterate through each row
-    for index, row in df_updated.iterrows():
-        # Get molar mass, skip if 'NA'
-        molar_mass_str = row['Molar Mass (g/mol)']
-        if molar_mass_str == 'NA':
-            continue
-        molar_mass = float(molar_mass_str)
-
-        # Convert H_ref from kJ/kg to J/mol
-        H_ref = 200 * molar_mass
-
-        # Calculate the change in enthalpy using array operations
-        delta_H_array = row['C0'] * (T_array - 298.15) + 0.5 * row['C1'] * (
-                T_array ** 2 - 298.15 ** 2
-        ) + (1 / 3) * row['C2'] * (T_array ** 3 - 298.15 ** 3)
-
-        # Calculate the total enthalpy by adding H_ref
-        H_array = delta_H_array + H_ref
+    # Skip ionic liquids without a molar mass, H_ref = 200 kJ/kg at 298.15 K
+    il_ids = registry.ids_with_molar_mass()
+    T_array, H = registry.h_surface(il_ids, T_start, T_stop, T_step, h_ref=200, basis='mass', dtype=dtype)
+    enthalpy_df = pd.DataFrame(H, index=pd.Index(T_array), columns=[registry.names[i] for i in il_ids])
 
-        # Set the values in H_array to H_ref where T_array equals T_ref
-        H_array[T_array == 298.15] = H_ref
-
-        # Convert to Pandas Series
-        enthalpy_values_J_mol = pd.Series(H_array, index=T)
-
-        # Convert enthalpy values from J/mol to kJ/kg and store in the DataFrame
-        enthalpy_df[row['Ionic liquid']] = enthalpy_values_J_mol / 1000 / (molar_mass / 1000)
-
-        # Convert Cp parameters from J/mol/K to kJ/mol/K
-        df_updated.loc[index, ['C0', 'C1', 'C2']] /= 1000
+    # Convert Cp parameters from J/mol/K to kJ/mol/K
+    df_updated.loc[il_ids, ['C0', 'C1', 'C2']] /= 1000
 
     return df_updated[['Ionic liquid', 'C0', 'C1', 'C2']], enthalpy_df
 
-# Call the function with the CSV file path
-cp_result_df, enthalpy_result_df = calculate_enthalpy_from_csv('IL_Cp_with_Molar_Mass.csv')
+# Function to write the Cp and enthalpy tables in a columnar format
+def write_enthalpy_results(file_path, output='enthalpy_results', fmt='npy', excel=False,
+                           T_start=298.15, T_stop=373.15, T_step=0.1, dtype=np.float64, chunk_rows=65536):
+    """
+    Writes the Cp and enthalpy tables of `calculate_enthalpy_from_csv` with `results_writer`.
 
-# Create an ExcelWriter object with the engine set to 'openpyxl'
-with pd.ExcelWriter('enthalpy_results.xlsx', engine='openpyxl') as writer:
-    # Write the cp_result_df DataFrame to the 'Cp' sheet
-    cp_result_df.to_excel(writer, sheet_name='Cp', index=False)
+    The enthalpy table is streamed block by block from the registry, so its size
+    is not limited by memory or by the Excel row cap. The tables are written to
+    "<output>_Cp" and "<output>_Enthalpy" (plus the extension of `fmt`), and can be
+    read back with `results_writer.read_table`.
 
-    # Write the enthalpy_result_df DataFrame to the 'Enthalpy' sheet
-    enthalpy_result_df.to_excel(writer, sheet_name='Enthalpy')
+    Args:
+        file_path (str): The path to the CSV file.
+        output (str, optional): Output path prefix. Defaults to 'enthalpy_results'.
+        fmt (str, optional): 'npy' (directory of .npy columns), 'npz', 'feather' or 'parquet'. Defaults to 'npy'. 'npz' holds the whole table in memory, so use it for small grids only.
+        excel (bool, optional): Also write '<output>.xlsx' with the 'Cp' and 'Enthalpy' sheets. Defaults to False.
+        T_start, T_stop, T_step (float, optional): Temperature grid in K.
+        dtype (optional): np.float64 or np.float32.
+        chunk_rows (int, optional): Temperatures per written block. Defaults to 65536.
 
-# Print message to confirm the file has been saved
-print("The results have been saved to 'enthalpy_results.xlsx'")
+    Returns:
+        list: The paths written.
+    """
+    extension = {'npy': '', 'npz': '.npz', 'feather': '.feather', 'parquet': '.parquet'}[fmt]
+    registry = get_registry(file_path)
+    il_ids = registry.ids_with_molar_mass()
+    names = [registry.names[i] for i in il_ids]
+
+    # Cp parameters in kJ/mol/K, as in calculate_enthalpy_from_csv
+    cp_columns = {'Ionic liquid': np.array(registry.names),
+                  'C0': registry.C0.copy(), 'C1': registry.C1.copy(), 'C2': registry.C2.copy()}
+    for column in ('C0', 'C1', 'C2'):
+        cp_columns[column][il_ids] /= 1000
+
+    paths = [f"{output}_Cp{extension}", f"{output}_Enthalpy{extension}"]
+    with open_writer(paths[0], fmt) as writer:
+        writer.write(cp_columns)
+    with open_writer(paths[1], fmt) as writer:
+        for T_block, H_block in registry.iter_h_surface(il_ids, T_start, T_stop, T_step, h_ref=200,
+                                                        basis='mass', dtype=dtype, chunk_rows=chunk_rows):
+            writer.write({'T': T_block, **{name: H_block[:, k] for k, name in enumerate(names)}})
+
+    if excel:
+        # Optional spreadsheet export (needs openpyxl, at most ~1M temperatures)
+        import pandas as pd
+        cp_result_df, enthalpy_result_df = calculate_enthalpy_from_csv(file_path, T_start, T_stop, T_step, dtype)
+        with pd.ExcelWriter(f"{output}.xlsx", engine='openpyxl') as writer:
+            cp_result_df.to_excel(writer, sheet_name='Cp', index=False)
+            enthalpy_result_df.to_excel(writer, sheet_name='Enthalpy')
+        paths.append(f"{output}.xlsx")
+
+    return paths
+
+if __name__ == '__main__':
+    # Call the function with the CSV file path; set excel=True for the spreadsheet as well
+    saved = write_enthalpy_results(DEFAULT_FILE, fmt='npy', excel=False)
+
+    # Print message to confirm the files have been saved
+    print(f"The results have been saved to {', '.join(saved)}")
@@ -1,5 +1,7 @@
-import os
-from ctREFPROP.ctREFPROP import REFPROPFunctionLibrary
+try:
+    from Enthalpy.refprop_session import get_session
+except ImportError:  # 在 Enthalpy/ 目录下直接运行脚本
+    from refprop_session import get_session
 
 def calculate_enthalpy(temperature, pressure):
     """
@@ -12,19 +14,8 @@ def calculate_enthalpy(temperature, pressure):
     Returns:
     float: 焓值，单位为焦耳每摩尔。
     """
-    # 初始化REFPROP库
-    RP = REFPROPFunctionLibrary(os.environ['RPPREFIX'])
-    RP.SETPATHdll(os.environ['RPPREFIX'])
-    
-    # 设置流体文件
-    r = RP.SETUPdll(1,"WATER.FLD","HMX.BNC","DEF")
-    if r.ierr != 0:
-        raise ValueError(f"Error setting up fluid: {r.herr}")
-    
-    # 使用温度和压力进行闪蒸计算
-    result = RP.TPFLSHdll(temperature, pressure, [1.0])
-    if result.ierr != 0:
-        raise ValueError(f"Error in flash calculation: {result.herr}")
+    # 使用缓存的 REFPROP 会话（库只加载、设置一次）进行闪蒸计算
+    result = get_session('WATER.FLD').flash_tp(temperature, pressure)
     
     # 返回焓值
     return result.h
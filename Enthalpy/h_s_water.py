@@ -1,65 +1,68 @@
-import os
-from ctREFPROP.ctREFPROP import REFPROPFunctionLibrary
+try:
+    from Enthalpy.refprop_session import get_session
+except ImportError:  # 在 Enthalpy/ 目录下直接运行 python h_s_water.py
+    from refprop_session import get_session
+
+M_WATER = 18.01528  # 水的摩尔质量 g/mol
 
 def initialize_refprop():
-    """初始化 REFPROP 库并设置水作为工作流体"""
-    RP = REFPROPFunctionLibrary(os.environ['RPPREFIX'])
-    RP.SETPATHdll(os.environ['RPPREFIX'])
-    
-    r = RP.SETUPdll(1, "WATER.FLD", "HMX.BNC", "DEF")
-    if r.ierr != 0:
-        raise ValueError(f"Error setting up fluid: {r.herr}")
-    
-    return RP
+    """获取已缓存的 REFPROP 会话（库只加载一次，水作为工作流体）"""
+    return get_session('WATER.FLD')
+
+def calculate_properties_tp(session, temperature, pressure):
+    """一次 TP 闪蒸计算给定温度和压力下水的全部性质 (h kJ/kg, s kJ/(kg·K), density kg/m³, quality)"""
+    result = session.flash_tp(temperature + 273.15, pressure)
+    return {
+        'h': result.h / M_WATER,
+        's': result.s / M_WATER,
+        'density': result.D * M_WATER,
+        'quality': result.q,
+    }
+
+def calculate_properties_tx(session, temperature, quality):
+    """一次 TQ 闪蒸计算给定温度和干度下水的全部性质 (h kJ/kg, s kJ/(kg·K), density kg/m³, pressure kPa)"""
+    result = session.flash_tq(temperature + 273.15, quality)  # kq=1
+    return {
+        'h': result.h / M_WATER,
+        's': result.s / M_WATER,
+        'density': result.D * M_WATER,
+        'pressure': result.P,
+    }
 
-def calculate_enthalpy_tp(RP, temperature, pressure):
+def calculate_enthalpy_tp(session, temperature, pressure):
     """计算给定温度和压力下的水的焓值"""
-    result = RP.TPFLSHdll(temperature + 273.15, pressure, [1.0])
-    if result.ierr != 0:
-        raise ValueError(f"Error in TP flash calculation: {result.herr}")
-    return result.h / 18.01528  # kJ/kg
+    return session.flash_tp(temperature + 273.15, pressure).h / M_WATER  # kJ/kg
 
-def calculate_enthalpy_tx(RP, temperature, quality):
+def calculate_enthalpy_tx(session, temperature, quality):
     """计算给定温度和干度下的水的焓值"""
-    result = RP.TQFLSHdll(temperature + 273.15, quality, [1.0], 1)  # 添加 kq=1
-    if result.ierr != 0:
-        raise ValueError(f"Error in TQ flash calculation: {result.herr}")
-    return result.h / 18.01528  # kJ/kg
+    return session.flash_tq(temperature + 273.15, quality).h / M_WATER  # kJ/kg
 
-def calculate_entropy_tp(RP, temperature, pressure):
+def calculate_entropy_tp(session, temperature, pressure):
     """计算给定温度和压力下的水的熵值"""
-    result = RP.TPFLSHdll(temperature + 273.15, pressure, [1.0])
-    if result.ierr != 0:
-        raise ValueError(f"Error in TP flash calculation: {result.herr}")
-    return result.s / 18.01528  # kJ/(kg·K)
+    return session.flash_tp(temperature + 273.15, pressure).s / M_WATER  # kJ/(kg·K)
 
-def calculate_entropy_tx(RP, temperature, quality):
+def calculate_entropy_tx(session, temperature, quality):
     """计算给定温度和干度下的水的熵值"""
-    result = RP.TQFLSHdll(temperature + 273.15, quality, [1.0], 1)  # 添加 kq=1
-    if result.ierr != 0:
-        raise ValueError(f"Error in TQ flash calculation: {result.herr}")
-    return result.s / 18.01528  # kJ/(kg·K)
+    return session.flash_tq(temperature + 273.15, quality).s / M_WATER  # kJ/(kg·K)
 
 def main():
-    RP = initialize_refprop()
+    session = initialize_refprop()
     
-    # 1. 根据温度和压力计算焓值和熵值
+    # 1. 根据温度和压力计算焓值和熵值（一次闪蒸）
     temperature = 50  # °C
     pressure = 101.325  # kPa
-    enthalpy_tp = calculate_enthalpy_tp(RP, temperature, pressure)
-    entropy_tp = calculate_entropy_tp(RP, temperature, pressure)
+    props_tp = calculate_properties_tp(session, temperature, pressure)
     print(f"At T={temperature}°C and P={pressure} kPa:")
-    print(f"  Enthalpy: {enthalpy_tp:.2f} kJ/kg")
-    print(f"  Entropy: {entropy_tp:.4f} kJ/(kg·K)")
+    print(f"  Enthalpy: {props_tp['h']:.2f} kJ/kg")
+    print(f"  Entropy: {props_tp['s']:.4f} kJ/(kg·K)")
 
-    # 2. 根据温度和干度计算焓值和熵值
+    # 2. 根据温度和干度计算焓值和熵值（一次闪蒸）
     temperature = 100  # °C
     quality = 0.5  # 50% 干度
-    enthalpy_tx = calculate_enthalpy_tx(RP, temperature, quality)
-    entropy_tx = calculate_entropy_tx(RP, temperature, quality)
+    props_tx = calculate_properties_tx(session, temperature, quality)
     print(f"\nAt T={temperature}°C and quality={quality}:")
-    print(f"  Enthalpy: {enthalpy_tx:.2f} kJ/kg")
-    print(f"  Entropy: {entropy_tx:.4f} kJ/(kg·K)")
+    print(f"  Enthalpy: {props_tx['h']:.2f} kJ/kg")
+    print(f"  Entropy: {props_tx['s']:.4f} kJ/(kg·K)")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,355 @@
+"""
+IAPWS-IF97 water properties in pure NumPy (regions 1, 2 and 4).
+
+A REFPROP-free fast path for water enthalpy and entropy. Every function
+accepts scalars or arrays and evaluates the whole array in one vectorized
+call. Region 3 (near-critical, T > 623.15 K above the B23 line) is not
+implemented and returns NaN, as do states outside the IF97 range.
+
+Reference: IAPWS, Revised Release on the IAPWS Industrial Formulation 1997
+for the Thermodynamic Properties of Water and Steam (2007).
+"""
+import numpy as np
+
+R = 0.461526  # Specific gas constant of water in kJ/(kg*K)
+
+# Region 1: compressed liquid, gamma(pi, tau) with pi = p / 16.53 MPa, tau = 1386 K / T
+_I1 = np.array([0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2, 3, 3, 3, 4, 4, 4, 5,
+                8, 8, 21, 23, 29, 30, 31, 32], dtype=float)
+_J1 = np.array([-2, -1, 0, 1, 2, 3, 4, 5, -9, -7, -1, 0, 1, 3, -3, 0, 1, 3, 17, -4, 0, 6, -5, -2,
+                10, -8, -11, -6, -29, -31, -38, -39, -40, -41], dtype=float)
+_N1 = np.array([
+    0.14632971213167, -0.84548187169114, -0.37563603672040e1, 0.33855169168385e1,
+    -0.95791963387872, 0.15772038513228, -0.16616417199501e-1, 0.81214629983568e-3,
+    0.28319080123804e-3, -0.60706301565874e-3, -0.18990068218419e-1, -0.32529748770505e-1,
+    -0.21841717175414e-1, -0.52838357969930e-4, -0.47184321073267e-3, -0.30001780793026e-3,
+    0.47661393906987e-4, -0.44141845330846e-5, -0.72694996297594e-15, -0.31679644845054e-4,
+    -0.28270797985312e-5, -0.85205128120103e-9, -0.22425281908000e-5, -0.65171222895601e-6,
+    -0.14341729937924e-12, -0.40516996860117e-6, -0.12734301741641e-8, -0.17424871230634e-9,
+    -0.68762131295531e-18, 0.14478307828521e-19, 0.26335781662795e-22, -0.11947622640071e-22,
+    0.18228094581404e-23, -0.93537087292458e-25])
+
+# Region 2: vapor, ideal-gas part (pi = p / 1 MPa, tau = 540 K / T) ...
+_J0 = np.array([0, 1, -5, -4, -3, -2, -1, 2, 3], dtype=float)
+_N0 = np.array([
+    -0.96927686500217e1, 0.10086655968018e2, -0.56087911283020e-2, 0.71452738081455e-1,
+    -0.40710498223928, 0.14240819171444e1, -0.43839511319450e1, -0.28408632460772,
+    0.21268463753307e-1])
+
+# ... and residual part
+_I2 = np.array([1, 1, 1, 1, 1, 2, 2, 2, 2, 2, 3, 3, 3, 3, 3, 4, 4, 4, 5, 6, 6, 6, 7, 7, 7, 8, 8,
+                9, 10, 10, 10, 16, 16, 18, 20, 20, 20, 21, 22, 23, 24, 24, 24], dtype=float)
+_J2 = np.array([0, 1, 2, 3, 6, 1, 2, 4, 7, 36, 0, 1, 3, 6, 35, 1, 2, 3, 7, 3, 16, 35, 0, 11, 25,
+                8, 36, 13, 4, 10, 14, 29, 50, 57, 20, 35, 48, 21, 53, 39, 26, 40, 58], dtype=float)
+_N2 = np.array([
+    -0.17731742473213e-2, -0.17834862292358e-1, -0.45996013696365e-1, -0.57581259083432e-1,
+    -0.50325278727930e-1, -0.33032641670203e-4, -0.18948987516315e-3, -0.39392777243355e-2,
+    -0.43797295650573e-1, -0.26674547914087e-4, 0.20481737692309e-7, 0.43870667284435e-6,
+    -0.32277677238570e-4, -0.15033924542148e-2, -0.40668253562649e-1, -0.78847309559367e-9,
+    0.12790717852285e-7, 0.48225372718507e-6, 0.22922076337661e-5, -0.16714766451061e-10,
+    -0.21171472321355e-2, -0.23895741934104e2, -0.59059564324270e-17, -0.12621808899101e-5,
+    -0.38946842435739e-1, 0.11256211360459e-10, -0.82311340897998e1, 0.19809712802088e-7,
+    0.10406965210174e-18, -0.10234747095929e-12, -0.10018179379511e-8, -0.80882908646985e-10,
+    0.10693031879409, -0.33662250574171, 0.89185845355421e-24, 0.30629316876232e-12,
+    -0.42002467698208e-5, -0.59056029685639e-25, 0.37826947613457e-5, -0.12768608934681e-14,
+    0.73087610595061e-28, 0.55414715350778e-16, -0.94369707241210e-6])
+
+# Region 4: saturation line
+_N4 = np.array([
+    0.11670521452767e4, -0.72421316703206e6, -0.17073846940092e2, 0.12020824702470e5,
+    -0.32325550322333e7, 0.14915108613530e2, -0.48232657361591e4, 0.40511340542057e6,
+    -0.23855557567849, 0.65017534844798e3])
+
+# Boundary between regions 2 and 3
+_N23 = np.array([0.34805185628969e3, -0.11671859879975e1, 0.10192970039326e-2])
+
+T_MIN = 273.15    # K
+T_13 = 623.15     # K, upper limit of region 1
+T_MAX = 1073.15   # K, upper limit of region 2
+P_MAX = 100000.0  # kPa
+T_CRIT = 647.096  # K
+
+
+# Coefficients (terms x 3) of gamma, d(gamma)/d(tau) and d2(gamma)/d(tau)2, so the
+# three sums of a region are one matrix product with the term powers
+_C1 = np.stack([_N1, _N1 * _J1, _N1 * _J1 * (_J1 - 1)], axis=1)
+_C0 = np.stack([_N0, _N0 * _J0, _N0 * _J0 * (_J0 - 1)], axis=1)
+_C2 = np.stack([_N2, _N2 * _J2, _N2 * _J2 * (_J2 - 1)], axis=1)
+
+
+def _gamma_1(tau, pi):
+    """gamma and its first and second tau derivatives of region 1 for flat arrays."""
+    t = tau - 1.222
+    gamma, gamma_tau, gamma_tautau = (((7.1 - pi)[:, None] ** _I1 * t[:, None] ** (_J1 - 2)) @ _C1).T
+    return gamma * t**2, gamma_tau * t, gamma_tautau
+
+
+def _gamma_2(tau, pi):
+    """gamma and its first and second tau derivatives of region 2 (ideal + residual) for flat arrays."""
+    gamma0, gamma0_tau, gamma0_tautau = ((tau[:, None] ** (_J0 - 2)) @ _C0).T
+    t = tau - 0.5
+    gammar, gammar_tau, gammar_tautau = ((pi[:, None] ** _I2 * t[:, None] ** (_J2 - 2)) @ _C2).T
+    return (np.log(pi) + gamma0 * tau**2 + gammar * t**2, gamma0_tau * tau + gammar_tau * t,
+            gamma0_tautau + gammar_tautau)
+
+
+# The term powers are (points x terms) temporaries, so large arrays are
+# evaluated in blocks to keep memory bounded
+_BLOCK = 1 << 15
+
+
+def _hs_cp(gamma_fn, T, tau, pi):
+    """h, s and cp from a dimensionless Gibbs function, evaluated block-wise."""
+    T, tau, pi = np.broadcast_arrays(T, tau, pi)
+    gamma, gamma_tau, gamma_tautau = (np.empty(T.size) for _ in range(3))
+    tau_flat, pi_flat = tau.ravel(), pi.ravel()
+    for start in range(0, T.size, _BLOCK):
+        block = slice(start, start + _BLOCK)
+        gamma[block], gamma_tau[block], gamma_tautau[block] = gamma_fn(tau_flat[block], pi_flat[block])
+    gamma, gamma_tau, gamma_tautau = (a.reshape(T.shape) for a in (gamma, gamma_tau, gamma_tautau))
+    return R * T * tau * gamma_tau, R * (tau * gamma_tau - gamma), -R * tau**2 * gamma_tautau
+
+
+def region1_hs(T, P):
+    """Enthalpy (kJ/kg) and entropy (kJ/(kg*K)) from the region 1 equation, T in K, P in kPa."""
+    return region1_hs_cp(T, P)[:2]
+
+
+def region2_hs(T, P):
+    """Enthalpy (kJ/kg) and entropy (kJ/(kg*K)) from the region 2 equation, T in K, P in kPa."""
+    return region2_hs_cp(T, P)[:2]
+
+
+def region1_hs_cp(T, P):
+    """Enthalpy (kJ/kg), entropy and isobaric heat capacity (kJ/(kg*K)) from the region 1 equation."""
+    T = np.asarray(T, dtype=float)
+    return _hs_cp(_gamma_1, T, 1386.0 / T, np.asarray(P, dtype=float) / 16530.0)
+
+
+def region2_hs_cp(T, P):
+    """Enthalpy (kJ/kg), entropy and isobaric heat capacity (kJ/(kg*K)) from the region 2 equation."""
+    T = np.asarray(T, dtype=float)
+    return _hs_cp(_gamma_2, T, 540.0 / T, np.asarray(P, dtype=float) / 1000.0)
+
+
+def saturation_pressure(T):
+    """Saturation pressure in kPa for temperature(s) in K (273.15 K to 647.096 K, else NaN)."""
+    T = np.asarray(T, dtype=float)
+    n = _N4
+    theta = T + n[8] / (T - n[9])
+    A = theta**2 + n[0] * theta + n[1]
+    B = n[2] * theta**2 + n[3] * theta + n[4]
+    C = n[5] * theta**2 + n[6] * theta + n[7]
+    with np.errstate(invalid='ignore'):
+        P = (2 * C / (-B + np.sqrt(B**2 - 4 * A * C)))**4 * 1000.0
+    return np.where((T >= T_MIN) & (T <= T_CRIT), P, np.nan)[()]
+
+
+def saturation_temperature(P):
+    """Saturation temperature in K for pressure(s) in kPa (611.213 Pa to 22.064 MPa, else NaN)."""
+    P = np.asarray(P, dtype=float)
+    n = _N4
+    with np.errstate(invalid='ignore', divide='ignore'):
+        beta = (P / 1000.0)**0.25
+        E = beta**2 + n[2] * beta + n[5]
+        F = n[0] * beta**2 + n[3] * beta + n[6]
+        G = n[1] * beta**2 + n[4] * beta + n[7]
+        D = 2 * G / (-F - np.sqrt(F**2 - 4 * E * G))
+        T = (n[9] + D - np.sqrt((n[9] + D)**2 - 4 * (n[8] + n[9] * D))) / 2
+    return np.where((P >= 0.611212677) & (P <= 22064.0), T, np.nan)[()]
+
+
+def boundary_23_pressure(T):
+    """Pressure in kPa of the boundary between regions 2 and 3, T in K."""
+    T = np.asarray(T, dtype=float)
+    return (_N23[0] + _N23[1] * T + _N23[2] * T**2) * 1000.0
+
+
+def boundary_23_temperature(P):
+    """Temperature in K of the boundary between regions 2 and 3, P in kPa (16.53 MPa to 100 MPa)."""
+    with np.errstate(invalid='ignore'):
+        return 0.57254459862746e3 + np.sqrt((np.asarray(P, dtype=float) / 1000.0 - 0.13918839778870e2) / _N23[2])
+
+
+def region(T, P):
+    """
+    IF97 region of each (T, P) state: 1 (liquid), 2 (vapor) or 0 (not supported).
+
+    States exactly on the saturation line are assigned to region 1.
+    """
+    T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+    in_range = (T >= T_MIN) & (T <= T_MAX) & (P > 0) & (P <= P_MAX)
+    with np.errstate(invalid='ignore'):
+        low = T <= T_13
+        P_sat = saturation_pressure(np.where(low, T, T_MIN))
+        reg = np.where(low, np.where(P >= P_sat, 1, 2),
+                       np.where((T <= 863.15) & (P > boundary_23_pressure(T)), 0, 2))
+    return np.where(in_range, reg, 0)
+
+
+def properties_tp(T, P):
+    """
+    Enthalpy and entropy of water for arrays of T (K) and P (kPa).
+
+    Returns:
+        tuple: (h in kJ/kg, s in kJ/(kg*K)); NaN where the state is outside
+        regions 1 and 2.
+    """
+    T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+    reg = region(T, P)
+    h = np.full(T.shape, np.nan)
+    s = np.full(T.shape, np.nan)
+    for code, equation in ((1, region1_hs), (2, region2_hs)):
+        mask = reg == code
+        if mask.any():
+            h[mask], s[mask] = equation(T[mask], P[mask])
+    return h[()], s[()]
+
+
+def properties_tx(T, x):
+    """
+    Enthalpy and entropy of saturated water for arrays of T (K) and quality x.
+
+    Saturated liquid and vapor come from regions 1 and 2 at the region 4
+    saturation pressure, so T is limited to 273.15 K - 623.15 K.
+
+    Returns:
+        tuple: (h in kJ/kg, s in kJ/(kg*K), P_sat in kPa).
+    """
+    T, x = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(x, dtype=float))
+    valid = (T >= T_MIN) & (T <= T_13) & (x >= 0) & (x <= 1)
+    T_v = np.where(valid, T, T_MIN)
+    P_sat = saturation_pressure(T_v)
+    h_f, s_f = region1_hs(T_v, P_sat)
+    h_g, s_g = region2_hs(T_v, P_sat)
+    h = np.where(valid, h_f + x * (h_g - h_f), np.nan)
+    s = np.where(valid, s_f + x * (s_g - s_f), np.nan)
+    return h[()], s[()], np.where(valid, P_sat, np.nan)[()]
+
+
+P_13 = 16529.2    # kPa, saturation pressure at T_13
+P_TRIPLE = 0.611212677  # kPa
+
+
+def _temperature_p(P, value, prop, xtol=1e-12, maxiter=50):
+    """PH (prop 0) or PS (prop 1) flash; see `temperature_ph`."""
+    from vector_solvers import bracketed_newton
+    P, value = np.broadcast_arrays(np.asarray(P, dtype=float), np.asarray(value, dtype=float))
+    shape = P.shape
+    P, value = P.ravel(), value.ravel()
+    T = np.full(P.size, np.nan)
+    x = np.full(P.size, np.nan)
+
+    # Saturated liquid (region 1) and vapor (region 2) at P split two-phase from single-phase states
+    T_sat = saturation_temperature(P)
+    sat = np.flatnonzero(T_sat <= T_13)
+    v_f = region1_hs(T_sat[sat], P[sat])[prop]
+    v_g = region2_hs(T_sat[sat], P[sat])[prop]
+    inside = (value[sat] >= v_f) & (value[sat] <= v_g)
+    T[sat[inside]] = T_sat[sat[inside]]
+    x[sat[inside]] = (value[sat[inside]] - v_f[inside]) / (v_g[inside] - v_f[inside])
+
+    # Single phase: region 1 from T_MIN up to T_sat, region 2 from T_sat up to T_MAX.
+    # Above P_13 region 1 ends at T_13 and region 2 starts on the B23 line (region 3
+    # lies in between); below the triple point there is only vapor.
+    high = np.flatnonzero((P > P_13) & (P <= P_MAX))
+    high_liquid = value[high] <= region1_hs(T_13, P[high])[prop]
+    low = np.flatnonzero((P > 0) & (P < P_TRIPLE))
+    liquid = np.concatenate([sat[value[sat] < v_f], high[high_liquid]])
+    vapor = np.concatenate([sat[value[sat] > v_g], high[~high_liquid], low])
+    lo = np.concatenate([np.full(liquid.size, T_MIN), T_sat[vapor]])
+    lo[liquid.size:][np.isin(vapor, high)] = boundary_23_temperature(P[high[~high_liquid]])
+    lo[liquid.size:][np.isin(vapor, low)] = T_MIN
+    hi = np.concatenate([T_sat[liquid], np.full(vapor.size, T_MAX)])
+    hi[:liquid.size][np.isin(liquid, high)] = T_13
+    solve = np.concatenate([liquid, vapor])
+    if solve.size:
+        P_s, value_s = P[solve], value[solve]
+        is_liquid = np.arange(solve.size) < liquid.size
+
+        def evaluate(T, idx):
+            """value and d(value)/dT on the branch of each point."""
+            v = np.empty(T.size)
+            dv = np.empty(T.size)
+            for equation, mask in ((region1_hs_cp, is_liquid[idx]), (region2_hs_cp, ~is_liquid[idx])):
+                if mask.any():
+                    state = equation(T[mask], P_s[idx][mask])
+                    v[mask] = state[prop]
+                    dv[mask] = state[2]
+            return v - value_s[idx], dv if prop == 0 else dv / T
+
+        every = np.arange(solve.size)
+        f_lo = evaluate(lo, every)[0]
+        f_hi = evaluate(hi, every)[0]
+        T[solve], _, _ = bracketed_newton(evaluate, lo, hi, f_lo, f_hi, xtol=xtol, maxiter=maxiter,
+                                          label=f"if97_water.temperature_p{'hs'[prop]}")
+    return T.reshape(shape)[()], x.reshape(shape)[()]
+
+
+def temperature_ph(P, h):
+    """
+    PH flash of water for arrays of P (kPa) and h (kJ/kg).
+
+    Between the saturated liquid and vapor enthalpies at P the state is
+    two-phase at the region 4 saturation temperature; otherwise T is solved
+    on the region 1 or region 2 branch by a safeguarded Newton iteration with
+    the exact cp of that region. As for `properties_tp`, region 3 is not
+    covered: T is NaN there and outside the IF97 range.
+
+    Returns:
+        tuple: (T in K, x), where x is the quality of two-phase states and
+        NaN for single-phase ones.
+    """
+    return _temperature_p(P, h, 0)
+
+
+def temperature_ps(P, s):
+    """
+    PS flash of water for arrays of P (kPa) and s (kJ/(kg*K)); see `temperature_ph`.
+
+    Returns:
+        tuple: (T in K, x).
+    """
+    return _temperature_p(P, s, 1)
+
+
+# Same style as h_s_water.py: temperature in °C, pressure in kPa, results per kg,
+# but every argument may be an array.
+
+def calculate_enthalpy_tp(temperature, pressure):
+    """计算给定温度 (°C) 和压力 (kPa) 下的水的焓值 (kJ/kg)，支持数组"""
+    return properties_tp(np.asarray(temperature) + 273.15, pressure)[0]
+
+def calculate_enthalpy_tx(temperature, quality):
+    """计算给定温度 (°C) 和干度下的水的焓值 (kJ/kg)，支持数组"""
+    return properties_tx(np.asarray(temperature) + 273.15, quality)[0]
+
+def calculate_entropy_tp(temperature, pressure):
+    """计算给定温度 (°C) 和压力 (kPa) 下的水的熵值 (kJ/(kg·K))，支持数组"""
+    return properties_tp(np.asarray(temperature) + 273.15, pressure)[1]
+
+def calculate_entropy_tx(temperature, quality):
+    """计算给定温度 (°C) 和干度下的水的熵值 (kJ/(kg·K))，支持数组"""
+    return properties_tx(np.asarray(temperature) + 273.15, quality)[1]
+
+def calculate_temperature_ph(pressure, enthalpy):
+    """计算给定压力 (kPa) 和焓值 (kJ/kg) 下的水的温度 (°C)，支持数组"""
+    return temperature_ph(pressure, enthalpy)[0] - 273.15
+
+def calculate_temperature_ps(pressure, entropy):
+    """计算给定压力 (kPa) 和熵值 (kJ/(kg·K)) 下的水的温度 (°C)，支持数组"""
+    return temperature_ps(pressure, entropy)[0] - 273.15
+
+
+if __name__ == '__main__':
+    temperature = 50  # °C
+    pressure = 101.325  # kPa
+    print(f"At T={temperature}°C and P={pressure} kPa:")
+    print(f"  Enthalpy: {calculate_enthalpy_tp(temperature, pressure):.2f} kJ/kg")
+    print(f"  Entropy: {calculate_entropy_tp(temperature, pressure):.4f} kJ/(kg·K)")
+
+    temperature = 100  # °C
+    quality = 0.5  # 50% 干度
+    print(f"\nAt T={temperature}°C and quality={quality}:")
+    print(f"  Enthalpy: {calculate_enthalpy_tx(temperature, quality):.2f} kJ/kg")
+    print(f"  Entropy: {calculate_entropy_tx(temperature, quality):.4f} kJ/(kg·K)")
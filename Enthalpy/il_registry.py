@@ -0,0 +1,231 @@
+import csv
+import os
+
+import numpy as np
+
+T_REF = 298.15  # Reference temperature of the enthalpy integral in K
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'IL_Cp_with_Molar_Mass.csv')
+
+
+class ILRegistry:
+    """
+    Ionic-liquid heat capacity data loaded once into compact arrays.
+
+    Cp(T) = C0 + C1*T + C2*T**2 in J/(mol*K). The coefficients and molar masses
+    are stored as one array each, and a name -> index map turns liquid names
+    into integer ids, so property evaluation for any mix of liquids and
+    temperatures is a single array operation.
+
+    Args:
+        file_path (str, optional): CSV with the columns "Ionic liquid", C0, C1,
+            C2 and "Molar Mass (g/mol)". Defaults to IL_Cp_with_Molar_Mass.csv
+            next to this module.
+    """
+
+    def __init__(self, file_path=DEFAULT_FILE):
+        with open(file_path, newline='') as f:
+            rows = list(csv.DictReader(f))
+
+        def number(text):
+            text = (text or '').strip()
+            return float(text) if text and text.upper() != 'NA' else np.nan
+
+        self.names = [row['Ionic liquid'] for row in rows]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.C0 = np.array([number(row['C0']) for row in rows])
+        self.C1 = np.array([number(row['C1']) for row in rows])
+        self.C2 = np.array([number(row['C2']) for row in rows])
+        self.molar_mass = np.array([number(row.get('Molar Mass (g/mol)')) for row in rows])
+
+    def __len__(self):
+        return len(self.names)
+
+    def ids(self, ionic_liquids):
+        """
+        Convert ionic liquid names (or ids) to an integer id array.
+
+        Raises:
+            ValueError: If a name is not in the registry or an id is out of range.
+        """
+        ionic_liquids = np.asarray(ionic_liquids)
+        if ionic_liquids.dtype.kind in 'iu':
+            n = len(self)
+            if not (0 <= int(ionic_liquids) < n if ionic_liquids.ndim == 0
+                    else ionic_liquids.size == 0 or (ionic_liquids.min() >= 0 and ionic_liquids.max() < n)):
+                bad = ionic_liquids[(ionic_liquids < 0) | (ionic_liquids >= n)].flat[0]
+                raise ValueError(f"Ionic liquid id {bad} not found in the database (ids are 0 to {n - 1}).")
+            return ionic_liquids.astype(np.intp)
+        ids = np.empty(ionic_liquids.shape, dtype=np.intp)
+        for pos, name in np.ndenumerate(ionic_liquids):
+            try:
+                ids[pos] = self.index[str(name)]
+            except KeyError:
+                raise ValueError(f"Ionic liquid '{name}' not found in the database.") from None
+        return ids
+
+    def cp(self, il_ids, T):
+        """
+        Molar heat capacity in J/(mol*K).
+
+        Args:
+            il_ids (str, int or array-like): Ionic liquid name(s) or id(s).
+            T (float or array-like): Temperature in K, broadcast against il_ids.
+        """
+        i = self.ids(il_ids)
+        T = np.asarray(T, dtype=float)
+        return (self.C0[i] + (self.C1[i] + self.C2[i] * T) * T)[()]
+
+    def h_molar(self, il_ids, T, T_ref=T_REF):
+        """Enthalpy change from T_ref to T in J/mol (integral of Cp)."""
+        return self._h_molar(self.ids(il_ids), T, T_ref)[()]
+
+    def _h_molar(self, i, T, T_ref):
+        """`h_molar` for ids already checked by `ids`."""
+        T = np.asarray(T, dtype=float)
+        return (self.C0[i] * (T - T_ref)
+                + 0.5 * self.C1[i] * (T**2 - T_ref**2)
+                + (1 / 3) * self.C2[i] * (T**3 - T_ref**3))
+
+    def h(self, il_ids, T, T_ref=T_REF):
+        """
+        Enthalpy change from T_ref to T in kJ/kg, as returned by `enthalpy_IL`.
+
+        NaN for liquids without a molar mass.
+        """
+        i = self.ids(il_ids)
+        return (self._h_molar(i, T, T_ref) / self.molar_mass[i])[()]
+
+    def T_from_h_molar(self, il_ids, h_molar, T_ref=T_REF):
+        """
+        Temperature in K at which the enthalpy change from T_ref is `h_molar` (J/mol).
+
+        Closed-form inverse of `h_molar`. With u = T - T_ref the integral is
+        c1*u + c2*u**2 + c3*u**3, c1 = Cp(T_ref), c2 = C1/2 + C2*T_ref, c3 = C2/3.
+        The quadratic root u = 2h / (c1 + sqrt(c1**2 + 4*c2*h)) is exact for
+        liquids with C2 = 0 and is polished by Newton steps on the cubic
+        otherwise. NaN where no temperature on the branch through T_ref gives
+        the enthalpy.
+
+        Args:
+            il_ids (str, int or array-like): Ionic liquid name(s) or id(s).
+            h_molar (float or array-like): Enthalpy change in J/mol, broadcast against il_ids.
+            T_ref (float, optional): Reference temperature in K. Defaults to 298.15.
+        """
+        return self._T_from_h_molar(self.ids(il_ids), h_molar, T_ref)[()]
+
+    def _T_from_h_molar(self, i, h_molar, T_ref):
+        """`T_from_h_molar` for ids already checked by `ids`."""
+        h_molar = np.asarray(h_molar, dtype=float)
+        C1, C2 = self.C1[i], self.C2[i]
+        c1 = self.C0[i] + (C1 + C2 * T_ref) * T_ref
+        c2 = 0.5 * C1 + C2 * T_ref
+        c3 = C2 / 3
+        with np.errstate(invalid='ignore', divide='ignore'):
+            u = 2 * h_molar / (c1 + np.sqrt(c1 * c1 + 4 * c2 * h_molar))
+            for _ in range(3):
+                u = u - ((c1 + (c2 + c3 * u) * u) * u - h_molar) / (c1 + (2 * c2 + 3 * c3 * u) * u)
+        return T_ref + u
+
+    def T_from_h(self, il_ids, h, T_ref=T_REF):
+        """
+        Temperature in K at which the enthalpy change from T_ref is `h` (kJ/kg), the inverse of `h`.
+
+        NaN for liquids without a molar mass.
+        """
+        i = self.ids(il_ids)
+        return self._T_from_h_molar(i, np.asarray(h, dtype=float) * self.molar_mass[i], T_ref)[()]
+
+    def ids_with_molar_mass(self):
+        """Ids of the liquids whose molar mass is known."""
+        return np.flatnonzero(~np.isnan(self.molar_mass))
+
+    def iter_h_surface(self, il_ids=None, T_start=T_REF, T_stop=373.15, T_step=0.1,
+                       h_ref=0.0, basis='mass', dtype=np.float64, chunk_rows=65536):
+        """
+        Stream the (temperature x liquid) enthalpy matrix in blocks of rows.
+
+        The grid is T_start + k*dT for T < T_stop (the same values as
+        np.arange(T_start, T_stop, T_step)), generated block by block, so very
+        fine or wide grids never have to fit in memory at once. Each block is
+        one broadcast of the Cp integral over all liquids, written in the
+        factored form (T - T_ref) * (C0 + C1/2 (T + T_ref) + C2/3 (T**2 + T T_ref + T_ref**2)),
+        which stays accurate in float32.
+
+        Args:
+            il_ids (array-like, optional): Liquids (names or ids), one column
+                each. Defaults to all liquids with a known molar mass.
+            T_start, T_stop, T_step (float, optional): Temperature grid in K.
+            h_ref (float, optional): Enthalpy at 298.15 K in kJ/kg. Defaults to 0.
+            basis (str, optional): 'mass' for kJ/kg or 'molar' for kJ/mol.
+            dtype (optional): np.float64 or np.float32. Defaults to np.float64.
+            chunk_rows (int, optional): Temperatures per block. Defaults to 65536.
+
+        Yields:
+            tuple: (T_block, H_block) with H_block of shape (len(T_block), n_liquids).
+        """
+        if basis not in ('mass', 'molar'):
+            raise ValueError(f"Unknown basis '{basis}', expected 'mass' or 'molar'.")
+        i = self.ids_with_molar_mass() if il_ids is None else np.atleast_1d(self.ids(il_ids))
+        n_rows = max(int(np.ceil((T_stop - T_start) / T_step)), 0)
+        delta = (T_start + T_step) - T_start  # as np.arange computes it
+
+        T_ref = np.asarray(T_REF, dtype=dtype)
+        C0 = self.C0[i].astype(dtype)
+        C1_2 = (0.5 * self.C1[i]).astype(dtype)
+        C2_3 = (self.C2[i] / 3).astype(dtype)
+        M = self.molar_mass[i].astype(dtype)
+        if basis == 'mass':
+            scale = 1 / M                 # J/mol -> kJ/kg
+            offset = np.full_like(M, h_ref)
+        else:
+            scale = np.full_like(M, 1e-3)  # J/mol -> kJ/mol
+            offset = h_ref * M / 1000
+
+        for start in range(0, n_rows, chunk_rows):
+            T = T_start + delta * np.arange(start, min(start + chunk_rows, n_rows))
+            Tc = T.astype(dtype)[:, None]
+            H = (Tc - T_ref) * (C0 + C1_2 * (Tc + T_ref) + C2_3 * (Tc * Tc + Tc * T_ref + T_ref * T_ref))
+            yield T, (H * scale + offset).astype(dtype, copy=False)
+
+    def h_surface(self, il_ids=None, T_start=T_REF, T_stop=373.15, T_step=0.1,
+                  h_ref=0.0, basis='mass', dtype=np.float64):
+        """
+        Full (temperature x liquid) enthalpy matrix; see `iter_h_surface`.
+
+        Returns:
+            tuple: (T, H) with H of shape (len(T), n_liquids).
+        """
+        blocks = list(self.iter_h_surface(il_ids, T_start, T_stop, T_step, h_ref, basis, dtype))
+        if not blocks:
+            n = len(self.ids_with_molar_mass()) if il_ids is None else np.size(il_ids)
+            return np.empty(0), np.empty((0, n), dtype=dtype)
+        T, H = zip(*blocks)
+        return np.concatenate(T), np.concatenate(H)
+
+
+_registries = {}
+
+
+def get_registry(file_path=None):
+    """Return the registry for `file_path` (default data file), loading it only once."""
+    path = os.path.abspath(DEFAULT_FILE if file_path is None else file_path)
+    registry = _registries.get(path)
+    if registry is None:
+        registry = _registries[path] = ILRegistry(path)
+    return registry
+
+
+def cp(il_ids, T):
+    """Vectorized heat capacity in J/(mol*K) from the default registry (T in K)."""
+    return get_registry().cp(il_ids, T)
+
+
+def h(il_ids, T):
+    """Vectorized enthalpy relative to 298.15 K in kJ/kg from the default registry (T in K)."""
+    return get_registry().h(il_ids, T)
+
+
+def T_from_h(il_ids, h):
+    """Vectorized temperature in K from the enthalpy relative to 298.15 K in kJ/kg (default registry)."""
+    return get_registry().T_from_h(il_ids, h)
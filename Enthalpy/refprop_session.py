@@ -0,0 +1,135 @@
+import os
+from collections import namedtuple
+
+# All properties of one flash, in REFPROP molar units:
+# T (K), P (kPa), D (mol/L), h (J/mol), s (J/(mol*K)), q (molar quality)
+FlashResult = namedtuple('FlashResult', ['T', 'P', 'D', 'h', 's', 'q'])
+
+
+def load_refprop(prefix):
+    """
+    Default backend: load the REFPROP shared library through ctREFPROP.
+
+    A backend is any callable taking the REFPROP directory and returning an
+    object with the `SETUPdll`, `TPFLSHdll` and `TQFLSHdll` methods of
+    `REFPROPFunctionLibrary` (e.g. a fake for machines without REFPROP).
+    """
+    from ctREFPROP.ctREFPROP import REFPROPFunctionLibrary
+    RP = REFPROPFunctionLibrary(prefix)
+    RP.SETPATHdll(prefix)
+    return RP
+
+
+_backend = load_refprop
+_libraries = {}    # (backend, prefix) -> loaded library
+_active_fluid = {}  # id(library) -> fluid currently set up in it
+_sessions = {}     # (backend, prefix, fluid, mixture, reference) -> RefpropSession
+
+
+def set_backend(backend):
+    """
+    Select the callable used to load the library and drop all cached sessions.
+
+    Args:
+        backend (callable): backend(prefix) -> REFPROP-like object, or None to
+            restore `load_refprop`.
+    """
+    global _backend
+    _backend = load_refprop if backend is None else backend
+    clear_sessions()
+
+
+def clear_sessions():
+    """Forget all loaded libraries and sessions."""
+    _libraries.clear()
+    _active_fluid.clear()
+    _sessions.clear()
+
+
+class RefpropSession:
+    """
+    A fluid set up in a loaded REFPROP library.
+
+    REFPROP keeps one active fluid per library, so sessions for different
+    fluids may share a library; `SETUPdll` is only called again when the
+    library was switched to another fluid in between.
+
+    Args:
+        RP: Loaded REFPROP library (or a backend object with the same methods).
+        fluid (str): Fluid file, e.g. "WATER.FLD".
+        mixture (str, optional): Mixing rules file. Defaults to "HMX.BNC".
+        reference (str, optional): Reference state. Defaults to "DEF".
+    """
+
+    def __init__(self, RP, fluid, mixture='HMX.BNC', reference='DEF'):
+        self.RP = RP
+        self.fluid = fluid
+        self.mixture = mixture
+        self.reference = reference
+        self.z = [1.0]
+        self.activate()
+
+    def activate(self):
+        """Make this session's fluid the active fluid of the library."""
+        if _active_fluid.get(id(self.RP)) == (self.fluid, self.mixture, self.reference):
+            return self.RP
+        r = self.RP.SETUPdll(1, self.fluid, self.mixture, self.reference)
+        if r.ierr != 0:
+            raise ValueError(f"Error setting up fluid: {r.herr}")
+        _active_fluid[id(self.RP)] = (self.fluid, self.mixture, self.reference)
+        return self.RP
+
+    def flash_tp(self, temperature, pressure):
+        """
+        All properties from one TP flash.
+
+        Args:
+            temperature (float): Temperature in K.
+            pressure (float): Pressure in kPa.
+
+        Returns:
+            FlashResult: T, P, D, h, s and q in REFPROP molar units.
+        """
+        result = self.activate().TPFLSHdll(temperature, pressure, self.z)
+        if result.ierr != 0:
+            raise ValueError(f"Error in TP flash calculation: {result.herr}")
+        return FlashResult(temperature, pressure, result.D, result.h, result.s, result.q)
+
+    def flash_tq(self, temperature, quality, kq=1):
+        """
+        All properties from one TQ flash.
+
+        Args:
+            temperature (float): Temperature in K.
+            quality (float): Vapor quality (molar basis for kq=1).
+            kq (int, optional): Quality basis flag of TQFLSHdll. Defaults to 1.
+
+        Returns:
+            FlashResult: T, P, D, h, s and q in REFPROP molar units.
+        """
+        result = self.activate().TQFLSHdll(temperature, quality, self.z, kq)
+        if result.ierr != 0:
+            raise ValueError(f"Error in TQ flash calculation: {result.herr}")
+        return FlashResult(temperature, result.P, result.D, result.h, result.s, quality)
+
+
+def get_session(fluid='WATER.FLD', prefix=None, mixture='HMX.BNC', reference='DEF'):
+    """
+    Return the session for `fluid`, loading the library once per directory.
+
+    Args:
+        fluid (str, optional): Fluid file. Defaults to "WATER.FLD".
+        prefix (str, optional): REFPROP directory. Defaults to $RPPREFIX.
+
+    Returns:
+        RefpropSession: Cached session.
+    """
+    prefix = os.environ['RPPREFIX'] if prefix is None else prefix
+    key = (_backend, prefix, fluid, mixture, reference)
+    session = _sessions.get(key)
+    if session is None:
+        RP = _libraries.get((_backend, prefix))
+        if RP is None:
+            RP = _libraries[(_backend, prefix)] = _backend(prefix)
+        session = _sessions[key] = RefpropSession(RP, fluid, mixture, reference)
+    return session
@@ -0,0 +1,257 @@
+import os
+import struct
+
+import numpy as np
+
+EXCEL_MAX_ROWS = 1048575  # rows per sheet, excluding the header row
+
+_EXTENSIONS = {
+    '.npy': 'npy', '': 'npy',
+    '.npz': 'npz',
+    '.feather': 'feather', '.arrow': 'feather',
+    '.parquet': 'parquet',
+    '.xlsx': 'excel',
+}
+
+
+def infer_format(path):
+    """Format name from the file extension (a path without extension is an .npy directory)."""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        return _EXTENSIONS[ext]
+    except KeyError:
+        raise ValueError(f"Unknown results format for '{path}'") from None
+
+
+class ResultsWriter:
+    """
+    Base class of the table writers.
+
+    A table is a dict of equal-length 1-D columns, written chunk by chunk
+    with `write` and finalised with `close` (or a `with` block).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.n_rows = 0
+
+    def write(self, columns):
+        """Append a chunk of rows given as {column name: 1-D array}."""
+        columns = {name: np.asarray(values) for name, values in columns.items()}
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns of a chunk must have the same length")
+        self._write(columns)
+        self.n_rows += lengths.pop() if lengths else 0
+
+    def write_frame(self, df, index_name=None):
+        """Append a pandas DataFrame; the index is stored as a column if `index_name` is given."""
+        columns = {index_name: df.index.to_numpy()} if index_name is not None else {}
+        columns.update({str(name): df[name].to_numpy() for name in df.columns})
+        self.write(columns)
+
+    def _write(self, columns):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NpyDirWriter(ResultsWriter):
+    """
+    Directory with one .npy file per column.
+
+    The files are numbered in column order (col0000.npy, ...) and the column
+    names are listed one per line in columns.txt. Rows are appended to the
+    files as they arrive; the array headers are reserved up front and filled
+    in with the final shape on `close`. The files are plain .npy arrays, so
+    they can be memory-mapped with np.load(..., mmap_mode='r').
+    """
+
+    _HEADER_SIZE = 128  # bytes, a multiple of 64 as the .npy format requires
+
+    def __init__(self, path):
+        super().__init__(path)
+        os.makedirs(path, exist_ok=True)
+        self._files = {}
+        self._dtypes = {}
+        self._order = []
+
+    def _header(self, dtype, n_rows):
+        header = repr({'descr': np.lib.format.dtype_to_descr(dtype),
+                       'fortran_order': False, 'shape': (n_rows,)})
+        header = header.ljust(self._HEADER_SIZE - 10 - 1) + '\n'
+        return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+    def _write(self, columns):
+        if not self._files:
+            self._order = list(columns)
+        if list(columns) != self._order:
+            raise ValueError("Every chunk must have the same columns")
+        for name, values in columns.items():
+            if name not in self._files:
+                dtype = values.dtype
+                if dtype.hasobject:
+                    values = values.astype(str)
+                    dtype = values.dtype
+                self._dtypes[name] = dtype
+                file_name = os.path.join(self.path, f"col{len(self._files):04d}.npy")
+                f = self._files[name] = open(file_name, 'wb')
+                f.write(self._header(dtype, 0))
+            dtype = self._dtypes[name]
+            if dtype.kind == 'U' and values.astype(str).dtype.itemsize > dtype.itemsize:
+                raise ValueError(f"Strings in column '{name}' are longer than in the first chunk")
+            self._files[name].write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    def close(self):
+        for name, f in self._files.items():
+            f.seek(0)
+            f.write(self._header(self._dtypes[name], self.n_rows))
+            f.close()
+        with open(os.path.join(self.path, 'columns.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self._order) + '\n')
+        self._files = {}
+
+
+class NpzWriter(ResultsWriter):
+    """
+    Single uncompressed .npz file, for small tables only.
+
+    Not a streaming format: every chunk is kept in memory and the file is
+    written on `close`, and `read_table` loads it fully (.npz members cannot be
+    memory-mapped). Use the .npy directory, Feather or Parquet formats for
+    tables that do not fit in memory.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._chunks = []
+
+    def _write(self, columns):
+        self._chunks.append(columns)
+
+    def close(self):
+        if self._chunks:
+            names = list(self._chunks[0])
+            np.savez(self.path, **{name: np.concatenate([c[name] for c in self._chunks])
+                                   for name in names})
+        self._chunks = []
+
+
+class ArrowWriter(ResultsWriter):
+    """Feather (Arrow IPC file) or Parquet file written one record batch per chunk."""
+
+    def __init__(self, path, fmt):
+        super().__init__(path)
+        self.fmt = fmt
+        self._writer = None
+
+    def _write(self, columns):
+        import pyarrow as pa
+        batch = pa.RecordBatch.from_pydict(columns)
+        if self._writer is None:
+            if self.fmt == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, batch.schema)
+            else:
+                self._writer = pa.ipc.new_file(self.path, batch.schema)
+        if self.fmt == 'parquet':
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ExcelWriter(ResultsWriter):
+    """Optional Excel export (pandas + openpyxl); limited to one sheet of ~1M rows."""
+
+    def __init__(self, path, sheet_name='Sheet1'):
+        super().__init__(path)
+        self.sheet_name = sheet_name
+        self._chunks = []
+
+    def _write(self, columns):
+        if self.n_rows + len(next(iter(columns.values()), ())) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS} rows")
+        self._chunks.append(columns)
+
+    def close(self):
+        import pandas as pd
+        if self._chunks:
+            df = pd.concat([pd.DataFrame(c) for c in self._chunks], ignore_index=True)
+            mode = 'a' if os.path.exists(self.path) else 'w'
+            options = {'if_sheet_exists': 'replace'} if mode == 'a' else {}
+            with pd.ExcelWriter(self.path, engine='openpyxl', mode=mode, **options) as writer:
+                df.to_excel(writer, sheet_name=self.sheet_name, index=False)
+        self._chunks = []
+
+
+def open_writer(path, fmt=None, **options):
+    """
+    Open a chunked table writer.
+
+    Args:
+        path (str): Output path. The format follows the extension unless `fmt`
+            is given: no extension or .npy -> directory of .npy columns,
+            .npz, .feather/.arrow, .parquet (both need pyarrow) or .xlsx
+            (needs openpyxl; pass sheet_name=...). The .npz and .xlsx
+            writers hold the whole table in memory until `close`; only the
+            other formats are written chunk by chunk.
+        fmt (str, optional): 'npy', 'npz', 'feather', 'parquet' or 'excel'.
+
+    Returns:
+        ResultsWriter: Writer to use as a context manager.
+    """
+    fmt = infer_format(path) if fmt is None else fmt
+    if fmt == 'npy':
+        return NpyDirWriter(path)
+    if fmt == 'npz':
+        return NpzWriter(path)
+    if fmt in ('feather', 'parquet'):
+        return ArrowWriter(path, fmt)
+    if fmt == 'excel':
+        return ExcelWriter(path, **options)
+    raise ValueError(f"Unknown results format '{fmt}'")
+
+
+def read_table(path, fmt=None, mmap=True):
+    """
+    Read a table written by `open_writer` as {column name: np.ndarray}.
+
+    With `mmap=True` the .npy and Feather formats are memory-mapped, so
+    numeric columns are not read from disk until they are used. .npz and
+    Excel tables are always read into memory.
+    """
+    fmt = infer_format(path) if fmt is None else fmt
+    if fmt == 'npy':
+        with open(os.path.join(path, 'columns.txt'), encoding='utf-8') as f:
+            names = f.read().splitlines()
+        return {name: np.load(os.path.join(path, f"col{k:04d}.npy"), mmap_mode='r' if mmap else None)
+                for k, name in enumerate(names)}
+    if fmt == 'npz':
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    if fmt == 'feather':
+        import pyarrow as pa
+        source = pa.memory_map(path) if mmap else pa.OSFile(path)
+        table = pa.ipc.open_file(source).read_all()
+    elif fmt == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, memory_map=mmap)
+    elif fmt == 'excel':
+        import pandas as pd
+        df = pd.read_excel(path)
+        return {str(name): df[name].to_numpy() for name in df.columns}
+    else:
+        raise ValueError(f"Unknown results format '{fmt}'")
+    return {name: table.column(name).to_numpy() for name in table.column_names}
@@ -0,0 +1,487 @@
+"""
+Precomputed water h(T, P) and s(T, P) tables with bicubic interpolation.
+
+A table holds h, s and their derivatives on a grid uniform in T and ln(P),
+computed once from a backend (IAPWS-IF97 or REFPROP). Queries are answered by
+bicubic Hermite interpolation. The table file is memory-mapped read-only, so
+all processes that load it share one copy through the page cache.
+
+Phase boundary: h and s jump across the saturation line, so a cell is only
+interpolated when its four nodes are in the same phase (liquid, vapor or
+supercritical). Because the saturation pressure increases with T, such a cell
+lies entirely in that phase. Points in the few cells cut by the saturation
+line, and points outside the grid, are passed to the backend itself.
+
+Accuracy: `build` refines the grid until the interpolation error, checked
+against the backend at nine interior points of every single-phase cell, is
+below half of `atol_h` (kJ/kg) and `atol_s` (kJ/(kg*K)). The measured maxima
+are kept in `max_error_h` and `max_error_s`. Points answered by the backend
+are exact.
+
+Usage:
+
+    from Enthalpy.water_tables import get_water_table
+    table = get_water_table('refprop')      # built once, then loaded from disk
+    h, s = table.properties_tp(T, P)       # T in K, P in kPa, arrays
+"""
+import hashlib
+import importlib
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+# Bump when the table construction or file layout changes so stale files are rebuilt
+TABLE_VERSION = 1
+
+_MAGIC = b'ILWTAB01'
+_ALIGN = 64
+
+T_CRIT = 647.096  # K
+
+# Phase codes of the grid nodes
+INVALID, LIQUID, VAPOR, SUPERCRITICAL = 0, 1, 2, 3
+
+# Default grid range: liquid and vapor water in absorption cycles
+T_RANGE = (273.16, 473.15)  # K
+P_RANGE = (0.5, 10000.0)    # kPa
+
+# The sums below build (points x 8) temporaries, so large arrays are
+# evaluated in blocks to keep memory bounded
+_BLOCK = 1 << 16
+
+
+def default_cache_dir():
+    """Directory for persisted tables: $IL_ABRH_CACHE or ~/.cache/il_abrh (as for the saturation tables)."""
+    return os.environ.get('IL_ABRH_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'il_abrh'))
+
+
+def _enthalpy_module(name):
+    """Import a module of the Enthalpy package, also when this file is run as a script from Enthalpy/."""
+    try:
+        return importlib.import_module(f'Enthalpy.{name}')
+    except ImportError:
+        return importlib.import_module(name)
+
+
+class IF97Backend:
+    """Vectorized IAPWS-IF97 water (regions 1 and 2)."""
+
+    name = 'if97'
+
+    def properties_tp(self, T, P):
+        return _enthalpy_module('if97_water').properties_tp(T, P)
+
+    def saturation_pressure(self, T):
+        return _enthalpy_module('if97_water').saturation_pressure(T)
+
+
+class RefpropBackend:
+    """
+    REFPROP water through one cached session, one flash per point.
+
+    Args:
+        session (RefpropSession, optional): Water session. Defaults to
+            `get_session('WATER.FLD', prefix)`.
+        prefix (str, optional): REFPROP directory. Defaults to $RPPREFIX.
+    """
+
+    name = 'refprop'
+
+    def __init__(self, session=None, prefix=None):
+        if session is None:
+            session = _enthalpy_module('refprop_session').get_session('WATER.FLD', prefix=prefix)
+        self.session = session
+
+    def properties_tp(self, T, P):
+        M_WATER = _enthalpy_module('h_s_water').M_WATER
+        T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+        h = np.full(T.shape, np.nan)
+        s = np.full(T.shape, np.nan)
+        for pos in np.ndindex(T.shape):
+            try:
+                result = self.session.flash_tp(float(T[pos]), float(P[pos]))
+            except ValueError:
+                continue
+            h[pos], s[pos] = result.h / M_WATER, result.s / M_WATER
+        return h[()], s[()]
+
+    def saturation_pressure(self, T):
+        T = np.asarray(T, dtype=float)
+        P = np.full(T.shape, np.nan)
+        for pos in np.ndindex(T.shape):
+            if T[pos] < T_CRIT:
+                try:
+                    P[pos] = self.session.flash_tq(float(T[pos]), 0.0).P
+                except ValueError:
+                    pass
+        return P[()]
+
+
+_BACKENDS = {'if97': IF97Backend, 'refprop': RefpropBackend}
+
+
+def _backend(backend):
+    """Backend object for a name ('if97', 'refprop') or an object with the backend methods."""
+    if isinstance(backend, str):
+        try:
+            return _BACKENDS[backend]()
+        except KeyError:
+            raise ValueError(f"Unknown water backend '{backend}', expected one of {list(_BACKENDS)}.") from None
+    return backend
+
+
+def _phases(backend, T, P, h):
+    """Phase code of every (T, P) state; INVALID where the backend gave no value."""
+    with np.errstate(invalid='ignore'):
+        P_sat = backend.saturation_pressure(np.minimum(T, T_CRIT - 1e-9))
+        phase = np.where(T >= T_CRIT, SUPERCRITICAL, np.where(P >= P_sat, LIQUID, VAPOR))
+    return np.where(np.isfinite(h), phase, INVALID).astype(np.int8)
+
+
+def _hermite(t):
+    """Cubic Hermite basis functions h00, h10, h01, h11 at t in [0, 1]."""
+    t2 = t * t
+    t3 = t2 * t
+    return 2 * t3 - 3 * t2 + 1, t3 - 2 * t2 + t, 3 * t2 - 2 * t3, t3 - t2
+
+
+class WaterTable:
+    """
+    Bicubic Hermite table of water h and s over T and ln(P).
+
+    Args:
+        T_axis (tuple): (T_min, T_max, n) in K.
+        lnP_axis (tuple): (ln P_min, ln P_max, n) with P in kPa.
+        nodes (np.ndarray): (n_T, n_P, 8) node data: h, dh/dT, dh/dlnP,
+            d2h/dTdlnP, then the same for s (kJ/kg and kJ/(kg*K)).
+        phases (np.ndarray): (n_T, n_P) phase codes of the nodes.
+        max_error_h (float): Maximum interpolation error of h in kJ/kg.
+        max_error_s (float): Maximum interpolation error of s in kJ/(kg*K).
+        backend (optional): Backend for points the table does not cover;
+            without one they are NaN.
+    """
+
+    def __init__(self, T_axis, lnP_axis, nodes, phases, max_error_h, max_error_s, backend=None):
+        self.T_axis = (float(T_axis[0]), float(T_axis[1]), int(T_axis[2]))
+        self.lnP_axis = (float(lnP_axis[0]), float(lnP_axis[1]), int(lnP_axis[2]))
+        self.nodes = nodes
+        self.phases = phases
+        self.max_error_h = float(max_error_h)
+        self.max_error_s = float(max_error_s)
+        self.backend = backend
+        n_T, n_P = self.T_axis[2], self.lnP_axis[2]
+        self.dT = (self.T_axis[1] - self.T_axis[0]) / (n_T - 1)
+        self.dlnP = (self.lnP_axis[1] - self.lnP_axis[0]) / (n_P - 1)
+        self._rows = nodes.reshape(n_T * n_P, 8)
+
+        # A cell (lower-left node i, j) is interpolated only if its four nodes share one valid phase
+        p = np.asarray(phases)
+        corner = p[:-1, :-1]
+        clean = (corner != INVALID) & (p[1:, :-1] == corner) & (p[:-1, 1:] == corner) & (p[1:, 1:] == corner)
+        self._clean = clean.ravel()
+
+    @property
+    def shape(self):
+        return self.T_axis[2], self.lnP_axis[2]
+
+    def _cells(self, T, P):
+        """Lower-left node, local coordinates and coverage of every point (flat arrays)."""
+        n_T, n_P = self.shape
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x = (T - self.T_axis[0]) / self.dT
+            y = (np.log(P) - self.lnP_axis[0]) / self.dlnP
+        inside = (x >= 0) & (x <= n_T - 1) & (y >= 0) & (y <= n_P - 1)
+        i = np.clip(np.floor(np.where(inside, x, 0)), 0, n_T - 2).astype(np.intp)
+        j = np.clip(np.floor(np.where(inside, y, 0)), 0, n_P - 2).astype(np.intp)
+        covered = inside & self._clean[i * (n_P - 1) + j]
+        return i, j, x - i, y - j, covered
+
+    def covered(self, T, P):
+        """True where (T in K, P in kPa) is answered from the table rather than the backend."""
+        T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+        return self._cells(T.ravel(), P.ravel())[4].reshape(T.shape)[()]
+
+    def _interpolate(self, i, j, t, u):
+        """Bicubic Hermite h and s inside cells (i, j) at local coordinates (t, u)."""
+        n_P = self.shape[1]
+        a0, a1, b0, b1 = _hermite(t)
+        c0, c1, d0, d1 = _hermite(u)
+        a1 *= self.dT
+        b1 *= self.dT
+        c1 *= self.dlnP
+        d1 *= self.dlnP
+        k = i * n_P + j
+        h = np.zeros(len(k))
+        s = np.zeros(len(k))
+        # Weights of (f, f_T, f_lnP, f_TlnP) at the corners (i, j), (i, j+1), (i+1, j), (i+1, j+1)
+        for offset, wt0, wt1, wu0, wu1 in ((0, a0, a1, c0, c1), (1, a0, a1, d0, d1),
+                                           (n_P, b0, b1, c0, c1), (n_P + 1, b0, b1, d0, d1)):
+            rows = self._rows[k + offset]
+            weights = np.stack([wt0 * wu0, wt1 * wu0, wt0 * wu1, wt1 * wu1], axis=1)
+            h += np.einsum('ij,ij->i', weights, rows[:, :4])
+            s += np.einsum('ij,ij->i', weights, rows[:, 4:])
+        return h, s
+
+    def properties_tp(self, T, P):
+        """
+        Enthalpy and entropy of water for arrays of T (K) and P (kPa).
+
+        Returns:
+            tuple: (h in kJ/kg, s in kJ/(kg*K)).
+        """
+        T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+        shape = T.shape
+        T, P = T.ravel(), P.ravel()
+        h = np.full(T.size, np.nan)
+        s = np.full(T.size, np.nan)
+        missed = []
+        for start in range(0, T.size, _BLOCK):
+            block = slice(start, start + _BLOCK)
+            i, j, t, u, covered = self._cells(T[block], P[block])
+            index = np.flatnonzero(covered)
+            h[start + index], s[start + index] = self._interpolate(i[index], j[index], t[index], u[index])
+            missed.append(start + np.flatnonzero(~covered))
+        missed = np.concatenate(missed)
+        if missed.size and self.backend is not None:
+            h[missed], s[missed] = self.backend.properties_tp(T[missed], P[missed])
+        return h.reshape(shape)[()], s.reshape(shape)[()]
+
+    @classmethod
+    def from_backend(cls, backend, T_range, P_range, n_T, n_P, delta_T=1e-3, delta_lnP=1e-4):
+        """
+        Tabulate `backend` on an n_T x n_P grid without checking the accuracy.
+
+        Derivatives are central differences with steps `delta_T` (K) and
+        `delta_lnP`, one-sided where a neighbour is in another phase.
+        """
+        backend = _backend(backend)
+        T = np.linspace(T_range[0], T_range[1], n_T)
+        lnP = np.linspace(np.log(P_range[0]), np.log(P_range[1]), n_P)
+        offsets = (-1, 0, 1)
+        # Backend values and phases on the 3 x 3 stencil around every node
+        f = np.empty((3, 3, n_T, n_P, 2))
+        phase = np.empty((3, 3, n_T, n_P), dtype=np.int8)
+        for a, di in enumerate(offsets):
+            T_s = np.broadcast_to((T + di * delta_T)[:, None], (n_T, n_P))
+            for b, dj in enumerate(offsets):
+                P_s = np.broadcast_to(np.exp(lnP + dj * delta_lnP)[None, :], (n_T, n_P))
+                h, s = backend.properties_tp(T_s, P_s)
+                f[a, b, ..., 0], f[a, b, ..., 1] = h, s
+                phase[a, b] = _phases(backend, T_s, P_s, h)
+        centre = phase[1, 1]
+        same = (phase == centre)[..., None]
+
+        def first(plus, zero, minus, ok_plus, ok_minus, step):
+            """Central difference, one-sided where one neighbour is in another phase, else 0."""
+            return np.where(ok_plus & ok_minus, (plus - minus) / (2 * step),
+                            np.where(ok_plus, (plus - zero) / step,
+                                     np.where(ok_minus, (zero - minus) / step, 0.0)))
+
+        f_T = first(f[2, 1], f[1, 1], f[0, 1], same[2, 1], same[0, 1], delta_T)
+        f_y = first(f[1, 2], f[1, 1], f[1, 0], same[1, 2], same[1, 0], delta_lnP)
+
+        # Mixed derivative: central where all four diagonal neighbours share the phase,
+        # else from the quadrant towards the same-phase neighbours
+        central = same[0, 0] & same[0, 2] & same[2, 0] & same[2, 2]
+        f_Ty = (f[2, 2] - f[2, 0] - f[0, 2] + f[0, 0]) / (4 * delta_T * delta_lnP)
+        for a, b in ((2, 2), (2, 0), (0, 2), (0, 0)):
+            quadrant = ~central & same[a, 1] & same[1, b] & same[a, b]
+            value = (f[a, b] - f[a, 1] - f[1, b] + f[1, 1]) * ((a - 1) * (b - 1)) / (delta_T * delta_lnP)
+            f_Ty = np.where(quadrant, value, f_Ty)
+            central = central | quadrant
+        f_Ty = np.where(central, f_Ty, 0.0)
+
+        nodes = np.empty((n_T, n_P, 8))
+        for k in range(2):
+            nodes[..., 4 * k:4 * k + 4] = np.stack([f[1, 1, ..., k], f_T[..., k], f_y[..., k], f_Ty[..., k]], axis=-1)
+        nodes[centre == INVALID] = np.nan
+        return cls((T[0], T[-1], n_T), (lnP[0], lnP[-1], n_P), nodes, centre, np.inf, np.inf, backend)
+
+    @classmethod
+    def build(cls, backend='if97', T_range=T_RANGE, P_range=P_RANGE, atol_h=1e-3, atol_s=1e-6,
+              n_start=33, n_max=1025):
+        """
+        Build a table that meets the accuracy targets.
+
+        Args:
+            backend (str or object, optional): 'if97', 'refprop' or an object
+                with `properties_tp(T, P)` and `saturation_pressure(T)`.
+                Defaults to 'if97'.
+            T_range (tuple, optional): (T_min, T_max) in K.
+            P_range (tuple, optional): (P_min, P_max) in kPa.
+            atol_h (float, optional): Target error of h in kJ/kg. Defaults to 1e-3.
+            atol_s (float, optional): Target error of s in kJ/(kg*K). Defaults to 1e-6.
+            n_start (int, optional): Initial nodes per axis. Defaults to 33.
+            n_max (int, optional): Node limit per axis. Defaults to 1025.
+
+        Returns:
+            WaterTable: The table.
+
+        Raises:
+            ValueError: If the targets are not reached with `n_max` nodes per axis.
+        """
+        backend = _backend(backend)
+        fractions = np.array([0.25, 0.5, 0.75])
+        n = n_start
+        while True:
+            table = cls.from_backend(backend, T_range, P_range, n, n)
+
+            # Check the interpolation inside every single-phase cell
+            T0, lnP0 = table.T_axis[0], table.lnP_axis[0]
+            i, j = np.nonzero(table._clean.reshape(n - 1, n - 1))
+            P_check = np.broadcast_to(np.exp(lnP0 + (j[:, None, None] + fractions[None, None, :]) * table.dlnP),
+                                      (len(i), 3, 3)).ravel()
+            T_check = np.broadcast_to(T0 + (i[:, None, None] + fractions[None, :, None]) * table.dT,
+                                      (len(i), 3, 3)).ravel()
+            h_exact, s_exact = backend.properties_tp(T_check, P_check)
+            h_table, s_table = table.properties_tp(T_check, P_check)
+            err_h = np.nanmax(np.abs(h_table - h_exact))
+            err_s = np.nanmax(np.abs(s_table - s_exact))
+
+            within = err_h <= 0.5 * atol_h and err_s <= 0.5 * atol_s
+            if within or 2 * n - 1 > n_max:
+                break
+            n = 2 * n - 1  # keeps the previous nodes
+
+        if not within:
+            raise ValueError(f"Water table did not reach atol_h={atol_h}, atol_s={atol_s} "
+                             f"with {n} x {n} nodes (errors {err_h:.3g}, {err_s:.3g})")
+        table.max_error_h, table.max_error_s = err_h, err_s
+        return table
+
+    def save(self, path):
+        """
+        Write the table as a header followed by the raw node data and phases.
+
+        The layout is: 8-byte magic, 8-byte header length, JSON header, padding
+        to 64 bytes, float64 nodes (n_T, n_P, 8), int8 phases (n_T, n_P). The
+        file is written under a unique temporary name and then replaces `path`,
+        so readers that memory-map it never see a partly written table.
+        """
+        n_T, n_P = self.shape
+        header = {'version': TABLE_VERSION, 'backend': _backend_name(self.backend),
+                  'T_axis': self.T_axis, 'lnP_axis': self.lnP_axis,
+                  'max_error_h': self.max_error_h, 'max_error_s': self.max_error_s}
+        text = json.dumps(header).encode()
+        offset = -(-(16 + len(text)) // _ALIGN) * _ALIGN
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_MAGIC + struct.pack('<Q', len(text)) + text)
+                f.write(b'\0' * (offset - 16 - len(text)))
+                f.write(np.ascontiguousarray(self.nodes, dtype='<f8').tobytes())
+                f.write(np.ascontiguousarray(self.phases, dtype=np.int8).tobytes())
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path, backend=None):
+        """
+        Memory-map a table written by `save` (read-only, shared between processes).
+
+        Raises:
+            ValueError: If the file is not a water table of this version.
+        """
+        with open(path, 'rb') as f:
+            magic = f.read(8)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a water table file.")
+            length, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(length))
+        if header['version'] != TABLE_VERSION:
+            raise ValueError(f"{path} has table version {header['version']}, expected {TABLE_VERSION}.")
+        n_T, n_P = header['T_axis'][2], header['lnP_axis'][2]
+        offset = -(-(16 + length) // _ALIGN) * _ALIGN
+        nodes = np.memmap(path, dtype='<f8', mode='r', offset=offset, shape=(n_T, n_P, 8))
+        phases = np.memmap(path, dtype=np.int8, mode='r', offset=offset + nodes.nbytes, shape=(n_T, n_P))
+        return cls(header['T_axis'], header['lnP_axis'], nodes, phases,
+                   header['max_error_h'], header['max_error_s'], backend)
+
+
+def _backend_name(backend):
+    """Name a backend's tables are cached under: its `name`, else its class name."""
+    return getattr(backend, 'name', type(backend).__qualname__)
+
+
+def table_key(backend, T_range, P_range, atol_h, atol_s):
+    """Hash of everything the table depends on, used as its cache key."""
+    key = {
+        'version': TABLE_VERSION,
+        'backend': _backend_name(backend),
+        'fluid': getattr(getattr(backend, 'session', None), 'fluid', None),
+        'reference': getattr(getattr(backend, 'session', None), 'reference', None),
+        'T_range': list(T_range),
+        'P_range': list(P_range),
+        'atol_h': atol_h,
+        'atol_s': atol_s,
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+_tables = {}
+
+
+def get_water_table(backend='if97', T_range=T_RANGE, P_range=P_RANGE, atol_h=1e-3, atol_s=1e-6,
+                    cache_dir=None):
+    """
+    Return the water table for `backend`, building it at most once.
+
+    Tables are kept in memory and persisted to `cache_dir` (see
+    `default_cache_dir`) as `water_<backend>_<key>.bin`, where the key hashes
+    the backend and the table settings. Loaded tables are memory-mapped, so
+    worker processes share the file's pages. A table that cannot be written
+    to disk is still cached in memory.
+
+    Custom backend objects are cached under their `name` attribute, or their
+    class name if they have none, so custom backends with different data
+    need distinct, stable names.
+    """
+    backend = _backend(backend)
+    key = table_key(backend, T_range, P_range, atol_h, atol_s)
+    table = _tables.get(key)
+    if table is not None:
+        return table
+
+    cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+    path = os.path.join(cache_dir, f"water_{_backend_name(backend)}_{key}.bin")
+    if os.path.exists(path):
+        table = WaterTable.load(path, backend)
+    else:
+        table = WaterTable.build(backend, T_range, P_range, atol_h, atol_s)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            table.save(path)
+            table = WaterTable.load(path, backend)
+        except OSError:
+            pass
+
+    _tables[key] = table
+    return table
+
+
+# Same style as if97_water.py: temperature in °C, pressure in kPa, results per kg,
+# every argument may be an array.
+
+def calculate_enthalpy_tp(temperature, pressure, backend='if97'):
+    """计算给定温度 (°C) 和压力 (kPa) 下的水的焓值 (kJ/kg)，查表插值，支持数组"""
+    return get_water_table(backend).properties_tp(np.asarray(temperature) + 273.15, pressure)[0]
+
+def calculate_entropy_tp(temperature, pressure, backend='if97'):
+    """计算给定温度 (°C) 和压力 (kPa) 下的水的熵值 (kJ/(kg·K))，查表插值，支持数组"""
+    return get_water_table(backend).properties_tp(np.asarray(temperature) + 273.15, pressure)[1]
+
+
+if __name__ == '__main__':
+    table = get_water_table()
+    print(f"{table.shape[0]} x {table.shape[1]} nodes, max error h {table.max_error_h:.2e} kJ/kg, "
+          f"s {table.max_error_s:.2e} kJ/(kg·K)")
+    temperature = 50  # °C
+    pressure = 101.325  # kPa
+    print(f"At T={temperature}°C and P={pressure} kPa:")
+    print(f"  Enthalpy: {calculate_enthalpy_tp(temperature, pressure):.2f} kJ/kg")
+    print(f"  Entropy: {calculate_entropy_tp(temperature, pressure):.4f} kJ/(kg·K)")
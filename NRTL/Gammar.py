@@ -1,51 +1,397 @@
-import pandas as pd
+import csv
+import os
+from collections import namedtuple
 
-# Load the CSV file
-file_path = 'NRTL_para2.csv'
-nrtl_data = pd.read_csv(file_path)
+import numpy as np
 
-# Display the first few rows to understand its structure
-print(nrtl_data.head())
+R = 8.314462618  # Gas constant in J/(mol*K)
 
+# ln(gamma) of both components with their analytic partial derivatives with
+# respect to T (at constant x) and to x = x1 (at constant T)
+NRTLDerivatives = namedtuple('NRTLDerivatives', ['ln_gamma1', 'ln_gamma2', 'dln_gamma1_dT', 'dln_gamma2_dT',
+                                                 'dln_gamma1_dx', 'dln_gamma2_dx'])
+
+# Parameter file (resolved next to this module so it works from any directory);
+# it is only read when the table is first used
+file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'NRTL_para2.csv')
+
+
+class NRTLTable:
+    """
+    Compiled NRTL parameter table.
+
+    The parameters of every working pair are stored as one array per column
+    (struct-of-arrays) and addressed by an integer pair id, so a lookup is a
+    NumPy fancy index instead of a DataFrame filter.
+
+    Args:
+        data (pd.DataFrame or dict): Table with the columns of `NRTL_para.csv`.
+    """
+
+    columns = ['tau_0_12', 'tau_1_12', 'tau_0_21', 'tau_1_21', 'alpha']
+
+    def __init__(self, data):
+        self.names = [str(name) for name in data['Working pairs']]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        for column in self.columns:
+            setattr(self, column, np.asarray(data[column], dtype=float))
+
+    @classmethod
+    def from_csv(cls, path):
+        """Compile a table from a parameter CSV file."""
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        return cls({column: [row[column] for row in rows] for column in ['Working pairs'] + cls.columns})
+
+    def __len__(self):
+        return len(self.names)
+
+    def pair_ids(self, pairs):
+        """
+        Convert working pair names (or ids) to an integer id array.
+
+        Args:
+            pairs (str, int or array-like): Pair name(s) or id(s).
+
+        Returns:
+            np.ndarray: Integer pair ids with the shape of `pairs`.
+
+        Raises:
+            ValueError: If a name is not in the table or an id is out of range.
+        """
+        pairs = np.asarray(pairs)
+        if pairs.dtype.kind in 'iu':
+            if not (0 <= int(pairs) < len(self) if pairs.ndim == 0
+                    else pairs.size == 0 or (pairs.min() >= 0 and pairs.max() < len(self))):
+                bad = pairs[(pairs < 0) | (pairs >= len(self))].flat[0]
+                raise ValueError(f"Working pair id {bad} not found in the database (ids are 0 to {len(self) - 1}).")
+            return pairs.astype(np.intp)
+        ids = np.empty(pairs.shape, dtype=np.intp)
+        for pos, name in np.ndenumerate(pairs):
+            try:
+                ids[pos] = self.index[str(name)]
+            except KeyError:
+                raise ValueError(f"Working pair '{name}' not found in the database.") from None
+        return ids
+
+    def tau_G(self, pair_ids, T):
+        """
+        Calculate tau12, tau21, G12 and G21.
+
+        The result has the broadcast shape of `pair_ids` and `T` only, so when
+        compositions are broadcast on a separate axis these terms are evaluated
+        once per (pair, temperature) and not once per state.
+        """
+        pair_ids = self.pair_ids(pair_ids)
+        T = np.asarray(T, dtype=float)
+        alpha = self.alpha[pair_ids]
+        tau12 = self.tau_0_12[pair_ids] + self.tau_1_12[pair_ids] / T
+        tau21 = self.tau_0_21[pair_ids] + self.tau_1_21[pair_ids] / T
+        G12 = np.exp(-alpha * tau12)
+        G21 = np.exp(-alpha * tau21)
+        return tau12, tau21, G12, G21
+
+    def ln_activity_coefficients(self, pair_ids, x, T=298.15):
+        """
+        Calculate ln(gamma1) and ln(gamma2) for broadcast arrays of pair, x and T.
+
+        Args:
+            pair_ids (str, int or array-like): Working pair name(s) or id(s).
+            x (float or array-like): Mole fraction of component 1.
+            T (float or array-like, optional): Temperature in K. Defaults to 298.15.
+
+        Returns:
+            tuple: (ln_gamma1, ln_gamma2) with the broadcast shape of the inputs.
+        """
+        tau12, tau21, G12, G21 = self.tau_G(pair_ids, T)
+        x1 = np.asarray(x, dtype=float)
+        x2 = 1 - x1
+
+        D1 = x1 + x2 * G21
+        D2 = x2 + x1 * G12
+        ln_gamma1 = x2**2 * (tau21 * (G21 / D1)**2 + tau12 * G12 / D2**2)
+        ln_gamma2 = x1**2 * (tau12 * (G12 / D2)**2 + tau21 * G21 / D1**2)
+        return ln_gamma1, ln_gamma2
+
+    def ln_activity_coefficients_derivatives(self, pair_ids, x, T=298.15):
+        """
+        Calculate ln(gamma1), ln(gamma2) and their analytic derivatives in T and x.
+
+        With tau_ij = tau_0_ij + tau_1_ij / T the temperature derivatives are
+        d(tau_ij)/dT = -tau_1_ij / T**2 and d(G_ij)/dT = -alpha * G_ij * d(tau_ij)/dT,
+        so no extra model evaluations are needed.
+
+        Args:
+            pair_ids (str, int or array-like): Working pair name(s) or id(s).
+            x (float or array-like): Mole fraction of component 1.
+            T (float or array-like, optional): Temperature in K. Defaults to 298.15.
+
+        Returns:
+            NRTLDerivatives: ln_gamma1, ln_gamma2, dln_gamma1_dT, dln_gamma2_dT (1/K),
+            dln_gamma1_dx and dln_gamma2_dx, with the broadcast shape of the inputs.
+        """
+        pair_ids = self.pair_ids(pair_ids)
+        T = np.asarray(T, dtype=float)
+        tau12, tau21, G12, G21 = self.tau_G(pair_ids, T)
+        alpha = self.alpha[pair_ids]
+        dtau12 = -self.tau_1_12[pair_ids] / T**2
+        dtau21 = -self.tau_1_21[pair_ids] / T**2
+        dG12 = -alpha * G12 * dtau12
+        dG21 = -alpha * G21 * dtau21
+
+        x1 = np.asarray(x, dtype=float)
+        x2 = 1 - x1
+        D1 = x1 + x2 * G21
+        D2 = x2 + x1 * G12
+        A = G21 / D1
+        B = G12 / D2
+        S1 = tau21 * A**2 + tau12 * G12 / D2**2
+        S2 = tau12 * B**2 + tau21 * G21 / D1**2
+
+        # Temperature derivatives at constant composition
+        dA = (dG21 - A * x2 * dG21) / D1
+        dB = (dG12 - B * x1 * dG12) / D2
+        dS1 = (dtau21 * A**2 + 2 * tau21 * A * dA
+               + (dtau12 * G12 + tau12 * dG12) / D2**2 - 2 * tau12 * G12 * x1 * dG12 / D2**3)
+        dS2 = (dtau12 * B**2 + 2 * tau12 * B * dB
+               + (dtau21 * G21 + tau21 * dG21) / D1**2 - 2 * tau21 * G21 * x2 * dG21 / D1**3)
+
+        # Composition derivatives at constant temperature (dD1/dx = 1 - G21, dD2/dx = G12 - 1)
+        dS1_dx = (-2 * tau21 * A**2 * (1 - G21) / D1
+                  - 2 * tau12 * G12 * (G12 - 1) / D2**3)
+        dS2_dx = (-2 * tau12 * B**2 * (G12 - 1) / D2
+                  - 2 * tau21 * G21 * (1 - G21) / D1**3)
+
+        return NRTLDerivatives(
+            ln_gamma1=x2**2 * S1,
+            ln_gamma2=x1**2 * S2,
+            dln_gamma1_dT=x2**2 * dS1,
+            dln_gamma2_dT=x1**2 * dS2,
+            dln_gamma1_dx=-2 * x2 * S1 + x2**2 * dS1_dx,
+            dln_gamma2_dx=2 * x1 * S2 + x1**2 * dS2_dx,
+        )
+
+    def excess_enthalpy(self, pair_ids, x, T=298.15):
+        """
+        Molar excess (mixing) enthalpy hE = -R T**2 (x1 dln_gamma1/dT + x2 dln_gamma2/dT) in J/mol.
+
+        Args:
+            pair_ids (str, int or array-like): Working pair name(s) or id(s).
+            x (float or array-like): Mole fraction of component 1.
+            T (float or array-like, optional): Temperature in K. Defaults to 298.15.
+
+        Returns:
+            np.ndarray: hE with the broadcast shape of the inputs.
+        """
+        d = self.ln_activity_coefficients_derivatives(pair_ids, x, T)
+        x1 = np.asarray(x, dtype=float)
+        T = np.asarray(T, dtype=float)
+        return -R * T**2 * (x1 * d.dln_gamma1_dT + (1 - x1) * d.dln_gamma2_dT)
+
+    def activity_coefficients(self, pair_ids, x, T=298.15):
+        """
+        Calculate gamma1 and gamma2 for broadcast arrays of pair, x and T.
+
+        Example:
+            Evaluate every pair over a composition and temperature grid in one pass::
+
+                ids = np.arange(len(table))[:, None, None]
+                gamma1, gamma2 = table.activity_coefficients(ids, x[:, None], T)
+
+        Returns:
+            tuple: (gamma1, gamma2) with the broadcast shape of the inputs.
+        """
+        ln_gamma1, ln_gamma2 = self.ln_activity_coefficients(pair_ids, x, T)
+        return np.exp(ln_gamma1), np.exp(ln_gamma2)
+
+
+def _vecmat(v, M):
+    """Row vector(s) times matrix (or matrices): (..., N) @ (..., N, N) -> (..., N)."""
+    if M.ndim == 2:
+        return v @ M  # one matrix (a single temperature): a plain matrix product
+    return np.einsum('...k,...kj->...j', v, M)
+
+
+class NRTLMixture:
+    """
+    N-component NRTL model in matrix form.
+
+    With tau_ij = tau_0_ij + tau_1_ij / T and G_ij = exp(-alpha_ij tau_ij),
+
+        ln(gamma_i) = C_i / S_i + sum_j x_j G_ij / S_j (tau_ij - C_j / S_j)
+        S_j = sum_k x_k G_kj,   C_j = sum_k x_k tau_kj G_kj
+
+    The tau and G matrices depend on T only, so for many compositions the
+    sums are matrix products: S = x @ G, C = x @ (tau*G) and the second term
+    is y @ (tau*G).T - (y C/S) @ G.T with y = x / S. For N = 2 this is the
+    binary model of `NRTLTable`.
+
+    Args:
+        components (list): Component names.
+        tau_0, tau_1 (array-like): (N, N) interaction parameters; tau_1 in K.
+            The diagonals are ignored (taken as zero).
+        alpha (array-like): (N, N) non-randomness parameters.
+    """
+
+    def __init__(self, components, tau_0, tau_1, alpha):
+        self.components = list(components)
+        n = len(self.components)
+        off_diagonal = 1 - np.eye(n)
+        self.tau_0 = np.asarray(tau_0, dtype=float).reshape(n, n) * off_diagonal
+        self.tau_1 = np.asarray(tau_1, dtype=float).reshape(n, n) * off_diagonal
+        self.alpha = np.asarray(alpha, dtype=float).reshape(n, n) * off_diagonal
+
+    def __len__(self):
+        return len(self.components)
+
+    @classmethod
+    def from_table(cls, components, table=None, interactions=None):
+        """
+        Build a mixture from the binary pairs of an NRTL table.
+
+        The pair of components i and j is looked up as "<i> <j>" (e.g.
+        "H2O [dmim][DMP]") or, with the parameters swapped, "<j> <i>".
+
+        Args:
+            components (list): Component names, e.g. ['H2O', 'R134a', '[hmim][Tf2N]'].
+            table (NRTLTable, optional): Defaults to the table of this module.
+            interactions (dict, optional): (i, j) -> (tau_0_ij, tau_1_ij, tau_0_ji,
+                tau_1_ji, alpha) for pairs that are not in the table, with i and j
+                component names.
+
+        Raises:
+            ValueError: If a pair has no parameters.
+        """
+        table = get_nrtl_table() if table is None else table
+        interactions = dict(interactions or {})
+        n = len(components)
+        tau_0, tau_1, alpha = np.zeros((n, n)), np.zeros((n, n)), np.zeros((n, n))
+        for i in range(n):
+            for j in range(i + 1, n):
+                a, b = components[i], components[j]
+                if (a, b) in interactions:
+                    params = interactions[(a, b)]
+                elif (b, a) in interactions:
+                    t0_ji, t1_ji, t0_ij, t1_ij, alpha_ij = interactions[(b, a)]
+                    params = (t0_ij, t1_ij, t0_ji, t1_ji, alpha_ij)
+                elif f"{a} {b}" in table.index:
+                    k = table.index[f"{a} {b}"]
+                    params = (table.tau_0_12[k], table.tau_1_12[k], table.tau_0_21[k], table.tau_1_21[k],
+                              table.alpha[k])
+                elif f"{b} {a}" in table.index:
+                    k = table.index[f"{b} {a}"]
+                    params = (table.tau_0_21[k], table.tau_1_21[k], table.tau_0_12[k], table.tau_1_12[k],
+                              table.alpha[k])
+                else:
+                    raise ValueError(f"No NRTL parameters for the pair '{a}' - '{b}'.")
+                tau_0[i, j], tau_1[i, j], tau_0[j, i], tau_1[j, i], alpha[i, j] = params
+                alpha[j, i] = alpha[i, j]
+        return cls(components, tau_0, tau_1, alpha)
+
+    def tau_G(self, T):
+        """tau and G matrices with shape T.shape + (N, N)."""
+        T = np.asarray(T, dtype=float)[..., None, None]
+        tau = self.tau_0 + self.tau_1 / T
+        return tau, np.exp(-self.alpha * tau)
+
+    def ln_activity_coefficients(self, x, T=298.15):
+        """
+        Calculate ln(gamma) of all components for many compositions and temperatures.
+
+        Args:
+            x (array-like): Mole fractions with the components on the last axis, shape (..., N).
+            T (float or array-like, optional): Temperature in K, broadcast against
+                x.shape[:-1]. Defaults to 298.15.
+
+        Returns:
+            np.ndarray: ln(gamma) with the broadcast shape (..., N).
+
+        Raises:
+            ValueError: If the last axis of x is not N long.
+        """
+        x = np.asarray(x, dtype=float)
+        if x.shape[-1:] != (len(self),):
+            raise ValueError(f"x must have {len(self)} mole fractions on its last axis, got shape {x.shape}.")
+        tau, G = self.tau_G(T)
+        tau_G = tau * G
+        S = _vecmat(x, G)
+        C_S = _vecmat(x, tau_G) / S
+        y = x / S
+        return C_S + _vecmat(y, np.swapaxes(tau_G, -1, -2)) - _vecmat(y * C_S, np.swapaxes(G, -1, -2))
+
+    def activity_coefficients(self, x, T=298.15):
+        """Calculate gamma of all components; see `ln_activity_coefficients`."""
+        return np.exp(self.ln_activity_coefficients(x, T))
+
+
+_nrtl_table = None
+
+
+def get_nrtl_table():
+    """The table of `NRTL_para2.csv`, compiled on first use."""
+    global _nrtl_table
+    if _nrtl_table is None:
+        _nrtl_table = NRTLTable.from_csv(file_path)
+    return _nrtl_table
+
+
+def set_nrtl_table(table):
+    """
+    Replace the table used by the module functions, e.g. with refitted parameters.
+
+    Args:
+        table (NRTLTable or str): Compiled table, or the path of a parameter
+            CSV such as the one written by `nrtl_regression.write_parameters`.
+    """
+    global _nrtl_table
+    _nrtl_table = table if isinstance(table, NRTLTable) else NRTLTable.from_csv(table)
+
+
+def __getattr__(name):
+    # `nrtl_table` and `nrtl_data` are loaded lazily, so importing this module reads no files
+    if name == 'nrtl_table':
+        return get_nrtl_table()
+    if name == 'nrtl_data':
+        import pandas as pd
+        return pd.read_csv(file_path)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-import numpy as np
 
 def calculate_activity_coefficients(pair_name, x, T=298.15):
-    # Find the row corresponding to the given pair name
-    pair_data = nrtl_data[nrtl_data['Working pairs'] == pair_name].iloc[0]
-    
-    # Extract NRTL parameters
-    tau_0_12 = pair_data['tau_0_12']
-    tau_1_12 = pair_data['tau_1_12']
-    tau_0_21 = pair_data['tau_0_21']
-    tau_1_21 = pair_data['tau_1_21']
-    alpha = pair_data['alpha']
-    
-    # Example compositions
-    x1 = x
-    x2 = 1 - x
-    
-    # Calculate tau12 and tau21
-    tau12 = tau_0_12 + tau_1_12 / (T)
-    tau21 = tau_0_21 + tau_1_21 / (T)    
-    
-    # Calculate G12 and G21
-    G12 = np.exp(-alpha * tau12)
-    G21 = np.exp(-alpha * tau21)
-
-    
-    # Calculate ln_gamma1 and ln_gamma2
-    ln_gamma1 = x2**2 * (tau21 * (G21 / (x1 + x2 * G21))**2 + tau12 * G12 / ((x2 + x1 * G12)**2))
-    ln_gamma2 = x1**2 * (tau12 * (G12 / (x2 + x1 * G12))**2 + tau21 * G21 / ((x1 + x2 * G21)**2))
-    
-    # Calculate gamma1 and gamma2
-    gamma1 = np.exp(ln_gamma1)
-    gamma2 = np.exp(ln_gamma2)
-    
-    return gamma1, gamma2
-
-# Example usage
-pair_name = 'H2O [dmim][DMP]'
-x = 0.5
-gamma1, gamma2 = calculate_activity_coefficients(pair_name, x)
-print(gamma1, gamma2)
+    # Look up the pair id in the compiled table
+    nrtl_table = get_nrtl_table()
+    pair_id = nrtl_table.pair_ids(pair_name)
+
+    # Calculate gamma1 and gamma2 (x and T may also be arrays)
+    gamma1, gamma2 = nrtl_table.activity_coefficients(pair_id, x, T)
+    return gamma1[()], gamma2[()]
+
+
+def calculate_excess_enthalpy(pair_name, x, T=298.15):
+    # Excess enthalpy in J/mol from the analytic temperature derivatives
+    nrtl_table = get_nrtl_table()
+    return nrtl_table.excess_enthalpy(nrtl_table.pair_ids(pair_name), x, T)[()]
+
+
+def calculate_multicomponent_activity_coefficients(components, x, T=298.15, interactions=None):
+    # Activity coefficients of an N-component mixture from the binary pairs of the table
+    mixture = NRTLMixture.from_table(components, interactions=interactions)
+    return mixture.activity_coefficients(x, T)[()]
+
+
+if __name__ == '__main__':
+    # Display the first few rows to understand its structure
+    import pandas as pd
+    print(pd.read_csv(file_path).head())
+
+    # Example usage
+    pair_name = 'H2O [dmim][DMP]'
+    x = 0.5
+    gamma1, gamma2 = calculate_activity_coefficients(pair_name, x)
+    print(gamma1, gamma2)
+
+    # The same pair as a 2-component mixture, and a ternary with an extra refrigerant pair
+    print(calculate_multicomponent_activity_coefficients(['H2O', '[dmim][DMP]'], [x, 1 - x]))
+    print(calculate_multicomponent_activity_coefficients(
+        ['R134a', 'R152a', '[hmim][Tf2N]'], [0.2, 0.3, 0.5], 320.0,
+        interactions={('R134a', 'R152a'): (0.2, 50.0, -0.1, 30.0, 0.3)}))
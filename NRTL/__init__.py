@@ -0,0 +1 @@
+"""NRTL activity coefficient model of the refrigerant/ionic liquid working pairs."""
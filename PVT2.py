@@ -1,5 +1,152 @@
+import csv
+import math
+import os
+
 import numpy as np
-from scipy.optimize import brentq
+
+import solver_trace
+from saturation_table import get_table
+from vector_solvers import bracketed_newton, safeguarded_newton
+
+R = 8.31446261815324  # Universal gas constant in J/(mol·K)
+T0 = 298.15            # Ideal-gas reference temperature in K
+P0 = 101.325           # Ideal-gas reference pressure in kPa
+
+COMPONENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'il_abrh', 'data', 'refrigerants.csv')
+
+
+def load_components(file_path=COMPONENTS_FILE):
+    """
+    Read the refrigerant component table.
+
+    Each row holds the critical constants, acentric factor, triple point,
+    molar mass, the ideal-gas heat capacity Cp0 = a + b*T + c*T**2 + d*T**3
+    in J/(mol*K) and the reference state (h_ref, s_ref of the saturated
+    liquid at T_ref) of one refrigerant.
+
+    Returns:
+        dict: Name (and alias, if any) -> parameter dict.
+    """
+    columns = {'Tc (K)': 'Tc', 'Pc (kPa)': 'Pc', 'omega': 'omega', 'Tt (K)': 'Tt',
+               'Molar Mass (g/mol)': 'M', 'Cp0_a': 'Cp0_a', 'Cp0_b': 'Cp0_b', 'Cp0_c': 'Cp0_c',
+               'Cp0_d': 'Cp0_d', 'T_ref (K)': 'T_ref', 'h_ref (kJ/kg)': 'h_ref',
+               's_ref (kJ/(kg*K))': 's_ref'}
+    components = {}
+    with open(file_path, newline='') as f:
+        for row in csv.DictReader(f):
+            params = {key: float(row[column]) for column, key in columns.items()}
+            components[row['Name']] = params
+            if row.get('Alias'):
+                components[row['Alias']] = params
+    return components
+
+
+_components = None
+
+
+def get_components():
+    """The component table of `COMPONENTS_FILE`, read on first use."""
+    global _components
+    if _components is None:
+        _components = load_components()
+    return _components
+
+
+def __getattr__(name):
+    # `COMPONENTS` is loaded lazily, so importing this module reads no files
+    if name == 'COMPONENTS':
+        return get_components()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def solve_cubic_Z(A, B):
+    """
+    Solve the Peng-Robinson cubic in Z for arrays of A and B in closed form.
+
+    Z**3 + (B - 1) Z**2 + (A - 3B**2 - 2B) Z - (AB - B**2 - B**3) = 0 is reduced
+    to its depressed form and solved with the trigonometric method where it has
+    three real roots and with Cardano's formula elsewhere, followed by Newton
+    polish steps. No companion matrix or eigenvalue solve is involved.
+
+    Args:
+        A (float or array-like): Dimensionless attraction parameter.
+        B (float or array-like): Dimensionless co-volume parameter.
+
+    Returns:
+        tuple: (Z_vapor, Z_liquid, three_roots). Z_vapor is the largest and
+        Z_liquid the smallest real root. `three_roots` is False where the cubic
+        has a single real root; there Z_vapor and Z_liquid are both that root.
+    """
+    A, B = np.broadcast_arrays(np.asarray(A, dtype=float), np.asarray(B, dtype=float))
+    c2 = B - 1
+    c1 = A - 3 * B**2 - 2 * B
+    c0 = -A * B + B**2 + B**3
+
+    # Depressed cubic t**3 + p t + q = 0 with Z = t - c2 / 3
+    shift = c2 / 3
+    p = c1 - c2 * shift
+    q = (2 * c2**2 / 27 - c1 / 3) * c2 + c0
+    disc = (q / 2)**2 + (p / 3)**3
+    three_roots = disc < 0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Three real roots: trigonometric form (p < 0 here)
+        m = 2 * np.sqrt(np.where(three_roots, -p / 3, 0))
+        cos_arg = np.clip(3 * q / (p * m), -1, 1)
+        theta = np.arccos(np.where(three_roots, cos_arg, 1)) / 3
+        t_max = m * np.cos(theta)
+        t_min = m * np.cos(theta - 4 * np.pi / 3)
+
+        # One real root: Cardano, written to avoid cancellation
+        u = np.cbrt(-q / 2 - np.copysign(np.sqrt(np.maximum(disc, 0)), q))
+        t_one = np.where(u != 0, u - p / (3 * np.where(u != 0, u, 1)), 0)
+
+    Z_vapor = np.where(three_roots, t_max, t_one) - shift
+    Z_liquid = np.where(three_roots, t_min, t_one) - shift
+
+    def polish(Z, steps):
+        for _ in range(steps):
+            f = ((Z + c2) * Z + c1) * Z + c0
+            df = (3 * Z + 2 * c2) * Z + c1
+            with np.errstate(invalid='ignore', divide='ignore'):
+                step = f / df
+            Z = np.where(np.abs(df) > 1e-12 * np.abs(Z), Z - step, Z)
+        return Z
+
+    # The liquid root can be as small as B, far below the absolute precision of
+    # the closed form, so it gets a few more Newton steps than the vapor root
+    return polish(Z_vapor, 1), polish(Z_liquid, 3), three_roots
+
+
+def _solve_cubic_Z_scalar(A, B):
+    """
+    `solve_cubic_Z` for one (A, B) in plain floats, for single-call latency.
+
+    Returns:
+        tuple: (Z_vapor, Z_liquid), or None where the cubic has a single real root.
+    """
+    c2 = B - 1
+    c1 = A - 3 * B * B - 2 * B
+    c0 = (B * B + B ** 3) - A * B
+    shift = c2 / 3
+    p = c1 - c2 * shift
+    q = (2 * c2 * c2 / 27 - c1 / 3) * c2 + c0
+    if (q / 2) ** 2 + (p / 3) ** 3 >= 0 or p >= 0:
+        return None
+    m = 2 * math.sqrt(-p / 3)
+    theta = math.acos(min(max(3 * q / (p * m), -1.0), 1.0)) / 3
+    roots = []
+    # Newton polish steps as in solve_cubic_Z: one for the vapor root, three
+    # for the liquid root, which can be as small as B
+    for Z, steps in ((m * math.cos(theta) - shift, 1), (m * math.cos(theta - 4 * math.pi / 3) - shift, 3)):
+        for _ in range(steps):
+            df = (3 * Z + 2 * c2) * Z + c1
+            if abs(df) <= 1e-12 * abs(Z):
+                break
+            Z -= (((Z + c2) * Z + c1) * Z + c0) / df
+        roots.append(Z)
+    return roots[0], roots[1]
+
 
 class Refrigerant:
     def __init__(self, name):
@@ -7,26 +154,10 @@ class Refrigerant:
         self.params = self.get_params()
 
     def get_params(self):
-        if self.name == 'Water':
-            return {
-                'Tc': 647.096,  # Critical temperature (K)
-                'Pc': 22064,    # Critical pressure (kPa)
-                'omega': 0.344  # Acentric factor
-            }
-        elif self.name == 'R134a':
-            return {
-                'Tc': 374.21,
-                'Pc': 4059.4,
-                'omega': 0.326
-            }
-        elif self.name == 'R1234yf':
-            return {
-                'Tc': 367.85,
-                'Pc': 3381.5,
-                'omega': 0.339
-            }
-        else:
-            raise ValueError("Unsupported refrigerant")
+        try:
+            return dict(get_components()[self.name])
+        except KeyError:
+            raise ValueError("Unsupported refrigerant") from None
 
     def alpha_function(self, T):
         Tc, omega = self.params['Tc'], self.params['omega']
@@ -34,65 +165,456 @@ class Refrigerant:
         k = 0.37464 + 1.54226 * omega - 0.26992 * omega**2
         return (1 + k * (1 - np.sqrt(Tr)))**2
 
+    def alpha_derivative(self, T):
+        """d(alpha)/dT of the Peng-Robinson alpha function in 1/K."""
+        Tc, omega = self.params['Tc'], self.params['omega']
+        k = 0.37464 + 1.54226 * omega - 0.26992 * omega**2
+        T = np.asarray(T, dtype=float)
+        return -k * (1 + k * (1 - np.sqrt(T / Tc))) / np.sqrt(T * Tc)
+
+    def alpha_second_derivative(self, T):
+        """d2(alpha)/dT2 of the Peng-Robinson alpha function in 1/K**2."""
+        Tc, omega = self.params['Tc'], self.params['omega']
+        k = 0.37464 + 1.54226 * omega - 0.26992 * omega**2
+        T = np.asarray(T, dtype=float)
+        return k * (k + (1 + k * (1 - np.sqrt(T / Tc))) * np.sqrt(Tc / T)) / (2 * T * Tc)
+
     def PengRobinson(self, T, P):
+        if np.ndim(T) == 0 and np.ndim(P) == 0:
+            # Scalar fast path: plain-float closed form, no array overhead
+            Tc, Pc = self.params['Tc'], self.params['Pc']
+            T, P = float(T), float(P)
+            k = 0.37464 + 1.54226 * self.params['omega'] - 0.26992 * self.params['omega']**2
+            alpha = (1 + k * (1 - math.sqrt(T / Tc)))**2
+            A = alpha * 0.45724 * R**2 * Tc**2 / Pc * P / (R * T)**2
+            B = 0.07780 * R * Tc / Pc * P / (R * T)
+            roots = _solve_cubic_Z_scalar(A, B)
+            three_roots = np.asarray(roots is not None)
+            if roots is not None:
+                return roots[0], roots[1], A, B
+        else:
+            Z_vapor, Z_liquid, A, B, three_roots = self.PengRobinson_batch(T, P)
+
+        if not np.all(three_roots):
+            tracer = solver_trace.tracer
+            if tracer is not None:
+                tracer.event('no_real_root', f"{self.name}.PengRobinson",
+                             T=np.asarray(T).tolist(), P=np.asarray(P).tolist())
+            raise ValueError(f"Less than 2 real roots found for T={T}, P={P}")
+
+        return Z_vapor[()], Z_liquid[()], A[()], B[()]
+
+    def PengRobinson_batch(self, T, P):
+        """
+        Peng-Robinson Z, A and B for arrays of temperature (K) and pressure (kPa).
+
+        Returns:
+            tuple: (Z_vapor, Z_liquid, A, B, three_roots) broadcast over T and P.
+            Where `three_roots` is False only one real root exists and it is
+            returned as both Z_vapor and Z_liquid instead of raising.
+        """
         Tc, Pc = self.params['Tc'], self.params['Pc']
-        R = 8.31446261815324  # Universal gas constant in J/(mol·K)
 
         a = 0.45724 * R**2 * Tc**2 / Pc
         b = 0.07780 * R * Tc / Pc
-        
+
+        T = np.asarray(T, dtype=float)
+        P = np.asarray(P, dtype=float)
         alpha = self.alpha_function(T)
-        
+
         A = alpha * a * P / (R * T)**2
         B = b * P / (R * T)
 
-        coeffs = [1, B - 1, A - 3*B**2 - 2*B, -A*B + B**2 + B**3]
-        roots = np.roots(coeffs)
-        real_roots = roots[np.isreal(roots)].real
-        
-        if len(real_roots) < 2:
-            raise ValueError(f"Less than 2 real roots found for T={T}, P={P}")
+        Z_vapor, Z_liquid, three_roots = solve_cubic_Z(A, B)
+        return Z_vapor, Z_liquid, A, B, three_roots
 
-        Z_vapor = np.max(real_roots)
-        Z_liquid = np.min(real_roots)
+    def fugacity_coefficient(self, Z, A, B):
+        return np.exp(self.ln_fugacity_coefficient(Z, A, B))
 
-        return Z_vapor, Z_liquid, A, B
+    def ln_fugacity_coefficient(self, Z, A, B):
+        return Z - 1 - np.log(Z - B) - A / (2 * np.sqrt(2) * B) * np.log((Z + (1 + np.sqrt(2)) * B) / (Z + (1 - np.sqrt(2)) * B))
 
-    def fugacity_coefficient(self, Z, A, B):
-        return np.exp(Z - 1 - np.log(Z - B) - A / (2 * np.sqrt(2) * B) * np.log((Z + (1 + np.sqrt(2)) * B) / (Z + (1 - np.sqrt(2)) * B)))
+    def fugacity_residual(self, T, P):
+        """
+        Fugacity-equality residual ln(phi_liquid) - ln(phi_vapor) for arrays of T (K) and P (kPa).
 
-    def saturation_temperature(self, P):
-        def equation(T):
-            try:
-                Z_vapor, Z_liquid, A, B = self.PengRobinson(T, P)
-                f_vapor = self.fugacity_coefficient(Z_vapor, A, B)
-                f_liquid = self.fugacity_coefficient(Z_liquid, A, B)
-                result = f_vapor - f_liquid
-                #print(f"Debug: T={T:.2f}, f_vapor={f_vapor:.6e}, f_liquid={f_liquid:.6e}, diff={result:.6e}")
-                return result
-            except ValueError as e:
-                print(f"Error in equation: {e}")
-                return np.nan
+        The residual is negative where the liquid is the stable phase (T below
+        or P above saturation) and positive where the vapor is. Where the cubic
+        has a single real root the residual is -inf for a liquid-like root and
+        +inf for a vapor-like root, so a bracketing solver still knows which
+        side of the saturation curve the point is on.
+
+        Returns:
+            tuple: (residual, Z_vapor, Z_liquid) broadcast over T and P.
+        """
+        Z_vapor, Z_liquid, A, B, three_roots = self.PengRobinson_batch(T, P)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            residual = (self.ln_fugacity_coefficient(Z_liquid, A, B)
+                        - self.ln_fugacity_coefficient(Z_vapor, A, B))
+        # A single root below the inflection point Z = (1 - B) / 3 is liquid-like
+        single = np.where(Z_vapor < (1 - B) / 3, -np.inf, np.inf)
+        two_phase = three_roots & (Z_liquid > B)
+        residual = np.where(two_phase, residual, single)
+        tracer = solver_trace.tracer
+        if tracer is not None:
+            tracer.count(f"{self.name}.fugacity_residual.single_root",
+                         two_phase.size - int(np.count_nonzero(two_phase)))
+        return residual, Z_vapor, Z_liquid
+
+    def fugacity_residual_derivatives(self, T, P):
+        """
+        Fugacity-equality residual and its exact partial derivatives in T and ln(P).
+
+        From d(ln phi)/d(ln P) = Z - 1 and d(ln phi)/dT = -h_R / (R T**2):
+
+            d(residual)/d(ln P) = Z_liquid - Z_vapor
+            d(residual)/dT      = (h_R_vapor - h_R_liquid) / (R T**2)
 
+        with the departure enthalpies of `departure_functions`, so the
+        derivatives cost no extra cubic solve.
+
+        Returns:
+            tuple: (residual, d_dT, d_dlnP, Z_vapor, Z_liquid) broadcast over T
+            and P; the derivatives are NaN where the residual is infinite.
+        """
+        T = np.asarray(T, dtype=float)
+        residual, Z_vapor, Z_liquid = self.fugacity_residual(T, P)
         Tc, Pc = self.params['Tc'], self.params['Pc']
-        T_low = max(0.2 * Tc, 200)  # Lower bound: 20% of critical temp or 200K, whichever is higher
-        T_high = min(0.9 * Tc, Tc - 10)  # Upper bound: 99% of critical temp or just below Tc
+        A = self.alpha_function(T) * 0.45724 * R**2 * Tc**2 / Pc * np.asarray(P, dtype=float) / (R * T)**2
+        B = 0.07780 * R * Tc / Pc * np.asarray(P, dtype=float) / (R * T)
+        h_R, _ = self.departure_functions(T, np.stack([Z_liquid, Z_vapor]), A, B)
+        finite = np.isfinite(residual)
+        d_dT = np.where(finite, (h_R[1] - h_R[0]) / (R * T**2), np.nan)
+        d_dlnP = np.where(finite, Z_liquid - Z_vapor, np.nan)
+        return residual, d_dT, d_dlnP, Z_vapor, Z_liquid
 
-        print(f"Searching for saturation temperature between {T_low:.2f}K and {T_high:.2f}K")
+    def ideal_gas_cp(self, T):
+        """Ideal-gas heat capacity in J/(mol*K)."""
+        p = self.params
+        T = np.asarray(T, dtype=float)
+        return p['Cp0_a'] + (p['Cp0_b'] + (p['Cp0_c'] + p['Cp0_d'] * T) * T) * T
 
-        # Check boundary conditions
-        f_low = equation(T_low)
-        f_high = equation(T_high)
-        if np.isnan(f_low) or np.isnan(f_high) or f_low * f_high > 0:
-            print(f"Unable to find saturation temperature for P = {P} kPa")
-            return np.nan
+    def ideal_gas_hs(self, T, P):
+        """
+        Ideal-gas enthalpy (J/mol, relative to T0) and entropy (J/(mol*K),
+        relative to T0 and P0) from the integrals of the Cp0 polynomial.
+        """
+        p = self.params
+        T = np.asarray(T, dtype=float)
+        a, b, c, d = p['Cp0_a'], p['Cp0_b'], p['Cp0_c'], p['Cp0_d']
+        h = (a * (T - T0) + b / 2 * (T**2 - T0**2) + c / 3 * (T**3 - T0**3) + d / 4 * (T**4 - T0**4))
+        s = (a * np.log(T / T0) + b * (T - T0) + c / 2 * (T**2 - T0**2) + d / 3 * (T**3 - T0**3)
+             - R * np.log(np.asarray(P, dtype=float) / P0))
+        return h, s
 
-        try:
-            T_sat = brentq(equation, T_low, T_high, rtol=1e-6, maxiter=1000)
-            return T_sat
-        except ValueError as e:
-            print(f"Error finding saturation temperature for P = {P} kPa: {e}")
-            return np.nan
+    def departure_functions(self, T, Z, A, B):
+        """
+        Peng-Robinson residual enthalpy h - h_ig (J/mol) and entropy s - s_ig (J/(mol*K)).
+
+        Uses the same Z, A and B as `PengRobinson_batch`, so the departures
+        cost no extra cubic solve:
+
+            h_R = R T (Z - 1) + (T da/dT - a) / (2 sqrt(2) b) * L
+            s_R = R ln(Z - B) + (da/dT) / (2 sqrt(2) b) * L
+            L   = ln((Z + (1 + sqrt(2)) B) / (Z + (1 - sqrt(2)) B))
+        """
+        Tc, Pc = self.params['Tc'], self.params['Pc']
+        T = np.asarray(T, dtype=float)
+        # a/b and (da/dT)/b in J/mol and J/(mol*K); the pressure units cancel
+        a_b = 0.45724 / 0.07780 * R * Tc * self.alpha_function(T)
+        da_b = 0.45724 / 0.07780 * R * Tc * self.alpha_derivative(T)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            L = np.log((Z + (1 + np.sqrt(2)) * B) / (Z + (1 - np.sqrt(2)) * B)) / (2 * np.sqrt(2))
+            h_R = R * T * (Z - 1) + (T * da_b - a_b) * L
+            s_R = R * np.log(Z - B) + da_b * L
+        return h_R, s_R
+
+    def departure_cp(self, T, Z, A, B):
+        """
+        d(h_R)/dT at constant pressure in J/(mol*K), with h_R from `departure_functions`.
+
+        dZ/dT follows from differentiating the cubic
+        F = Z**3 - (1 - B) Z**2 + (A - 3 B**2 - 2 B) Z - (A B - B**2 - B**3) = 0
+        with dA/dT = A (alpha'/alpha - 2/T) and dB/dT = -B/T, so the real-gas
+        heat capacity cp = cp_ig + departure_cp costs no extra cubic solve.
+        """
+        Tc = self.params['Tc']
+        T = np.asarray(T, dtype=float)
+        alpha = self.alpha_function(T)
+        d_alpha = self.alpha_derivative(T)
+        C = 0.45724 / 0.07780 * R * Tc  # a/(b alpha) in J/mol
+        dA = A * (d_alpha / alpha - 2 / T)
+        dB = -B / T
+        c1, c2 = 1 + np.sqrt(2), 1 - np.sqrt(2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            F_Z = 3 * Z**2 - 2 * (1 - B) * Z + A - 3 * B**2 - 2 * B
+            F_A = Z - B
+            F_B = Z**2 - (6 * B + 2) * Z - A + 2 * B + 3 * B**2
+            dZ = -(F_A * dA + F_B * dB) / F_Z
+            L = np.log((Z + c1 * B) / (Z + c2 * B)) / (2 * np.sqrt(2))
+            dL = ((dZ + c1 * dB) / (Z + c1 * B) - (dZ + c2 * dB) / (Z + c2 * B)) / (2 * np.sqrt(2))
+            return (R * (Z - 1) + R * T * dZ + T * C * self.alpha_second_derivative(T) * L
+                    + C * (T * d_alpha - alpha) * dL)
+
+    def _reference_offsets(self):
+        """Constants (J/mol, J/(mol*K)) that put the saturated liquid at T_ref on h_ref, s_ref."""
+        offsets = getattr(self, '_offsets', None)
+        if offsets is None:
+            p = self.params
+            T_ref = p['T_ref']
+            P_ref, _, _ = self.saturation_pressure_batch(T_ref)
+            _, Z_liquid, A, B, _ = self.PengRobinson_batch(T_ref, P_ref)
+            h_ig, s_ig = self.ideal_gas_hs(T_ref, P_ref)
+            h_R, s_R = self.departure_functions(T_ref, Z_liquid, A, B)
+            offsets = self._offsets = (p['h_ref'] * p['M'] - (h_ig + h_R), p['s_ref'] * p['M'] - (s_ig + s_R))
+        return offsets
+
+    def enthalpy_entropy_tp(self, T, P, phase=None):
+        """
+        Enthalpy (kJ/kg) and entropy (kJ/(kg*K)) for arrays of T (K) and P (kPa).
+
+        h = h_ig(T) + h_R(T, P) and s = s_ig(T, P) + s_R(T, P) from one batched
+        cubic solve, shifted to the reference state of the component table
+        (IIR: h = 200 kJ/kg, s = 1 kJ/(kg*K) for saturated liquid at 0 °C).
+
+        Args:
+            T (float or array-like): Temperature in K.
+            P (float or array-like): Pressure in kPa.
+            phase (str, optional): 'liquid' or 'vapor' to pick that root;
+                by default the root with the lower fugacity (the stable phase).
+
+        Returns:
+            tuple: (h, s) broadcast over T and P.
+        """
+        Z_vapor, Z_liquid, A, B, three_roots = self.PengRobinson_batch(T, P)
+        if phase == 'liquid':
+            Z = Z_liquid
+        elif phase == 'vapor':
+            Z = Z_vapor
+        elif phase is None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                liquid = (self.ln_fugacity_coefficient(Z_liquid, A, B)
+                          < self.ln_fugacity_coefficient(Z_vapor, A, B))
+            Z = np.where(three_roots & liquid, Z_liquid, Z_vapor)
+        else:
+            raise ValueError(f"Unknown phase '{phase}', expected 'liquid' or 'vapor'.")
+        h_ig, s_ig = self.ideal_gas_hs(T, P)
+        h_R, s_R = self.departure_functions(T, Z, A, B)
+        h_off, s_off = self._reference_offsets()
+        M = self.params['M']
+        return ((h_ig + h_R + h_off) / M)[()], ((s_ig + s_R + s_off) / M)[()]
+
+    def enthalpy_entropy_tx(self, T, x):
+        """
+        Enthalpy (kJ/kg) and entropy (kJ/(kg*K)) of saturated states for arrays of T (K) and quality x.
+
+        Returns:
+            tuple: (h, s, P_sat in kPa); NaN where T has no saturation pressure.
+        """
+        T, x = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(x, dtype=float))
+        P_sat, _, _ = self.saturation_pressure_batch(T)
+        Z_vapor, Z_liquid, A, B, _ = self.PengRobinson_batch(T, P_sat)
+        h_ig, s_ig = self.ideal_gas_hs(T, P_sat)
+        Z = np.stack([Z_liquid, Z_vapor])
+        h_R, s_R = self.departure_functions(T, Z, A, B)
+        h_off, s_off = self._reference_offsets()
+        M = self.params['M']
+        h_L, h_V = (h_ig + h_R + h_off) / M
+        s_L, s_V = (s_ig + s_R + s_off) / M
+        return (h_L + x * (h_V - h_L))[()], (s_L + x * (s_V - s_L))[()], P_sat[()]
+
+    def _state_tp(self, T, P, mode):
+        """
+        h (kJ/kg), s and cp (kJ/(kg*K)) from one cubic solve.
+
+        `mode` picks the root per point: 1 liquid, 2 vapor, 0 the stable one.
+        """
+        Z_vapor, Z_liquid, A, B, three_roots = self.PengRobinson_batch(T, P)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stable_liquid = three_roots & (self.ln_fugacity_coefficient(Z_liquid, A, B)
+                                           < self.ln_fugacity_coefficient(Z_vapor, A, B))
+        Z = np.where(np.where(mode == 0, stable_liquid, mode == 1), Z_liquid, Z_vapor)
+        h_ig, s_ig = self.ideal_gas_hs(T, P)
+        h_R, s_R = self.departure_functions(T, Z, A, B)
+        h_off, s_off = self._reference_offsets()
+        M = self.params['M']
+        cp = self.ideal_gas_cp(T) + self.departure_cp(T, Z, A, B)
+        return (h_ig + h_R + h_off) / M, (s_ig + s_R + s_off) / M, cp / M
+
+    def _temperature_p(self, P, value, prop, xtol, maxiter):
+        """PH (prop 0) or PS (prop 1) flash; see `temperature_ph`."""
+        Tc, Pc, Tt = self.params['Tc'], self.params['Pc'], self.params['Tt']
+        P, value = np.broadcast_arrays(np.asarray(P, dtype=float), np.asarray(value, dtype=float))
+        shape = P.shape
+        P, value = P.ravel(), value.ravel()
+        T = np.full(P.size, np.nan)
+        x = np.full(P.size, np.nan)
+
+        # Saturated liquid and vapor at P split two-phase from single-phase states
+        T_sat = np.full(P.size, np.nan)
+        sub = (P > 0) & (P < Pc)
+        if sub.any():
+            T_sat[sub], _, _ = self.saturation_temperature_batch(P[sub], xtol=xtol)
+        sat = np.flatnonzero(np.isfinite(T_sat))
+        v_L = self._state_tp(T_sat[sat], P[sat], 1)[prop]
+        v_V = self._state_tp(T_sat[sat], P[sat], 2)[prop]
+        inside = (value[sat] >= v_L) & (value[sat] <= v_V)
+        T[sat[inside]] = T_sat[sat[inside]]
+        x[sat[inside]] = (value[sat[inside]] - v_L[inside]) / (v_V[inside] - v_L[inside])
+
+        # Single phase: liquid below T_sat, vapor above it, one phase above Pc
+        mode = np.zeros(P.size, dtype=np.int8)
+        lo = np.full(P.size, float(Tt))
+        hi = np.full(P.size, 1.5 * Tc)
+        liquid = sat[value[sat] < v_L]
+        vapor = sat[value[sat] > v_V]
+        mode[liquid], hi[liquid] = 1, T_sat[liquid]
+        mode[vapor], lo[vapor] = 2, T_sat[vapor]
+        solve = np.concatenate([liquid, vapor, np.flatnonzero(P >= Pc)])
+        if solve.size:
+            P_s, value_s, mode_s = P[solve], value[solve], mode[solve]
+
+            def equation(T, idx):
+                state = self._state_tp(T, P_s[idx], mode_s[idx])
+                cp = state[2] if prop == 0 else state[2] / T
+                return state[prop] - value_s[idx], cp
+
+            f_lo = self._state_tp(lo[solve], P_s, mode_s)[prop] - value_s
+            f_hi = self._state_tp(hi[solve], P_s, mode_s)[prop] - value_s
+            T[solve], _, _ = bracketed_newton(equation, lo[solve], hi[solve], f_lo, f_hi, xtol=xtol, maxiter=maxiter,
+                                              label=f"{self.name}.temperature_p{'hs'[prop]}")
+        converged = np.isfinite(T)
+        return T.reshape(shape)[()], x.reshape(shape)[()], converged.reshape(shape)[()]
+
+    def temperature_ph(self, P, h, xtol=1e-12, maxiter=100):
+        """
+        PH flash: temperature and quality for arrays of pressure (kPa) and enthalpy (kJ/kg).
+
+        Below Pc the saturated liquid and vapor enthalpies at P decide the
+        phase: between them the state is two-phase at T_sat, otherwise T is
+        solved on the liquid (triple point to T_sat) or vapor (T_sat to
+        1.5 Tc) branch with a safeguarded Newton iteration using the exact
+        cp of the equation of state. Above Pc the branch is Tt to 1.5 Tc.
+
+        Args:
+            P (float or array-like): Pressure in kPa.
+            h (float or array-like): Enthalpy in kJ/kg, broadcast against P.
+            xtol (float, optional): Relative tolerance on T. Defaults to 1e-12.
+            maxiter (int, optional): Maximum iterations per point. Defaults to 100.
+
+        Returns:
+            tuple: (T in K, x, converged). x is the vapor quality of two-phase
+            states and NaN for single-phase ones; T is NaN (and converged
+            False) where h is outside the branch ranges.
+        """
+        return self._temperature_p(P, h, 0, xtol, maxiter)
+
+    def temperature_ps(self, P, s, xtol=1e-12, maxiter=100):
+        """
+        PS flash: temperature and quality for arrays of pressure (kPa) and entropy (kJ/(kg*K)).
+
+        Same branches as `temperature_ph`, with d(s)/dT = cp / T.
+
+        Returns:
+            tuple: (T in K, x, converged), as for `temperature_ph`.
+        """
+        return self._temperature_p(P, s, 1, xtol, maxiter)
+
+    def saturation_pressure_batch(self, T, xtol=1e-12, maxiter=100):
+        """
+        Saturation pressures for an array of temperatures in one vectorized solve.
+
+        Solves ln(phi_liquid) = ln(phi_vapor) in ln(P) with a safeguarded
+        Newton/bisection iteration, using d(residual)/d(ln P) = Z_liquid - Z_vapor.
+
+        Args:
+            T (float or array-like): Temperature in K.
+            xtol (float, optional): Tolerance on ln(P). Defaults to 1e-12.
+            maxiter (int, optional): Maximum iterations per point. Defaults to 100.
+
+        Returns:
+            tuple: (P_sat, converged, iterations). P_sat in kPa is NaN where no
+            saturation pressure was found (e.g. T >= Tc).
+        """
+        Tc, Pc, omega = self.params['Tc'], self.params['Pc'], self.params['omega']
+        T = np.asarray(T, dtype=float)
+
+        # Wilson (Lee-Kesler type) estimate as the starting point
+        with np.errstate(invalid='ignore', divide='ignore'):
+            lnP0 = np.log(Pc) + 5.373 * (1 + omega) * (1 - Tc / T)
+        lo = np.where(T < Tc, np.log(Pc) - 80, np.nan)
+        hi = np.log(Pc)
+
+        T_flat = np.broadcast_to(T, lo.shape).ravel()
+
+        def equation(lnP, idx):
+            residual, Z_vapor, Z_liquid = self.fugacity_residual(T_flat[idx], np.exp(lnP))
+            return residual, Z_liquid - Z_vapor
+
+        lnP, converged, iterations = safeguarded_newton(
+            equation, lo, hi, lnP0, increasing=False, xtol=xtol, maxiter=maxiter,
+            label=f"{self.name}.saturation_pressure")
+        return np.exp(lnP), converged, iterations
+
+    def saturation_temperature_batch(self, P, xtol=1e-12, maxiter=100):
+        """
+        Saturation temperatures for an array of pressures in one vectorized solve.
+
+        Solves ln(phi_liquid) = ln(phi_vapor) in T with a safeguarded
+        Newton/bisection iteration, using the exact slope of
+        `fugacity_residual_derivatives`. The Wilson equation gives the
+        starting point.
+
+        Args:
+            P (float or array-like): Pressure in kPa.
+            xtol (float, optional): Relative tolerance on T. Defaults to 1e-12.
+            maxiter (int, optional): Maximum iterations per point. Defaults to 100.
+
+        Returns:
+            tuple: (T_sat, converged, iterations). T_sat in K is NaN where no
+            saturation temperature was found (e.g. P >= Pc).
+        """
+        Tc, Pc, omega = self.params['Tc'], self.params['Pc'], self.params['omega']
+        P = np.asarray(P, dtype=float)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            T_guess = Tc / (1 - np.log(P / Pc) / (5.373 * (1 + omega)))
+        lo = np.where((P > 0) & (P < Pc), 0.2 * Tc, np.nan)
+        hi = Tc
+
+        P_flat = np.broadcast_to(P, lo.shape).ravel()
+
+        def equation(T, idx):
+            residual, d_dT, _, _, _ = self.fugacity_residual_derivatives(T, P_flat[idx])
+            return residual, d_dT
+
+        return safeguarded_newton(equation, lo, hi, T_guess, increasing=True, xtol=xtol, maxiter=maxiter,
+                                  label=f"{self.name}.saturation_temperature")
+
+    def saturation_table(self, T_max_ratio=0.99, rtol=1e-6):
+        """
+        Cached spline table of the saturation curve from the triple point to T_max_ratio * Tc.
+
+        The table is built once from `saturation_pressure_batch`, shared by all
+        instances with the same parameters and persisted to disk (see
+        `saturation_table.get_table`). Lookups are interpolations:
+
+            table = water.saturation_table()
+            T_sat = table.temperature(P)   # K, P in kPa
+            P_sat = table.pressure(T)      # kPa, T in K
+
+        Both are within `rtol` (relative) of the exact solver; the measured
+        maxima are `table.max_rel_error_P` and `table.max_error_T` (K).
+        """
+        return get_table(self, self.params['Tt'], T_max_ratio * self.params['Tc'], rtol)
+
+    def saturation_pressure(self, T):
+        P_sat, _, _ = self.saturation_pressure_batch(T)
+        return P_sat[()]
+
+    def saturation_temperature(self, P):
+        T_sat, _, _ = self.saturation_temperature_batch(P)
+        return T_sat[()]
 
 def print_results(refrigerant, pressures):
     print(f"\nResults for {refrigerant.name}:")
@@ -1,5 +1,8 @@
 import numpy as np
-from scipy.optimize import fsolve, root
+
+import PVT2
+import solver_trace
+from PVT2 import solve_cubic_Z
 
 class Refrigerant:
     def __init__(self, name):
@@ -7,26 +10,10 @@ class Refrigerant:
         self.params = self.get_params()
 
     def get_params(self):
-        if self.name == 'Water':
-            return {
-                'Tc': 647.096,  # Critical temperature (K)
-                'Pc': 22064,    # Critical pressure (kPa)
-                'omega': 0.344 
-            }
-        elif self.name == 'R134a':
-            return {
-                'Tc': 374.21,
-                'Pc': 4059.4,
-                'omega': 0.326
-            }
-        elif self.name == 'R1234yf':
-            return {
-                'Tc': 367.85,
-                'Pc': 3381.5,
-                'omega': 0.339
-            }
-        else:
-            raise ValueError("Unsupported refrigerant")
+        try:
+            return dict(PVT2.get_components()[self.name])
+        except KeyError:
+            raise ValueError("Unsupported refrigerant") from None
 
     def alpha_function(self, T, Tc, omega):
         Tr = T / Tc
@@ -53,74 +40,52 @@ class Refrigerant:
         A = np.clip(A, -1e6, 1e6) 
         B = np.clip(B, -1e6, 1e6) 
         
-        coeffs = [1.0, -1 + B, A - 3 * B**2 - 2 * B, -A * B + B**2 + B**3]
-        
-        # Use np.roots with try-except for error handling
-        try:
-            roots = np.roots(coeffs)
-            real_roots = roots[np.isreal(roots)]
-        except np.linalg.LinAlgError:
-            # Handle cases where np.roots fails
+        # Closed-form cubic solution; the largest real root is the vapor root
+        Z, _, _ = solve_cubic_Z(A, B)
+        if not np.isfinite(Z):
+            # Non-finite coefficients have no root
+            tracer = solver_trace.tracer
+            if tracer is not None:
+                tracer.event('fallback', f"{self.name}.PengRobinson", T=float(T), P=float(P), Z=1.0)
             return 1, R * T / P, a, B  # Return Z=1 as a fallback
 
-        if not real_roots.size:
-            raise ValueError(f"No real roots found for T={T}, P={P}")
-
-        Z = np.max(real_roots.real)
+        Z = Z[()]
         V = Z * R * T / P
         return Z, V, a, B 
 
     def saturation_temperature(self, P):
-        def equation(T, B):  # B is passed as an argument
-            Z_vapor, V_vapor, _, _ = self.PengRobinson(T, P)
-            Z_liquid, V_liquid, _, _ = self.PengRobinson(T, P, s=0.1)
-
-            if Z_vapor - B <= 0 or Z_liquid - B <= 0:
-                return np.inf
-
-            fugacity_vapor = P * V_vapor * np.exp(Z_vapor - 1 - np.log(Z_vapor - B))
-            fugacity_liquid = P * V_liquid * np.exp(Z_liquid - 1 - np.log(Z_liquid - B))
-            return fugacity_vapor - fugacity_liquid
-
-        # Antoine equation for initial guess
-        A = 4.05544
-        B = 1119.108
-        C = -33.937
-        T_guess = B / (A - np.log10(P)) - C
-
-        # Calculate B for the initial guess
-        _, _, _, B_guess = self.PengRobinson(T_guess, P)
-
-        result = root(lambda T: equation(T, B_guess), T_guess, method='broyden1')
-        T_sat = result.x.item()
-
-        # Calculate B for the final T_sat
-        _, _, _, B_sat = self.PengRobinson(T_sat, P)
-
-        if equation(T_sat, B_sat) > 1e-6:  
+        """
+        Saturation temperature (K) for a pressure or an array of pressures (kPa).
+
+        Solved for all pressures at once by Newton iteration on the
+        fugacity-equality condition with its exact temperature derivative
+        (the vectorized solver of PVT2; below Tc both models are identical).
+        """
+        T_sat, converged, _ = PVT2.Refrigerant(self.name).saturation_temperature_batch(P)
+
+        if not np.all(converged):
+            tracer = solver_trace.tracer
+            if tracer is not None:
+                tracer.event('failure', f"{self.name}.saturation_temperature",
+                             P=np.asarray(P).tolist(), T=T_sat.tolist())
             raise ValueError(f"Unable to find saturation temperature for P={P}")
 
-        return T_sat
-    
-    # ... (rest of the code remains the same)
+        return T_sat[()]
 
 
     def saturation_pressure(self, T):
-        def equation(P):
-            try:
-                Z_vapor, _ = self.PengRobinson(T, P)
-                Z_liquid, _ = self.PengRobinson(T, P)
-                return Z_vapor - Z_liquid
-            except ValueError:
-                return np.inf  # 返回一个大数，表示这个压力不可行
-
-        P_guess = self.params['Pc'] * 0.1
-        P_sat = fsolve(equation, P_guess)[0]
-
-        if equation(P_sat) > 1e-6:  # 检查是否真的找到了解
+        """
+        Saturation pressure (kPa) for a temperature or an array of temperatures (K).
+
+        Solved for all temperatures at once from the fugacity-equality condition
+        with the vectorized solver of PVT2 (below Tc both models are identical).
+        """
+        P_sat, converged, _ = PVT2.Refrigerant(self.name).saturation_pressure_batch(T)
+
+        if not np.all(converged):  # 检查是否真的找到了解
             raise ValueError(f"Unable to find saturation pressure for T={T}")
 
-        return P_sat
+        return P_sat[()]
 
 
 if __name__ == "__main__":
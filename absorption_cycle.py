@@ -0,0 +1,124 @@
+from collections import namedtuple
+
+import numpy as np
+
+from Enthalpy import if97_water
+from NRTL.Gammar import get_nrtl_table
+from PVT2 import Refrigerant
+from solubility import solubility
+from solution_enthalpy import mixture_enthalpy, mole_to_mass_fraction, split_pair
+
+# Heat duties are per kg of refrigerant vapor leaving the generator (kJ/kg);
+# w_* are refrigerant mass fractions, x_* refrigerant mole fractions.
+CycleResult = namedtuple('CycleResult', [
+    'COP', 'COP_heating', 'circulation_ratio',
+    'Q_generator', 'Q_absorber', 'Q_condenser', 'Q_evaporator', 'Q_shx',
+    'P_high', 'P_low', 'x_rich', 'x_poor', 'w_rich', 'w_poor', 'feasible'])
+
+
+def single_effect_cycle(pair_name, T_generator, T_condenser, T_absorber, T_evaporator,
+                        shx_effectiveness=0.7):
+    """
+    Steady state of a single-effect absorption heat pump with a refrigerant/IL pair.
+
+    States: the rich solution leaves the absorber saturated at (T_absorber,
+    P_low), is pumped (pump work neglected) and preheated in the solution
+    heat exchanger; the poor solution leaves the generator saturated at
+    (T_generator, P_high) and is cooled in the heat exchanger to
+    T_generator - eps * (T_generator - T_absorber). Refrigerant vapor leaves
+    the generator at T_generator, condenses to saturated liquid, is throttled
+    and leaves the evaporator as saturated vapor. P_high and P_low are the
+    refrigerant saturation pressures at T_condenser and T_evaporator. Water
+    properties come from IAPWS-IF97, other refrigerants from the
+    Peng-Robinson departure functions of `PVT2.Refrigerant`.
+
+    Every temperature may be an array; all states are evaluated with
+    broadcast array operations, so a full operating-condition grid is one call.
+
+    Args:
+        pair_name (str): Working pair, e.g. "H2O [dmim][DMP]".
+        T_generator, T_condenser, T_absorber, T_evaporator (float or array-like):
+            Temperatures in K.
+        shx_effectiveness (float or array-like, optional): Solution heat
+            exchanger effectiveness. Defaults to 0.7.
+
+    Returns:
+        CycleResult: COP (cooling, Q_evaporator / Q_generator), COP_heating
+        ((Q_absorber + Q_condenser) / Q_generator), circulation ratio (kg rich
+        solution per kg refrigerant), heat duties in kJ/kg refrigerant, the two
+        pressures in kPa, the solution compositions and a `feasible` mask. All
+        fields are NaN where the cycle is infeasible (w_rich <= w_poor).
+    """
+    refrigerant, _ = split_pair(pair_name)
+    pair_id = get_nrtl_table().pair_ids(pair_name)
+
+    # Each state is evaluated on the broadcast of only the temperatures it
+    # depends on, so grid sweeps solve e.g. the poor solution once per
+    # (T_generator, T_condenser) and not once per cycle.
+    T_g, T_c, T_a, T_e, eps = (np.asarray(v, dtype=float) for v in (
+        T_generator, T_condenser, T_absorber, T_evaporator, shx_effectiveness))
+    shape = np.broadcast_shapes(T_g.shape, T_c.shape, T_a.shape, T_e.shape, eps.shape)
+
+    # Pressure levels and pure refrigerant states
+    if refrigerant == 'H2O':
+        P_high = if97_water.saturation_pressure(T_c)
+        P_low = if97_water.saturation_pressure(T_e)
+        h_liquid_c = if97_water.region1_hs(T_c, P_high)[0]    # condenser outlet
+        h_vapor_e = if97_water.region2_hs(T_e, P_low)[0]      # evaporator outlet
+        h_vapor_g = if97_water.properties_tp(T_g, P_high)[0]  # generator vapor
+    else:
+        component = Refrigerant(refrigerant)
+        h_liquid_c, _, P_high = component.enthalpy_entropy_tx(T_c, 0.0)
+        h_vapor_e, _, P_low = component.enthalpy_entropy_tx(T_e, 1.0)
+        h_vapor_g = component.enthalpy_entropy_tp(T_g, P_high, phase='vapor')[0]
+
+    # Solution compositions from phase equilibrium
+    x_rich = solubility(pair_id, T_a, P_low).x
+    x_poor = solubility(pair_id, T_g, P_high).x
+    w_rich = mole_to_mass_fraction(pair_name, x_rich)
+    w_poor = mole_to_mass_fraction(pair_name, x_poor)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        feasible = (w_rich > w_poor) & np.isfinite(h_vapor_g)
+        m_rich = np.where(feasible, (1 - w_poor) / (w_rich - w_poor), np.nan)
+    m_poor = m_rich - 1
+
+    # Solution enthalpies (kJ/kg solution)
+    h_rich = mixture_enthalpy(pair_name, x_rich, T_a, basis='mass')
+    h_poor = mixture_enthalpy(pair_name, x_poor, T_g, basis='mass')
+    h_poor_out = mixture_enthalpy(pair_name, x_poor, T_g - eps * (T_g - T_a), basis='mass')
+    Q_shx = m_poor * (h_poor - h_poor_out)
+    h_rich_in = h_rich + Q_shx / m_rich  # generator inlet
+
+    Q_evaporator = h_vapor_e - h_liquid_c
+    Q_condenser = h_vapor_g - h_liquid_c
+    Q_generator = h_vapor_g + m_poor * h_poor - m_rich * h_rich_in
+    Q_absorber = h_vapor_e + m_poor * h_poor_out - m_rich * h_rich
+
+    fields = dict(
+        COP=Q_evaporator / Q_generator,
+        COP_heating=(Q_absorber + Q_condenser) / Q_generator,
+        circulation_ratio=m_rich,
+        Q_generator=Q_generator, Q_absorber=Q_absorber, Q_condenser=Q_condenser,
+        Q_evaporator=Q_evaporator, Q_shx=Q_shx,
+        P_high=P_high, P_low=P_low, x_rich=x_rich, x_poor=x_poor, w_rich=w_rich, w_poor=w_poor)
+    fields = {name: np.broadcast_to(np.where(feasible, value, np.nan), shape)[()]
+              for name, value in fields.items()}
+    return CycleResult(feasible=np.broadcast_to(feasible, shape)[()], **fields)
+
+
+if __name__ == '__main__':
+    import time
+
+    pair_name = 'H2O [dmim][DMP]'
+    result = single_effect_cycle(pair_name, 273.15 + 90, 273.15 + 40, 273.15 + 35, 273.15 + 10)
+    print(f"COP = {result.COP:.3f}, COP_heating = {result.COP_heating:.3f}, "
+          f"f = {result.circulation_ratio:.2f}")
+
+    # 100 x 100 x 100 sweep over generator, absorber and evaporator temperatures
+    start = time.perf_counter()
+    sweep = single_effect_cycle(pair_name,
+                                np.linspace(343.15, 393.15, 100)[:, None, None], 273.15 + 40,
+                                np.linspace(298.15, 318.15, 100)[None, :, None],
+                                np.linspace(278.15, 288.15, 100)[None, None, :])
+    print(f"{sweep.COP.size} cycles in {time.perf_counter() - start:.2f} s, "
+          f"{np.count_nonzero(sweep.feasible)} feasible")
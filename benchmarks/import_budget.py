@@ -0,0 +1,79 @@
+"""
+Import-time budget of the public modules.
+
+Every module is imported in a fresh interpreter, which reports its own import
+time (numpy and the interpreter start-up are excluded) and the heavy optional
+dependencies it pulled in. Importing a module must not load scipy, pandas,
+REFPROP, openpyxl or pyarrow; those are imported on first use only.
+
+Usage (from the repository root):
+
+    python benchmarks/import_budget.py --budget-ms 50
+
+The exit status is 1 if a module exceeds the budget or imports a heavy dependency.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'il_abrh', 'PVT2', 'PVT_water', 'saturation_table', 'vector_solvers', 'state_cache',
+    'solver_trace', 'solution_enthalpy', 'solubility', 'absorption_cycle', 'sweep_runner', 'property_cli',
+    'nrtl_regression', 'property_server',
+    'h_water', 's_water', 'NRTL.Gammar', 'Enthalpy.il_registry', 'Enthalpy.if97_water',
+    'Enthalpy.refprop_session', 'Enthalpy.water_tables', 'Enthalpy.results_writer', 'Enthalpy.enthalpy_IL_kJ_kg',
+]
+
+HEAVY = ['scipy', 'pandas', 'ctREFPROP', 'openpyxl', 'pyarrow']
+
+_PROBE = """
+import importlib, json, sys, time
+import numpy
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'heavy': [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+
+def measure(module, repeat=3):
+    """Best-of-`repeat` import time of `module` in s and the heavy modules it loaded."""
+    best, heavy = float('inf'), []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE, module, *HEAVY], cwd=ROOT,
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        best, heavy = min(best, result['seconds']), result['heavy']
+    return best, heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=50.0,
+                        help='allowed import time per module in ms (default 50)')
+    parser.add_argument('--repeat', type=int, default=3, help='fresh interpreters per module (default 3)')
+    args = parser.parse_args(argv)
+
+    failed = []
+    for module in MODULES:
+        seconds, heavy = measure(module, args.repeat)
+        flag = ''
+        if heavy:
+            flag = f"IMPORTS {', '.join(heavy)}"
+        elif seconds * 1e3 > args.budget_ms:
+            flag = 'OVER BUDGET'
+        print(f"{module:30s} {seconds * 1e3:8.1f} ms  {flag}")
+        if flag:
+            failed.append(module)
+    if failed:
+        print(f"{len(failed)} module(s) failed the import budget: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
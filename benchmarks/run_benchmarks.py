@@ -0,0 +1,460 @@
+"""
+Benchmarks of the property kernels.
+
+Every kernel has a scalar case (single-call latency) and a large-array case
+(bulk throughput at a realistic grid size). REFPROP paths run on the fake
+backend in `tests/fake_refprop.py`, so the suite runs on any machine.
+
+Usage (from the repository root):
+
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json --threshold 0.5
+
+In compare mode the exit status is 1 if any benchmark got slower than the
+baseline by more than its allowed slowdown, measured on the median time of
+at least 9 repeats. Each ratio is divided by the median ratio of the whole
+run, so a machine running slower as a whole (frequency scaling, other load,
+memory bandwidth shared with other tenants) does not count as a regression;
+runs with fewer than 5 benchmarks in common with the baseline (--filter)
+compare the raw times. The allowed slowdown is the threshold (default 50%),
+or more for noisy kernels: three times the larger relative interquartile
+spread of the two runs, or twice the relative spread between the passes
+of the baseline. --save makes 3 passes over the suite (each after the
+first in a fresh interpreter) and records the median of the pass medians,
+so one unusually fast or slow pass does not become the reference.
+Benchmarks over the limit are timed again, each in a fresh interpreter, and
+only fail if they are still over it. --quick is rejected with --save and
+--compare, as 3 repeats are too few to gate on.
+
+Baselines are machine specific. `benchmarks/baseline.json` is the reference
+baseline of the machine named in its "machine" and "cpus" fields, and a bare
+`--compare` gates against it. On any other machine, first record a baseline
+there with `--save` from the commit to compare against, then `--compare` that
+file.
+
+With --trace the warm-up call of every benchmark runs under `solver_trace`
+and the Newton solvers' evaluations per point and converged fraction are
+reported (and saved with the results).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.join(ROOT, 'tests'))  # fake_refprop
+
+import numpy as np  # noqa: E402
+
+BENCHMARKS = {}
+
+REFERENCE_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+GATE_REPEAT = 9   # minimum repeats of every benchmark in --save and --compare runs
+NOISE_FACTOR = 3  # allowed slowdown per unit of relative interquartile spread
+MIN_SUITE = 5     # fewest shared benchmarks whose median ratio gives the machine speed
+SAVE_ROUNDS = 3   # passes over the suite recorded by --save
+ROUND_NOISE_FACTOR = 2  # allowed slowdown per unit of relative spread between baseline passes
+
+
+def benchmark(name, points=1, repeat=7, number=1):
+    """Register a benchmark; `setup()` returns the callable that is timed."""
+    def decorator(setup):
+        BENCHMARKS[name] = dict(setup=setup, points=points, repeat=repeat, number=number)
+        return setup
+    return decorator
+
+
+# --- Peng-Robinson ---------------------------------------------------------
+
+@benchmark('PengRobinson/scalar', number=1000)
+def _():
+    from PVT2 import Refrigerant
+    r134a = Refrigerant('R134a')
+    return lambda: r134a.PengRobinson(280.0, 300.0)
+
+
+@benchmark('PengRobinson/batch_1M', points=1_000_000, repeat=5)
+def _():
+    from PVT2 import Refrigerant
+    r134a = Refrigerant('R134a')
+    T = np.linspace(250, 360, 1000)[:, None]
+    P = np.linspace(50, 3000, 1000)[None, :]
+    return lambda: r134a.PengRobinson_batch(T, P)
+
+
+@benchmark('PR_enthalpy_entropy/batch_1M', points=1_000_000, repeat=5)
+def _():
+    from PVT2 import Refrigerant
+    r134a = Refrigerant('R134a')
+    r134a.enthalpy_entropy_tp(300.0, 100.0)  # reference state, computed once
+    T = np.linspace(250, 360, 1000)[:, None]
+    P = np.linspace(50, 3000, 1000)[None, :]
+    return lambda: r134a.enthalpy_entropy_tp(T, P)
+
+
+@benchmark('PR_temperature_ph/batch_100k', points=100_000, repeat=5)
+def _():
+    from PVT2 import Refrigerant
+    r134a = Refrigerant('R134a')
+    T = np.linspace(250, 360, 316)[:, None]
+    P = np.linspace(50, 3000, 316)[None, :]
+    h, _ = r134a.enthalpy_entropy_tp(T, P)
+    P = np.broadcast_to(P, h.shape)
+    return lambda: r134a.temperature_ph(P, h)
+
+
+# --- Saturation --------------------------------------------------------------
+
+@benchmark('saturation_temperature/scalar', number=100)
+def _():
+    from PVT2 import Refrigerant
+    water = Refrigerant('Water')
+    return lambda: water.saturation_temperature(101.325)
+
+
+@benchmark('saturation_temperature/batch_10k', points=10_000, repeat=5)
+def _():
+    from PVT2 import Refrigerant
+    water = Refrigerant('Water')
+    P = np.geomspace(1.0, 20000.0, 10_000)
+    return lambda: water.saturation_temperature_batch(P)
+
+
+@benchmark('saturation_pressure/batch_10k', points=10_000, repeat=5)
+def _():
+    from PVT2 import Refrigerant
+    r134a = Refrigerant('R134a')
+    T = np.linspace(200, 370, 10_000)
+    return lambda: r134a.saturation_pressure_batch(T)
+
+
+@benchmark('saturation_table/lookup_1M', points=1_000_000, repeat=5)
+def _():
+    from PVT2 import Refrigerant
+    table = Refrigerant('Water').saturation_table()
+    P = np.geomspace(1.0, 20000.0, 1_000_000)
+    return lambda: table.temperature(P)
+
+
+# --- NRTL --------------------------------------------------------------------
+
+@benchmark('calculate_activity_coefficients/scalar', number=1000)
+def _():
+    from NRTL.Gammar import calculate_activity_coefficients
+    return lambda: calculate_activity_coefficients('H2O [dmim][DMP]', 0.5, 320.0)
+
+
+@benchmark('nrtl_activity_coefficients/batch_1M', points=13 * 300 * 256, repeat=5)
+def _():
+    from NRTL.Gammar import get_nrtl_table
+    nrtl_table = get_nrtl_table()
+    ids = np.arange(len(nrtl_table))[:, None, None]
+    x = np.linspace(0.01, 0.99, 300)[:, None]
+    T = np.linspace(273.15, 423.15, 256)
+    return lambda: nrtl_table.activity_coefficients(ids, x, T)
+
+
+@benchmark('nrtl_excess_enthalpy/batch_1M', points=13 * 300 * 256, repeat=5)
+def _():
+    from NRTL.Gammar import get_nrtl_table
+    nrtl_table = get_nrtl_table()
+    ids = np.arange(len(nrtl_table))[:, None, None]
+    x = np.linspace(0.01, 0.99, 300)[:, None]
+    T = np.linspace(273.15, 423.15, 256)
+    return lambda: nrtl_table.excess_enthalpy(ids, x, T)
+
+
+@benchmark('nrtl_mixture_ternary/1M', points=1_000_000, repeat=5)
+def _():
+    from NRTL.Gammar import NRTLMixture
+    mixture = NRTLMixture.from_table(['R134a', 'R152a', '[hmim][Tf2N]'],
+                                     interactions={('R134a', 'R152a'): (0.2, 50.0, -0.1, 30.0, 0.3)})
+    x = np.random.default_rng(0).dirichlet([1, 1, 1], size=1_000_000)
+    T = np.linspace(280, 360, 1_000_000)
+    return lambda: mixture.ln_activity_coefficients(x, T)
+
+
+# --- Ionic liquid enthalpy ---------------------------------------------------
+
+@benchmark('il_enthalpy/scalar', number=1000)
+def _():
+    from Enthalpy.il_registry import get_registry
+    registry = get_registry()
+    return lambda: registry.h('[hmim][Tf2N]', 373.15)
+
+
+@benchmark('calculate_enthalpy_from_csv/default_grid', points=750, repeat=7, number=5)
+def _():
+    from Enthalpy import enthalpy_IL_kJ_kg
+    path = os.path.join(ROOT, 'Enthalpy', 'IL_Cp_with_Molar_Mass.csv')
+    return lambda: enthalpy_IL_kJ_kg.calculate_enthalpy_from_csv(path)
+
+
+@benchmark('il_h_surface/1M', points=1_000_000, repeat=5)
+def _():
+    from Enthalpy.il_registry import get_registry
+    registry = get_registry()
+    ids = registry.ids_with_molar_mass()
+    T_step = 75.0 / (1_000_000 // len(ids))
+    return lambda: registry.h_surface(ids, 298.15, 373.15, T_step)
+
+
+@benchmark('il_T_from_h/1M', points=1_000_000, repeat=5)
+def _():
+    from Enthalpy.il_registry import get_registry
+    registry = get_registry()
+    ids = np.resize(registry.ids_with_molar_mass(), 1_000_000)
+    h = registry.h(ids, np.linspace(280, 400, 1_000_000))
+    return lambda: registry.T_from_h(ids, h)
+
+
+# --- Water (REFPROP on the fake backend, and IF97) ---------------------------
+
+@benchmark('h_water/refprop_scalar', number=1000)
+def _():
+    from Enthalpy import refprop_session
+    import h_water
+    from fake_refprop import fake_backend
+    refprop_session.set_backend(fake_backend)
+    session = refprop_session.get_session('WATER.FLD', prefix='fake')
+    return lambda: h_water.calculate_enthalpy_tp(session, 50.0, 101.325)
+
+
+@benchmark('if97_water/properties_tp_1M', points=1_000_000, repeat=5)
+def _():
+    from Enthalpy import if97_water
+    T = np.linspace(280, 600, 1000)[:, None]
+    P = np.geomspace(1, 20000, 1000)[None, :]
+    return lambda: if97_water.properties_tp(T, P)
+
+
+@benchmark('if97_water/temperature_ph_1M', points=1_000_000, repeat=3)
+def _():
+    from Enthalpy import if97_water
+    T = np.linspace(280, 600, 1000)[:, None]
+    P = np.broadcast_to(np.geomspace(1, 20000, 1000)[None, :], (1000, 1000))
+    h, _ = if97_water.properties_tp(T, P)
+    return lambda: if97_water.temperature_ph(P, h)
+
+
+@benchmark('water_table/properties_tp_1M', points=1_000_000, repeat=5)
+def _():
+    from Enthalpy.water_tables import get_water_table
+    table = get_water_table()
+    T = np.linspace(280, 470, 1000)[:, None]
+    P = np.geomspace(1, 10000, 1000)[None, :]
+    return lambda: table.properties_tp(T, P)
+
+
+# --- Cycle -------------------------------------------------------------------
+
+@benchmark('absorption_cycle/sweep_1M', points=1_000_000, repeat=3)
+def _():
+    from absorption_cycle import single_effect_cycle
+    T_g = np.linspace(343.15, 393.15, 100)[:, None, None]
+    T_a = np.linspace(298.15, 318.15, 100)[None, :, None]
+    T_e = np.linspace(278.15, 288.15, 100)[None, None, :]
+    return lambda: single_effect_cycle('H2O [dmim][DMP]', T_g, 313.15, T_a, T_e)
+
+
+def solver_counts(trace):
+    """Evaluations per point and converged fraction of each solver in a trace."""
+    counters = trace.summary()['counters']
+    counts = {}
+    for key, points in counters.items():
+        if key.endswith('.points') and points:
+            solver = key[:-len('.points')]
+            counts[solver] = {
+                'points': points,
+                'evaluations_per_point': counters.get(f"{solver}.evaluations", 0) / points,
+                'converged': 1 - counters.get(f"{solver}.unconverged", 0) / points,
+            }
+    return counts
+
+
+def summarize(times, points):
+    """Result dict of a benchmark from its per-call times in s."""
+    best, median = min(times), float(np.median(times))
+    q1, q3 = np.percentile(times, [25, 75])
+    return {
+        'best_s': best,
+        'median_s': median,
+        'spread': float(q3 - q1) / median,
+        'times_s': list(times),
+        'points': points,
+        'points_per_s': points / best,
+    }
+
+
+def run(names, quick=False, trace=False, min_repeat=0):
+    """Time the selected benchmarks; returns {name: result dict}."""
+    import solver_trace
+    results = {}
+    for name in names:
+        spec = BENCHMARKS[name]
+        func = spec['setup']()
+        with solver_trace.tracing() if trace else nullcontext() as recorded:
+            func()  # warm up (imports, caches, tables)
+        repeat = max(3 if quick else spec['repeat'], min_repeat)
+        number = spec['number']
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            times.append((time.perf_counter() - start) / number)
+        results[name] = summarize(times, spec['points'])
+        best = results[name]['best_s']
+        print(f"{name:45s} {best * 1e6:12.1f} us  {spec['points'] / best:14,.0f} points/s")
+        if trace:
+            results[name]['solvers'] = solver_counts(recorded)
+            for solver, counts in results[name]['solvers'].items():
+                print(f"    {solver:41s} {counts['evaluations_per_point']:8.2f} evaluations/point"
+                      f"  {counts['converged']:8.2%} converged")
+    return results
+
+
+_ISOLATED = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import run_benchmarks
+print(json.dumps(run_benchmarks.run(sys.argv[3:], min_repeat=int(sys.argv[2]))))
+"""
+
+
+def run_isolated(names, min_repeat=GATE_REPEAT):
+    """Time benchmarks in a fresh interpreter, free of the state earlier benchmarks left behind."""
+    output = subprocess.run([sys.executable, '-c', _ISOLATED, os.path.dirname(os.path.abspath(__file__)),
+                             str(min_repeat), *names], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    lines = output.splitlines()
+    print('\n'.join(lines[:-1]))
+    return json.loads(lines[-1])
+
+
+def merge_rounds(rounds):
+    """
+    Combine passes over the same benchmarks: the median of the pass medians,
+    all times, and the relative spread of the pass medians ('round_spread').
+    """
+    merged = {}
+    for name, first in rounds[0].items():
+        passes = [results[name] for results in rounds]
+        medians = [result['median_s'] for result in passes]
+        median = float(np.median(medians))
+        best = min(result['best_s'] for result in passes)
+        merged[name] = dict(
+            first,
+            best_s=best,
+            median_s=median,
+            spread=float(np.median([result['spread'] for result in passes])),
+            round_spread=(max(medians) - min(medians)) / median,
+            times_s=[t for result in passes for t in result['times_s']],
+            points_per_s=first['points'] / best,
+        )
+    return merged
+
+
+def allowed_ratio(result, reference, threshold):
+    """Largest median-time ratio accepted for one benchmark: the threshold, widened for noisy kernels."""
+    noise = max(result.get('spread', 0.0), reference.get('spread', 0.0))
+    return 1 + max(threshold, NOISE_FACTOR * noise, ROUND_NOISE_FACTOR * reference.get('round_spread', 0.0))
+
+
+def machine_speed(results, baseline):
+    """
+    How much slower the machine ran than for the baseline: the median of the
+    median-time ratios of all shared benchmarks, or 1.0 for fewer than MIN_SUITE.
+    """
+    ratios = [result['median_s'] / baseline['results'][name]['median_s']
+              for name, result in results.items() if name in baseline['results']]
+    return float(np.median(ratios)) if len(ratios) >= MIN_SUITE else 1.0
+
+
+def compare(results, baseline, threshold, speed=1.0):
+    """
+    Print the change of the median times against the baseline; returns the names that regressed.
+
+    Each ratio is divided by `speed`, the machine speed ratio from `machine_speed`.
+    """
+    regressed = []
+    for name, result in results.items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            print(f"{name:45s} (not in baseline)")
+            continue
+        ratio = result['median_s'] / reference['median_s'] / speed
+        limit = allowed_ratio(result, reference, threshold)
+        flag = 'REGRESSED' if ratio > limit else ''
+        print(f"{name:45s} {ratio:8.2f}x  (limit {limit:.2f}x)  {flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--quick', action='store_true', help='3 repeats per benchmark')
+    parser.add_argument('--save', metavar='JSON', help='write the results as a baseline')
+    parser.add_argument('--compare', metavar='JSON', nargs='?', const=REFERENCE_BASELINE,
+                        help='compare against a baseline (default: benchmarks/baseline.json)')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='allowed relative slowdown in compare mode (default 0.5)')
+    parser.add_argument('--trace', action='store_true', help='report solver evaluations per point')
+    args = parser.parse_args(argv)
+    gate = bool(args.save or args.compare)
+    if args.quick and gate:
+        parser.error('--quick cannot be combined with --save or --compare: 3 repeats are too few to gate on')
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run(names, quick=args.quick, trace=args.trace, min_repeat=GATE_REPEAT if gate else 0)
+    if args.save:
+        rounds = [results]
+        for round_ in range(2, SAVE_ROUNDS + 1):
+            print(f"\nPass {round_} of {SAVE_ROUNDS} in a fresh interpreter:")
+            rounds.append(run_isolated(names))
+        results = merge_rounds(rounds)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.platform(),
+                'cpus': os.cpu_count(),
+                'results': results,
+            }, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        speed = machine_speed(results, baseline)
+        print(f"\nCompared with {args.compare} (threshold {args.threshold:.0%}, "
+              f"machine speed factor {speed:.2f}x):")
+        regressed = compare(results, baseline, args.threshold, speed)
+        if regressed:
+            # A slow pass is often noise or state left by the benchmarks that
+            # ran before: time each flagged benchmark again in a fresh
+            # interpreter and judge it on those timings
+            print(f"\nRe-running {len(regressed)} flagged benchmark(s) in fresh interpreters:")
+            for name in regressed:
+                results[name].update(run_isolated([name])[name])
+            print()
+            regressed = compare({name: results[name] for name in regressed}, baseline, args.threshold, speed)
+        if regressed:
+            print(f"{len(regressed)} benchmark(s) regressed: {', '.join(regressed)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
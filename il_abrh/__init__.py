@@ -0,0 +1,74 @@
+"""
+Thermodynamic properties of refrigerant/ionic liquid absorption working pairs.
+
+The public API is re-exported here and every name is imported on first
+access, so `import il_abrh` loads no models, reads no data files and does not
+import scipy, pandas or REFPROP:
+
+    import il_abrh
+    il_abrh.single_effect_cycle('H2O [dmim][DMP]', 363.15, 313.15, 308.15, 283.15)
+"""
+import importlib
+
+__version__ = '0.1.0'
+
+# Public name -> (module, attribute)
+_API = {
+    # Peng-Robinson refrigerant model
+    'Refrigerant': ('PVT2', 'Refrigerant'),
+    'solve_cubic_Z': ('PVT2', 'solve_cubic_Z'),
+    'get_components': ('PVT2', 'get_components'),
+    'SaturationTable': ('saturation_table', 'SaturationTable'),
+    # NRTL activity coefficients
+    'NRTLTable': ('NRTL.Gammar', 'NRTLTable'),
+    'NRTLMixture': ('NRTL.Gammar', 'NRTLMixture'),
+    'get_nrtl_table': ('NRTL.Gammar', 'get_nrtl_table'),
+    'calculate_activity_coefficients': ('NRTL.Gammar', 'calculate_activity_coefficients'),
+    'calculate_excess_enthalpy': ('NRTL.Gammar', 'calculate_excess_enthalpy'),
+    'calculate_multicomponent_activity_coefficients': ('NRTL.Gammar',
+                                                       'calculate_multicomponent_activity_coefficients'),
+    'set_nrtl_table': ('NRTL.Gammar', 'set_nrtl_table'),
+    'fit_nrtl': ('nrtl_regression', 'fit_nrtl'),
+    # Ionic liquid and water enthalpy
+    'ILRegistry': ('Enthalpy.il_registry', 'ILRegistry'),
+    'get_registry': ('Enthalpy.il_registry', 'get_registry'),
+    'if97_water': ('Enthalpy.if97_water', None),
+    'WaterTable': ('Enthalpy.water_tables', 'WaterTable'),
+    'get_water_table': ('Enthalpy.water_tables', 'get_water_table'),
+    'get_session': ('Enthalpy.refprop_session', 'get_session'),
+    # Solutions and cycles
+    'mixture_enthalpy': ('solution_enthalpy', 'mixture_enthalpy'),
+    'mole_to_mass_fraction': ('solution_enthalpy', 'mole_to_mass_fraction'),
+    'mass_to_mole_fraction': ('solution_enthalpy', 'mass_to_mole_fraction'),
+    'bubble_pressure': ('solubility', 'bubble_pressure'),
+    'solubility': ('solubility', 'solubility'),
+    'single_effect_cycle': ('absorption_cycle', 'single_effect_cycle'),
+    # Infrastructure
+    'safeguarded_newton': ('vector_solvers', 'safeguarded_newton'),
+    'bracketed_newton': ('vector_solvers', 'bracketed_newton'),
+    'QuantizedLRUCache': ('state_cache', 'QuantizedLRUCache'),
+    'quantized_cache': ('state_cache', 'quantized_cache'),
+    'run_sweep': ('sweep_runner', 'run_sweep'),
+    'PropertyClient': ('property_server', 'PropertyClient'),
+    'AsyncPropertyClient': ('property_server', 'AsyncPropertyClient'),
+    'open_writer': ('Enthalpy.results_writer', 'open_writer'),
+    'read_table': ('Enthalpy.results_writer', 'read_table'),
+    'solver_trace': ('solver_trace', None),
+}
+
+__all__ = sorted(_API)
+
+
+def __getattr__(name):
+    try:
+        module_name, attribute = _API[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    module = importlib.import_module(module_name)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,285 @@
+"""
+Regression of NRTL parameters against refrigerant solubility (P-T-x) data.
+
+Usage (from the repository root):
+
+    python nrtl_regression.py measurements.csv -o NRTL_fit.csv
+
+The measurement CSV has the columns "Working pairs", T (K), P (kPa) and x
+(refrigerant mole fraction). The output has the columns of NRTL_para2.csv,
+so it can replace it directly (`NRTL.Gammar.set_nrtl_table`), followed by the
+95 % confidence half-widths and fit statistics.
+"""
+import argparse
+import csv
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from NRTL.Gammar import NRTLTable, get_nrtl_table
+from solubility import refrigerant_saturation_pressure
+from solution_enthalpy import split_pair
+
+PARAMETERS = NRTLTable.columns  # tau_0_12, tau_1_12, tau_0_21, tau_1_21, alpha
+
+RegressionResult = namedtuple('RegressionResult', ['table', 'names', 'params', 'ci95', 'n_points', 'rmse',
+                                                   'iterations', 'converged', 'seconds'])
+
+DEFAULT_PARAMS = (0.0, 0.0, 0.0, 0.0, 0.3)  # Start values of pairs that are not in the table
+
+
+def load_measurements(path):
+    """
+    Read solubility measurements.
+
+    Returns:
+        dict: 'pairs' (array of names), 'T' (K), 'P' (kPa) and 'x' arrays.
+    """
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    return {
+        'pairs': np.array([row['Working pairs'] for row in rows]),
+        'T': np.array([float(row['T']) for row in rows]),
+        'P': np.array([float(row['P']) for row in rows]),
+        'x': np.array([float(row['x']) for row in rows]),
+    }
+
+
+def _residuals(theta, group, x, u, ln_target):
+    """
+    Residuals ln(x gamma1 Psat / P) and their Jacobian for centred parameters.
+
+    theta holds (c12, b12, c21, b21, alpha) per pair with tau = c + b * u and
+    u = 1/T - 1/T_mean of the pair, which decorrelates c and b.
+    """
+    c12, b12, c21, b21, alpha = (theta[group, k] for k in range(5))
+    x1 = x
+    x2 = 1 - x1
+    tau12 = c12 + b12 * u
+    tau21 = c21 + b21 * u
+    G12 = np.exp(-alpha * tau12)
+    G21 = np.exp(-alpha * tau21)
+    D1 = x1 + x2 * G21
+    D2 = x2 + x1 * G12
+    ln_gamma1 = x2**2 * (tau21 * (G21 / D1)**2 + tau12 * G12 / D2**2)
+
+    # Partial derivatives of ln(gamma1) in tau and G, then through G = exp(-alpha tau)
+    dl_dG21 = 2 * x2**2 * tau21 * G21 * x1 / D1**3
+    dl_dG12 = x2**2 * tau12 * (D2 - 2 * x1 * G12) / D2**3
+    dl_dtau12 = x2**2 * G12 / D2**2 - alpha * G12 * dl_dG12
+    dl_dtau21 = x2**2 * (G21 / D1)**2 - alpha * G21 * dl_dG21
+    dl_dalpha = -tau12 * G12 * dl_dG12 - tau21 * G21 * dl_dG21
+
+    residual = np.log(x1) + ln_gamma1 - ln_target
+    jacobian = np.stack([dl_dtau12, dl_dtau12 * u, dl_dtau21, dl_dtau21 * u, dl_dalpha], axis=1)
+    return residual, jacobian
+
+
+def _normal_equations(pair_ids, counts, residual, jacobian, n_pairs):
+    """
+    Per-pair J^T J (n_pairs, 5, 5), J^T r (n_pairs, 5) and sum of squares.
+
+    The points are sorted by pair: `counts[k]` consecutive points belong to
+    pair `pair_ids[k]`. Pairs that are not listed get zeros.
+    """
+    JtJ = np.zeros((n_pairs, 5, 5))
+    Jtr = np.zeros((n_pairs, 5))
+    ssr = np.zeros(n_pairs)
+    stop = 0
+    for k, count in zip(pair_ids, counts):
+        start, stop = stop, stop + count
+        J, r = jacobian[start:stop], residual[start:stop]
+        JtJ[k] = J.T @ J
+        Jtr[k] = J.T @ r
+        ssr[k] = r @ r
+    return JtJ, Jtr, ssr
+
+
+def fit_nrtl(pairs, T, P, x, table=None, fit_alpha=True, maxiter=200, ftol=1e-10):
+    """
+    Fit the NRTL parameters of every working pair in the data at once.
+
+    The residual of a point is ln(P_calc / P) with P_calc = x gamma1(x, T) Psat(T)
+    (modified Raoult's law, non-volatile ionic liquid). All points of all
+    pairs are evaluated in one vectorized call together with the analytic
+    Jacobian in the parameters, and a Levenberg-Marquardt iteration runs on
+    all pairs simultaneously, each with its own damping and stopping test.
+
+    Args:
+        pairs (array-like): Working pair name of each point.
+        T, P, x (array-like): Temperature (K), pressure (kPa) and refrigerant mole fraction.
+        table (NRTLTable, optional): Start values and the pairs to carry over
+            unchanged. Defaults to the current table of `NRTL.Gammar`.
+        fit_alpha (bool, optional): Fit alpha, or keep its start value. Defaults to True.
+        maxiter (int, optional): Maximum iterations. Defaults to 200.
+        ftol (float, optional): Relative change of the sum of squares at which
+            a pair has converged. Defaults to 1e-10.
+
+    Returns:
+        RegressionResult: `table` (an NRTLTable with the fitted pairs replaced
+        and new pairs appended), and per fitted pair (in `names` order) the
+        parameters and 95 % confidence half-widths (n x 5, in `PARAMETERS`
+        order, NaN for fixed parameters), number of points, RMS of the
+        ln(P) residuals, iterations and a converged flag.
+    """
+    start = time.perf_counter()
+    table = get_nrtl_table() if table is None else table
+    pairs = np.asarray(pairs)
+    T = np.asarray(T, dtype=float)
+    x = np.asarray(x, dtype=float)
+    names, group = np.unique(pairs, return_inverse=True)
+    names = [str(name) for name in names]
+    n_pairs = len(names)
+    # Sorted by pair, the points of every pair are one contiguous block
+    order = np.argsort(group, kind='stable')
+    group, T, x = group[order], T[order], x[order]
+    P = np.asarray(P, dtype=float)[order]
+
+    # The saturation pressures are fixed during the fit: evaluate them once per refrigerant
+    refrigerants = np.array([split_pair(name)[0] for name in names])[group]
+    ln_Psat = np.empty(T.shape)
+    for refrigerant in np.unique(refrigerants):
+        mask = refrigerants == refrigerant
+        ln_Psat[mask] = np.log(refrigerant_saturation_pressure(str(refrigerant), T[mask]))
+    ln_target = np.log(P) - ln_Psat
+
+    n_points = np.bincount(group, minlength=n_pairs)
+    T_mean = 1 / (np.bincount(group, 1 / T, n_pairs) / n_points)
+    u = 1 / T - 1 / T_mean[group]
+
+    params = np.array([[getattr(table, column)[table.index[name]] for column in PARAMETERS]
+                       if name in table.index else DEFAULT_PARAMS for name in names], dtype=float)
+    theta = params.copy()
+    theta[:, 0] += params[:, 1] / T_mean  # c = tau_0 + tau_1 / T_mean
+    theta[:, 2] += params[:, 3] / T_mean
+
+    free = np.array([True, True, True, True, fit_alpha])
+    residual, jacobian = _residuals(theta, group, x, u, ln_target)
+    all_pairs = np.arange(n_pairs)
+    JtJ, Jtr, ssr = _normal_equations(all_pairs, n_points, residual, jacobian, n_pairs)
+    damping = np.full(n_pairs, 1e-3)
+    active = np.isfinite(ssr)
+    converged = np.zeros(n_pairs, dtype=bool)
+    iterations = np.zeros(n_pairs, dtype=np.int64)
+    n_active = -1
+
+    for _ in range(maxiter):
+        if not active.any():
+            break
+        if np.count_nonzero(active) != n_active:
+            # Only the points of pairs that are still iterating are evaluated
+            n_active = np.count_nonzero(active)
+            points = np.flatnonzero(active[group])
+            group_a, x_a, u_a, target_a = group[points], x[points], u[points], ln_target[points]
+            pairs_a = all_pairs[active]
+        iterations[active] += 1
+        # Marquardt step with the fixed parameters removed from the system
+        A = JtJ * np.outer(free, free)
+        diagonal = np.where(free, np.maximum(np.diagonal(A, axis1=1, axis2=2), 1e-12), 1.0)
+        A = A + (damping[:, None] * diagonal)[:, :, None] * np.eye(5) + np.diag(~free)
+        step = np.linalg.solve(A[active], -(Jtr * free)[active][:, :, None])[:, :, 0]
+
+        trial = theta.copy()
+        trial[active] += step
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            r_trial, J_trial = _residuals(trial, group_a, x_a, u_a, target_a)
+        JtJ_t, Jtr_t, ssr_t = _normal_equations(pairs_a, n_points[pairs_a], r_trial, J_trial, n_pairs)
+
+        accept = active & np.isfinite(ssr_t) & (ssr_t < ssr)
+        small = accept & (ssr - ssr_t <= ftol * ssr)
+        theta[accept] = trial[accept]
+        JtJ[accept], Jtr[accept] = JtJ_t[accept], Jtr_t[accept]
+        ssr = np.where(accept, ssr_t, ssr)
+        damping = np.where(accept, damping / 3, damping * 2)
+
+        converged |= small
+        # A pair whose damping has grown this large cannot improve any more
+        stalled = active & ~accept & (damping > 1e10)
+        converged |= stalled & (np.abs(Jtr * free).max(axis=1) <= 1e-8 * np.sqrt(ssr + 1e-300))
+        active &= ~(small | stalled)
+
+    # Back to tau = tau_0 + tau_1 / T and the covariance through the same linear map
+    params = theta.copy()
+    params[:, 0] -= theta[:, 1] / T_mean
+    params[:, 2] -= theta[:, 3] / T_mean
+    dof = np.maximum(n_points - np.count_nonzero(free), 1)
+    ci95 = np.full((n_pairs, 5), np.nan)
+    from scipy.special import stdtrit  # Student t quantile
+    for k in range(n_pairs):
+        Jf = JtJ[k][np.ix_(free, free)]
+        try:
+            covariance = np.linalg.inv(Jf) * ssr[k] / dof[k]
+        except np.linalg.LinAlgError:
+            continue
+        M = np.eye(5)
+        M[0, 1] = M[2, 3] = -1 / T_mean[k]
+        M = M[:, free]
+        ci95[k] = np.sqrt(np.diagonal(M @ covariance @ M.T)) * stdtrit(dof[k], 0.975)
+        ci95[k, ~free] = np.nan
+
+    return RegressionResult(table=_updated_table(table, names, params), names=names, params=params,
+                            ci95=ci95, n_points=n_points, rmse=np.sqrt(ssr / n_points),
+                            iterations=iterations, converged=converged, seconds=time.perf_counter() - start)
+
+
+def _updated_table(table, names, params):
+    """Copy of `table` with the parameters of `names` replaced (new pairs appended)."""
+    all_names = list(table.names) + [name for name in names if name not in table.index]
+    data = {'Working pairs': all_names}
+    for k, column in enumerate(PARAMETERS):
+        values = np.concatenate([getattr(table, column), np.full(len(all_names) - len(table), np.nan)])
+        for name, value in zip(names, params[:, k]):
+            values[all_names.index(name)] = value
+        data[column] = values
+    return NRTLTable(data)
+
+
+def write_parameters(result, path):
+    """
+    Write the fitted table as a parameter CSV.
+
+    The first columns are those of NRTL_para2.csv; the 95 % confidence
+    half-widths, number of points, RMS ln(P) residual and the converged flag
+    follow and are empty for pairs that were not refitted.
+    """
+    fitted = {name: k for k, name in enumerate(result.names)}
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Working pairs'] + PARAMETERS + [f"{column}_ci95" for column in PARAMETERS]
+                        + ['n_points', 'rmse_lnP', 'converged'])
+        table = result.table
+        for i, name in enumerate(table.names):
+            row = [name] + [repr(float(getattr(table, column)[i])) for column in PARAMETERS]
+            k = fitted.get(name)
+            if k is None:
+                row += [''] * (len(PARAMETERS) + 3)
+            else:
+                row += [repr(float(value)) for value in result.ci95[k]]
+                row += [int(result.n_points[k]), repr(float(result.rmse[k])), bool(result.converged[k])]
+            writer.writerow(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('measurements', help='CSV with the columns "Working pairs", T, P and x')
+    parser.add_argument('-o', '--output', default='NRTL_fit.csv', help='parameter CSV to write (default NRTL_fit.csv)')
+    parser.add_argument('--parameters', help='start values (default NRTL/NRTL_para2.csv)')
+    parser.add_argument('--fix-alpha', action='store_true', help='keep alpha at its start value')
+    args = parser.parse_args(argv)
+
+    data = load_measurements(args.measurements)
+    table = NRTLTable.from_csv(args.parameters) if args.parameters else None
+    result = fit_nrtl(data['pairs'], data['T'], data['P'], data['x'], table=table, fit_alpha=not args.fix_alpha)
+    write_parameters(result, args.output)
+    for k, name in enumerate(result.names):
+        print(f"{name:28s} {result.n_points[k]:8d} points  rmse(ln P) {result.rmse[k]:.3e}"
+              f"  {result.iterations[k]:4d} iterations  {'converged' if result.converged[k] else 'NOT CONVERGED'}")
+    print(f"{int(result.n_points.sum())} points, {len(result.names)} pairs in {result.seconds:.2f} s; "
+          f"parameters written to {args.output}")
+    return 0 if result.converged.all() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Evaluate properties of streamed state points from the command line.
+
+State points are read as CSV (with a header row) or JSON lines from a file or
+stdin, evaluated chunk by chunk through the vectorized models and written out
+as they are done, so memory stays bounded whatever the input size.
+
+Input columns (missing ones are taken as NaN):
+
+    fluid   refrigerant (e.g. H2O, R134a), ionic liquid (e.g. [hmim][Tf2N])
+            or working pair (e.g. "H2O [dmim][DMP]"); or use --fluid
+    T       temperature in K
+    P       pressure in kPa
+    x       refrigerant mole fraction (working pairs)
+
+Properties (-p, comma separated), NaN where they do not apply:
+
+    gamma   gamma1, gamma2 of a working pair (NRTL)
+    Psat    saturation pressure in kPa of a refrigerant at T, or the bubble
+            pressure of a working pair at x and T
+    Tsat    saturation temperature in K of a refrigerant at P
+    h       enthalpy in kJ/kg: refrigerant at T, P (water IAPWS-IF97, others
+            Peng-Robinson); ionic liquid relative to 298.15 K; working pair
+            solution at x, T
+    s       entropy in kJ/(kg*K) of a refrigerant at T, P
+    cp      heat capacity in kJ/(kg*K) of an ionic liquid at T
+
+Usage (from the repository root):
+
+    python property_cli.py states.csv -p h,s,Tsat -o results.csv
+    cat log.jsonl | python property_cli.py - -f jsonl -p gamma,Psat > results.jsonl
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+from itertools import islice
+
+import numpy as np
+
+from Enthalpy import if97_water
+
+WATER = ('H2O', 'Water')
+
+PROPERTIES = {
+    'gamma': ('gamma1', 'gamma2'),
+    'Psat': ('Psat',),
+    'Tsat': ('Tsat',),
+    'h': ('h',),
+    's': ('s',),
+    'cp': ('cp',),
+}
+
+INPUTS = ('T', 'P', 'x')
+
+
+class _Models:
+    """The property models, loaded on first use and shared by all chunks."""
+
+    def __init__(self):
+        self._refrigerants = {}
+        self._kinds = {}
+
+    def refrigerant(self, name):
+        from PVT2 import Refrigerant
+        if name not in self._refrigerants:
+            self._refrigerants[name] = Refrigerant(name)
+        return self._refrigerants[name]
+
+    def kind(self, name):
+        """'water', 'refrigerant', 'il' or 'pair'."""
+        if name not in self._kinds:
+            from Enthalpy.il_registry import get_registry
+            from NRTL.Gammar import get_nrtl_table
+            from PVT2 import get_components
+            if name in WATER:
+                kind = 'water'
+            elif name in get_components():
+                kind = 'refrigerant'
+            elif name in get_registry().index:
+                kind = 'il'
+            elif name in get_nrtl_table().index:
+                kind = 'pair'
+            else:
+                raise ValueError(f"Unknown fluid '{name}': not a refrigerant, ionic liquid or working pair.")
+            self._kinds[name] = kind
+        return self._kinds[name]
+
+
+def evaluate_fluid(models, name, T, P, x, properties):
+    """
+    Properties of one fluid for arrays of T, P and x.
+
+    Returns:
+        dict: Output column -> array, only for the properties that apply to the fluid.
+    """
+    kind = models.kind(name)
+    out = {}
+    if kind == 'water':
+        if 'Psat' in properties:
+            out['Psat'] = if97_water.saturation_pressure(T)
+        if 'Tsat' in properties:
+            out['Tsat'] = if97_water.saturation_temperature(P)
+        if 'h' in properties or 's' in properties:
+            out['h'], out['s'] = if97_water.properties_tp(T, P)
+    elif kind == 'refrigerant':
+        refrigerant = models.refrigerant(name)
+        if 'Psat' in properties:
+            out['Psat'] = refrigerant.saturation_pressure_batch(T)[0]
+        if 'Tsat' in properties:
+            out['Tsat'] = refrigerant.saturation_temperature_batch(P)[0]
+        if 'h' in properties or 's' in properties:
+            out['h'], out['s'] = refrigerant.enthalpy_entropy_tp(T, P)
+    elif kind == 'il':
+        from Enthalpy.il_registry import get_registry
+        registry = get_registry()
+        il_id = registry.index[name]
+        if 'h' in properties:
+            out['h'] = registry.h(il_id, T)
+        if 'cp' in properties:
+            out['cp'] = registry.cp(il_id, T) / registry.molar_mass[il_id]  # J/(mol*K) -> kJ/(kg*K)
+    else:
+        if 'gamma' in properties:
+            from NRTL.Gammar import get_nrtl_table
+            out['gamma1'], out['gamma2'] = get_nrtl_table().activity_coefficients(name, x, T)
+        if 'Psat' in properties:
+            from solubility import bubble_pressure
+            out['Psat'] = bubble_pressure(name, x, T)
+        if 'h' in properties:
+            from solution_enthalpy import mixture_enthalpy
+            out['h'] = mixture_enthalpy(name, x, T, basis='mass')
+    return out
+
+
+def evaluate_chunk(models, fluids, inputs, properties):
+    """
+    Properties of a chunk of state points, grouped by fluid.
+
+    Args:
+        models (_Models): Shared model cache.
+        fluids (np.ndarray): Fluid name of each point.
+        inputs (dict): 'T', 'P' and 'x' -> float array of the chunk length.
+        properties (list): Keys of `PROPERTIES`.
+
+    Returns:
+        dict: Output column -> float array (NaN where a property does not apply).
+    """
+    n = len(fluids)
+    columns = [column for prop in properties for column in PROPERTIES[prop]]
+    out = {column: np.full(n, np.nan) for column in columns}
+    names, inverse = np.unique(fluids, return_inverse=True)
+    for i, name in enumerate(names):
+        mask = inverse == i
+        values = evaluate_fluid(models, str(name), inputs['T'][mask], inputs['P'][mask],
+                                inputs['x'][mask], properties)
+        for column, value in values.items():
+            if column in out:
+                out[column][mask] = value
+    return out
+
+
+def _to_float(values):
+    """Strings (or JSON values) to a float array; empty and missing values become NaN."""
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return np.array([np.nan if value in ('', None) else float(value) for value in values])
+
+
+def read_chunks(stream, fmt, chunk_rows):
+    """
+    Yield (fields, rows) chunks of at most `chunk_rows` rows.
+
+    CSV rows are lists in the order of the header `fields`; JSON lines rows
+    are dicts and `fields` is None.
+    """
+    if fmt == 'csv':
+        rows = csv.reader(stream)
+        fields = next(rows, None)
+    else:
+        rows = (json.loads(line) for line in stream if line.strip())
+        fields = None
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            return
+        yield fields, chunk
+
+
+def _column(fields, rows, name):
+    """Values of column `name` (None if it is missing)."""
+    if fields is None:
+        return [row.get(name) for row in rows]
+    if name not in fields:
+        return [None] * len(rows)
+    i = fields.index(name)
+    return [row[i] if i < len(row) else None for row in rows]
+
+
+class _Writer:
+    """
+    Writes rows of the input columns followed by the property columns.
+
+    For JSON lines input written as CSV, the keys of the first row make the
+    header and every later row is laid out by it: keys missing from a row are
+    left empty and keys that are not in the header are dropped.
+    """
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        self.header = None
+
+    def write(self, fields, rows, out):
+        names = list(out)
+        if self.fmt == 'csv':
+            if self.header is None:
+                self.header = list(rows[0]) if fields is None else fields
+                self._csv = csv.writer(self.stream, lineterminator='\n')
+                self._csv.writerow(self.header + names)
+            if fields is None:
+                rows = [[row.get(field, '') for field in self.header] for row in rows]
+            values = [out[name].tolist() for name in names]
+            self._csv.writerows(row + list(extra) for row, extra in zip(rows, zip(*values)))
+        else:
+            values = [out[name].tolist() for name in names]
+            if fields is not None:
+                rows = [dict(zip(fields, row)) for row in rows]
+            for row, extra in zip(rows, zip(*values)):
+                record = dict(row)
+                record.update((name, None if math.isnan(value) else value) for name, value in zip(names, extra))
+                self.stream.write(json.dumps(record) + '\n')
+
+
+def stream_properties(source, sink, properties, fmt='csv', output_fmt=None, fluid=None, chunk_rows=100000):
+    """
+    Evaluate `properties` for every state point of `source` and write them to `sink`.
+
+    Args:
+        source (file): Text stream of CSV or JSON lines.
+        sink (file): Text stream for the results.
+        properties (list): Keys of `PROPERTIES`.
+        fmt (str, optional): 'csv' or 'jsonl' input. Defaults to 'csv'.
+        output_fmt (str, optional): Output format. Defaults to `fmt`.
+        fluid (str, optional): Fluid for rows without a "fluid" value.
+        chunk_rows (int, optional): Rows evaluated per chunk. Defaults to 100000.
+
+    Returns:
+        int: Number of state points written.
+
+    Raises:
+        ValueError: For an unknown property or fluid, or a row without a fluid.
+    """
+    unknown = [prop for prop in properties if prop not in PROPERTIES]
+    if unknown:
+        raise ValueError(f"Unknown properties {unknown}, expected some of {list(PROPERTIES)}.")
+    models = _Models()
+    writer = _Writer(sink, output_fmt or fmt)
+    total = 0
+    for fields, rows in read_chunks(source, fmt, chunk_rows):
+        fluids = np.array([name or fluid or '' for name in _column(fields, rows, 'fluid')])
+        if not fluids.all():
+            raise ValueError(f"Row {total + int(np.argmin(fluids.astype(bool))) + 1} has no fluid; "
+                             f"add a 'fluid' column or use --fluid.")
+        inputs = {name: _to_float(_column(fields, rows, name)) for name in INPUTS}
+        writer.write(fields, rows, evaluate_chunk(models, fluids, inputs, properties))
+        total += len(rows)
+    return total
+
+
+def _format(path, fmt):
+    if fmt:
+        return fmt
+    return 'jsonl' if path and path.endswith(('.jsonl', '.json', '.ndjson')) else 'csv'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', nargs='?', default='-', help='input file, or - for stdin (default)')
+    parser.add_argument('-o', '--output', default='-', help='output file, or - for stdout (default)')
+    parser.add_argument('-p', '--properties', default='h', help='comma separated properties (default h)')
+    parser.add_argument('-f', '--format', choices=['csv', 'jsonl'],
+                        help='input format (default from the file extension, else csv)')
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help='output format (default: input format)')
+    parser.add_argument('--fluid', help='fluid of rows without a "fluid" column')
+    parser.add_argument('--chunk-rows', type=int, default=100000, help='rows per chunk (default 100000)')
+    args = parser.parse_args(argv)
+
+    fmt = _format(args.input if args.input != '-' else None, args.format)
+    output_fmt = args.output_format or (_format(args.output, None) if args.output != '-' else fmt)
+    source = sys.stdin if args.input == '-' else open(args.input, newline='')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        stream_properties(source, sink, args.properties.split(','), fmt, output_fmt,
+                          args.fluid, args.chunk_rows)
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,554 @@
+"""
+Local property server that batches concurrent scalar requests.
+
+One process holds the NRTL table, the ionic liquid registry, the
+Peng-Robinson refrigerants and the water backend. Requests arriving within a
+short window are coalesced per method and evaluated with one vectorized call.
+
+Protocol: one JSON object per line over a Unix socket or a localhost TCP
+connection. A request is {"id": 1, "method": "saturation_pressure",
+"args": ["R134a", 300.0]} and its response is {"id": 1, "result": ...} or
+{"id": 1, "error": {"type": "ValueError", "message": "..."}}. Responses are
+strict JSON: non-finite results (NaN, e.g. for an infeasible state, or inf)
+are sent as null, which the Python clients turn back into NaN. Clients may
+send many requests before reading the responses, which arrive as they are
+done (match them by id).
+
+Usage (from the repository root):
+
+    python property_server.py --address unix:/tmp/il_abrh.sock
+
+    from property_server import PropertyClient
+    with PropertyClient('unix:/tmp/il_abrh.sock') as client:
+        gamma1, gamma2 = client.calculate_activity_coefficients('H2O [dmim][DMP]', 0.5, 320.0)
+"""
+import argparse
+import itertools
+import json
+import math
+import socket
+import sys
+import threading
+from collections import Counter
+
+import numpy as np
+
+DEFAULT_ADDRESS = '127.0.0.1:8765'
+
+
+def _parse_address(address):
+    """'unix:<path>' -> ('unix', path); '<host>:<port>' -> ('tcp', (host, port))."""
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+# --- Batched evaluation ------------------------------------------------------
+
+def _grouped(keys, columns, evaluate):
+    """
+    Evaluate a batch once per distinct key.
+
+    Args:
+        keys (list): Group key of each request (e.g. the refrigerant name).
+        columns (list): One list of numeric arguments per argument position.
+        evaluate (callable): evaluate(key, *arrays) -> sequence of results.
+
+    Returns:
+        list: Result of each request, or the exception raised for its group.
+    """
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    results = [None] * len(keys)
+    for key, idx in groups.items():
+        try:
+            values = evaluate(key, *(np.array([column[i] for i in idx], dtype=float) for column in columns))
+            for i, value in zip(idx, values):
+                results[i] = value
+        except Exception as error:
+            for i in idx:
+                results[i] = error
+    return results
+
+
+class PropertyModels:
+    """
+    The models behind the server methods, loaded on first use.
+
+    Every method takes the argument lists of a batch of requests and returns
+    one result (or exception) per request.
+
+    Args:
+        water_backend (str, optional): 'if97' (vectorized IAPWS-IF97) or
+            'refprop' (one REFPROP session, scalar flashes). Defaults to 'if97'.
+        refprop_prefix (str, optional): REFPROP directory for the 'refprop' backend.
+    """
+
+    def __init__(self, water_backend='if97', refprop_prefix=None):
+        if water_backend not in ('if97', 'refprop'):
+            raise ValueError(f"Unknown water backend '{water_backend}', expected 'if97' or 'refprop'.")
+        self.water_backend = water_backend
+        self.refprop_prefix = refprop_prefix
+        self._refrigerants = {}
+
+    def refrigerant(self, name):
+        from PVT2 import Refrigerant
+        if name not in self._refrigerants:
+            self._refrigerants[name] = Refrigerant(name)
+        return self._refrigerants[name]
+
+    def warm_up(self):
+        """Load the tables and sessions now instead of on the first request."""
+        from Enthalpy.il_registry import get_registry
+        from NRTL.Gammar import get_nrtl_table
+        get_nrtl_table()
+        get_registry()
+        if self.water_backend == 'refprop':
+            self._water_session()
+
+    def _water_session(self):
+        from Enthalpy.refprop_session import get_session
+        return get_session('WATER.FLD', prefix=self.refprop_prefix)
+
+    def calculate_activity_coefficients(self, pair_name, x, T):
+        from NRTL.Gammar import get_nrtl_table
+        table = get_nrtl_table()
+
+        def evaluate(name, x, T):
+            gamma1, gamma2 = table.activity_coefficients(table.pair_ids(name), x, T)
+            return [[g1, g2] for g1, g2 in zip(gamma1.tolist(), gamma2.tolist())]
+        return _grouped(pair_name, [x, T], evaluate)
+
+    def saturation_pressure(self, refrigerant, T):
+        return _grouped(refrigerant, [T], lambda name, T: self.refrigerant(name).saturation_pressure_batch(T)[0].tolist())
+
+    def saturation_temperature(self, refrigerant, P):
+        return _grouped(refrigerant, [P],
+                        lambda name, P: self.refrigerant(name).saturation_temperature_batch(P)[0].tolist())
+
+    def enthalpy_IL(self, ionic_liquid, temperature):
+        from Enthalpy.il_registry import get_registry
+        registry = get_registry()
+
+        def evaluate(name, temperature):
+            il_id = registry.ids(name)
+            if np.isnan(registry.molar_mass[il_id]):
+                raise ValueError(f"Molar mass for '{name}' is not available.")
+            return registry.h(il_id, temperature + 273.15).tolist()
+        return _grouped(ionic_liquid, [temperature], evaluate)
+
+    def _water(self, name, first, second):
+        """Water h or s (°C, kPa or quality) with the selected backend."""
+        if self.water_backend == 'if97':
+            from Enthalpy import if97_water
+            function = getattr(if97_water, name)
+            return _grouped([None] * len(first), [first, second], lambda _, a, b: function(a, b).tolist())
+        from Enthalpy import h_s_water
+        session = self._water_session()
+        function = getattr(h_s_water, name)
+        return _grouped([None] * len(first), [first, second],
+                        lambda _, a, b: [function(session, float(u), float(v)) for u, v in zip(a, b)])
+
+    def calculate_enthalpy_tp(self, temperature, pressure):
+        return self._water('calculate_enthalpy_tp', temperature, pressure)
+
+    def calculate_enthalpy_tx(self, temperature, quality):
+        return self._water('calculate_enthalpy_tx', temperature, quality)
+
+    def calculate_entropy_tp(self, temperature, pressure):
+        return self._water('calculate_entropy_tp', temperature, pressure)
+
+    def calculate_entropy_tx(self, temperature, quality):
+        return self._water('calculate_entropy_tx', temperature, quality)
+
+
+# Method name -> (number of arguments, defaults of the trailing ones,
+# number of leading name arguments; the others are numbers)
+METHODS = {
+    'calculate_activity_coefficients': (3, (298.15,), 1),
+    'saturation_pressure': (2, (), 1),
+    'saturation_temperature': (2, (), 1),
+    'enthalpy_IL': (2, (), 1),
+    'calculate_enthalpy_tp': (2, (), 0),
+    'calculate_enthalpy_tx': (2, (), 0),
+    'calculate_entropy_tp': (2, (), 0),
+    'calculate_entropy_tx': (2, (), 0),
+}
+
+
+class _Batcher:
+    """Collects the requests of one method and evaluates them together."""
+
+    def __init__(self, function, window, max_batch, stats):
+        self.function = function
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = stats
+        self.pending = []
+        self.timer = None
+
+    def submit(self, args):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((args, future))
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        self.stats['batches'] += 1
+        self.stats['batched_requests'] += len(batch)
+        try:
+            results = self.function(*(list(column) for column in zip(*(args for args, _ in batch))))
+        except Exception as error:
+            results = [error] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class PropertyServer:
+    """
+    asyncio server for the methods of `PropertyModels`.
+
+    Args:
+        window (float, optional): Seconds a request may wait for others to
+            join its batch. Defaults to 0.001.
+        max_batch (int, optional): A batch is evaluated as soon as it has this
+            many requests. Defaults to 4096.
+        water_backend (str, optional): See `PropertyModels`. Defaults to 'if97'.
+        refprop_prefix (str, optional): See `PropertyModels`.
+    """
+
+    def __init__(self, window=0.001, max_batch=4096, water_backend='if97', refprop_prefix=None):
+        self.models = PropertyModels(water_backend, refprop_prefix)
+        self.stats = Counter()
+        self.batchers = {name: _Batcher(getattr(self.models, name), window, max_batch, self.stats)
+                         for name in METHODS}
+
+    def summary(self):
+        """Request and batch counts."""
+        stats = dict(self.stats)
+        stats['mean_batch_size'] = stats.get('batched_requests', 0) / max(stats.get('batches', 0), 1)
+        return stats
+
+    def _submit(self, method, args):
+        if method == 'ping':
+            return 'pong'
+        if method == 'stats':
+            return self.summary()
+        try:
+            n_args, defaults, n_names = METHODS[method]
+        except KeyError:
+            raise ValueError(f"Unknown method '{method}'.") from None
+        required = n_args - len(defaults)
+        if not required <= len(args) <= n_args:
+            expected = n_args if required == n_args else f"{required} to {n_args}"
+            raise TypeError(f"{method}() takes {expected} arguments ({len(args)} given)")
+        args = tuple(args) + defaults[len(args) - required:]
+        # Bad arguments fail here, for this request only, instead of failing
+        # the batch (or the group of the batch) they would join
+        for name in args[:n_names]:
+            if not isinstance(name, str):
+                raise TypeError(f"{method}() expects a name as argument 1, got {type(name).__name__}")
+        numbers = []
+        for position, value in enumerate(args[n_names:], n_names + 1):
+            try:
+                numbers.append(float(value))
+            except (TypeError, ValueError):
+                raise TypeError(f"{method}() expects a number as argument {position}, got {value!r}") from None
+        return self.batchers[method].submit(args[:n_names] + tuple(numbers))
+
+    async def _respond(self, request, writer):
+        import asyncio
+        response = {'id': request.get('id')}
+        try:
+            result = self._submit(request.get('method'), request.get('args', []))
+            response['result'] = await result if asyncio.isfuture(result) else result
+        except Exception as error:
+            response['error'] = {'type': type(error).__name__, 'message': str(error)}
+        if 'result' in response:
+            response['result'] = _null_non_finite(response['result'])
+        try:
+            line = json.dumps(response, allow_nan=False)
+        except ValueError as error:
+            line = json.dumps({'id': response['id'], 'error': {'type': 'ValueError', 'message': str(error)}})
+        writer.write(line.encode() + b'\n')
+
+    async def handle(self, reader, writer):
+        """Serve one connection; requests of the connection are answered concurrently."""
+        import asyncio
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.stats['requests'] += 1
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    writer.write(json.dumps({'id': None, 'error': {'type': 'ValueError',
+                                                                    'message': 'Invalid JSON request.'}}).encode() + b'\n')
+                    continue
+                task = asyncio.ensure_future(self._respond(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if writer.transport.get_write_buffer_size() > 1 << 20:
+                    await writer.drain()
+            if tasks:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, address=DEFAULT_ADDRESS):
+        """Start listening; returns the `asyncio.Server`."""
+        import asyncio
+        self.models.warm_up()
+        kind, where = _parse_address(address)
+        if kind == 'unix':
+            return await asyncio.start_unix_server(self.handle, path=where)
+        return await asyncio.start_server(self.handle, *where)
+
+
+async def serve(address=DEFAULT_ADDRESS, **options):
+    """Run a `PropertyServer` until cancelled."""
+    server = await PropertyServer(**options).start(address)
+    async with server:
+        await server.serve_forever()
+
+
+# --- Clients -----------------------------------------------------------------
+
+def _null_non_finite(value):
+    """`value` with NaN and +-inf floats (also inside lists and dicts) replaced by None."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (list, tuple)):
+        return [_null_non_finite(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _null_non_finite(item) for key, item in value.items()}
+    return value
+
+
+def _nan_from_null(value):
+    """Inverse of `_null_non_finite` for numeric results: None -> NaN, also inside lists."""
+    if value is None:
+        return math.nan
+    if isinstance(value, list):
+        return [_nan_from_null(item) for item in value]
+    return value
+
+
+def _result(response):
+    """The result of a response, or the server-side error raised as an exception."""
+    error = response.get('error')
+    if error is None:
+        return _nan_from_null(response['result'])
+    exception = {'ValueError': ValueError, 'TypeError': TypeError}.get(error['type'], RuntimeError)
+    raise exception(error['message'])
+
+
+class PropertyClient:
+    """
+    Blocking client with the signatures of the model functions.
+
+    Safe to share between threads (one request at a time per client); use one
+    client per thread, or `AsyncPropertyClient`, for concurrent requests.
+
+    Args:
+        address (str, optional): 'unix:<path>' or '<host>:<port>'. Defaults to DEFAULT_ADDRESS.
+        timeout (float, optional): Socket timeout in seconds.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None):
+        kind, where = _parse_address(address)
+        if kind == 'unix':
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket.settimeout(timeout)
+        self._socket.connect(where)
+        self._file = self._socket.makefile('rwb')
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def call(self, method, *args):
+        """Send one request and wait for its result."""
+        with self._lock:
+            self._file.write(json.dumps({'id': next(self._ids), 'method': method, 'args': args}).encode() + b'\n')
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError('Property server closed the connection.')
+        return _result(json.loads(line))
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def calculate_activity_coefficients(self, pair_name, x, T=298.15):
+        return tuple(self.call('calculate_activity_coefficients', pair_name, x, T))
+
+    def saturation_pressure(self, refrigerant, T):
+        return self.call('saturation_pressure', refrigerant, T)
+
+    def saturation_temperature(self, refrigerant, P):
+        return self.call('saturation_temperature', refrigerant, P)
+
+    def enthalpy_IL(self, ionic_liquid, temperature):
+        return self.call('enthalpy_IL', ionic_liquid, temperature)
+
+    def calculate_enthalpy_tp(self, temperature, pressure):
+        return self.call('calculate_enthalpy_tp', temperature, pressure)
+
+    def calculate_enthalpy_tx(self, temperature, quality):
+        return self.call('calculate_enthalpy_tx', temperature, quality)
+
+    def calculate_entropy_tp(self, temperature, pressure):
+        return self.call('calculate_entropy_tp', temperature, pressure)
+
+    def calculate_entropy_tx(self, temperature, quality):
+        return self.call('calculate_entropy_tx', temperature, quality)
+
+
+class AsyncPropertyClient:
+    """
+    asyncio client; concurrent calls share one connection and are batched by the server.
+
+    Example:
+        client = await AsyncPropertyClient.connect('unix:/tmp/il_abrh.sock')
+        P = await asyncio.gather(*(client.saturation_pressure('R134a', T) for T in temperatures))
+        await client.close()
+    """
+
+    def __init__(self, reader, writer):
+        import asyncio
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._pending = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, address=DEFAULT_ADDRESS):
+        import asyncio
+        kind, where = _parse_address(address)
+        if kind == 'unix':
+            reader, writer = await asyncio.open_unix_connection(where, limit=1 << 20)
+        else:
+            reader, writer = await asyncio.open_connection(*where, limit=1 << 20)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    try:
+                        future.set_result(_result(response))
+                    except Exception as error:
+                        future.set_exception(error)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('Property server closed the connection.'))
+            self._pending.clear()
+
+    async def call(self, method, *args):
+        """Send one request and wait for its result."""
+        import asyncio
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps({'id': request_id, 'method': method, 'args': args}).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._receiver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def calculate_activity_coefficients(self, pair_name, x, T=298.15):
+        return tuple(await self.call('calculate_activity_coefficients', pair_name, x, T))
+
+    async def saturation_pressure(self, refrigerant, T):
+        return await self.call('saturation_pressure', refrigerant, T)
+
+    async def saturation_temperature(self, refrigerant, P):
+        return await self.call('saturation_temperature', refrigerant, P)
+
+    async def enthalpy_IL(self, ionic_liquid, temperature):
+        return await self.call('enthalpy_IL', ionic_liquid, temperature)
+
+    async def calculate_enthalpy_tp(self, temperature, pressure):
+        return await self.call('calculate_enthalpy_tp', temperature, pressure)
+
+    async def calculate_enthalpy_tx(self, temperature, quality):
+        return await self.call('calculate_enthalpy_tx', temperature, quality)
+
+    async def calculate_entropy_tp(self, temperature, pressure):
+        return await self.call('calculate_entropy_tp', temperature, pressure)
+
+    async def calculate_entropy_tx(self, temperature, quality):
+        return await self.call('calculate_entropy_tx', temperature, quality)
+
+
+def main(argv=None):
+    import asyncio
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--address', default=DEFAULT_ADDRESS,
+                        help=f"'unix:<path>' or '<host>:<port>' (default {DEFAULT_ADDRESS})")
+    parser.add_argument('--window-ms', type=float, default=1.0, help='batching window in ms (default 1)')
+    parser.add_argument('--max-batch', type=int, default=4096, help='largest batch (default 4096)')
+    parser.add_argument('--water-backend', choices=['if97', 'refprop'], default='if97',
+                        help='water h/s backend (default if97)')
+    parser.add_argument('--refprop-prefix', help='REFPROP directory (default $RPPREFIX)')
+    args = parser.parse_args(argv)
+    print(f"Serving properties on {args.address}", file=sys.stderr)
+    try:
+        asyncio.run(serve(args.address, window=args.window_ms / 1000, max_batch=args.max_batch,
+                          water_backend=args.water_backend, refprop_prefix=args.refprop_prefix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+import solver_trace
+
+# Bump when the table construction changes so stale files on disk are rebuilt
+TABLE_VERSION = 1
+
+
+def default_cache_dir():
+    """Directory for persisted tables: $IL_ABRH_CACHE or ~/.cache/il_abrh."""
+    return os.environ.get('IL_ABRH_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'il_abrh'))
+
+
+class SaturationTable:
+    """
+    Monotone spline table of a Peng-Robinson saturation curve.
+
+    Nodes (T_i, P_i) are exact solutions of the fugacity-equality condition.
+    ln(P) is interpolated against 1/T (and 1/T against ln(P) for the inverse)
+    with monotone cubic Hermite (PCHIP) splines, which are nearly linear in
+    these coordinates. The grid is refined until the interpolation error,
+    measured against the exact solver at seven interior points of every
+    interval, is below half the requested tolerance, so the stated tolerance
+    holds with a safety factor of two between the sampled points. The
+    measured maxima are kept in `max_rel_error_P` and `max_error_T`.
+
+    Args:
+        T_nodes (np.ndarray): Increasing node temperatures in K.
+        P_nodes (np.ndarray): Saturation pressures at the nodes in kPa.
+        max_rel_error_P (float): Maximum relative error of `pressure`.
+        max_error_T (float): Maximum absolute error of `temperature` in K.
+    """
+
+    def __init__(self, T_nodes, P_nodes, max_rel_error_P, max_error_T):
+        self.T_nodes = np.asarray(T_nodes, dtype=float)
+        self.P_nodes = np.asarray(P_nodes, dtype=float)
+        self.max_rel_error_P = float(max_rel_error_P)
+        self.max_error_T = float(max_error_T)
+        self.T_min, self.T_max = self.T_nodes[0], self.T_nodes[-1]
+        self.P_min, self.P_max = self.P_nodes[0], self.P_nodes[-1]
+
+        from scipy.interpolate import PchipInterpolator
+
+        inv_T = 1 / self.T_nodes
+        ln_P = np.log(self.P_nodes)
+        # PCHIP needs increasing abscissae: 1/T decreases along the nodes
+        self._lnP_of_invT = PchipInterpolator(inv_T[::-1], ln_P[::-1], extrapolate=False)
+        self._invT_of_lnP = PchipInterpolator(ln_P, inv_T, extrapolate=False)
+
+    def pressure(self, T):
+        """Saturation pressure in kPa for temperature(s) in K; NaN outside the table."""
+        with np.errstate(divide='ignore'):
+            return np.exp(self._lnP_of_invT(1 / np.asarray(T, dtype=float)))[()]
+
+    def temperature(self, P):
+        """Saturation temperature in K for pressure(s) in kPa; NaN outside the table."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (1 / self._invT_of_lnP(np.log(np.asarray(P, dtype=float))))[()]
+
+    @classmethod
+    def build(cls, refrigerant, T_min, T_max, rtol=1e-6, n_start=64, n_max=16384):
+        """
+        Build a table from the vectorized saturation solvers of `refrigerant`.
+
+        Args:
+            refrigerant (PVT2.Refrigerant): Fluid to tabulate.
+            T_min, T_max (float): Temperature range in K.
+            rtol (float, optional): Target relative error of the pressure and of
+                the temperature. Defaults to 1e-6.
+            n_start (int, optional): Initial number of nodes. Defaults to 64.
+            n_max (int, optional): Node limit. Defaults to 16384.
+
+        Returns:
+            SaturationTable: The table.
+
+        Raises:
+            ValueError: If the saturation curve cannot be solved on the grid or
+                the tolerance is not reached with `n_max` nodes.
+        """
+        fractions = np.arange(1, 8) / 8
+        n = n_start
+        while True:
+            # Nodes uniform in 1/T, where ln(P) is close to linear
+            T_nodes = 1 / np.linspace(1 / T_min, 1 / T_max, n)
+            P_nodes, converged, _ = refrigerant.saturation_pressure_batch(T_nodes)
+            if not np.all(converged):
+                raise ValueError(f"Saturation curve of {refrigerant.name} could not be solved "
+                                 f"between {T_min} K and {T_max} K")
+            table = cls(T_nodes, P_nodes, np.inf, np.inf)
+
+            # Check both splines against the exact solver inside every interval
+            inv_T = 1 / T_nodes
+            T_check = 1 / (inv_T[:-1, None] + np.diff(inv_T)[:, None] * fractions).ravel()
+            P_exact, _, _ = refrigerant.saturation_pressure_batch(T_check)
+            err_P = np.nanmax(np.abs(table.pressure(T_check) / P_exact - 1))
+
+            ln_P = np.log(P_nodes)
+            P_check = np.exp((ln_P[:-1, None] + np.diff(ln_P)[:, None] * fractions).ravel())
+            T_exact, _, _ = refrigerant.saturation_temperature_batch(P_check)
+            err_T = np.nanmax(np.abs(table.temperature(P_check) - T_exact))
+
+            within = err_P <= 0.5 * rtol and err_T <= 0.5 * rtol * T_min
+            if within or n >= n_max:
+                break
+            n *= 2
+
+        if not within:
+            raise ValueError(f"Saturation table of {refrigerant.name} did not reach rtol={rtol} "
+                             f"with {n} nodes")
+        return cls(T_nodes, P_nodes, err_P, err_T)
+
+    def save(self, path):
+        """
+        Write the table to an .npz file.
+
+        The data goes to a unique temporary file that then replaces `path`, so
+        processes saving the same table at once never publish a partial file.
+        """
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, T_nodes=self.T_nodes, P_nodes=self.P_nodes,
+                         max_rel_error_P=self.max_rel_error_P, max_error_T=self.max_error_T)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Read a table written by `save`."""
+        with np.load(path) as data:
+            return cls(data['T_nodes'], data['P_nodes'],
+                       data['max_rel_error_P'], data['max_error_T'])
+
+
+def table_key(params, T_min, T_max, rtol):
+    """Hash of everything the table depends on, used as its cache key."""
+    key = {
+        'version': TABLE_VERSION,
+        'Tc': params['Tc'],
+        'Pc': params['Pc'],
+        'omega': params['omega'],
+        'T_min': T_min,
+        'T_max': T_max,
+        'rtol': rtol,
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+_tables = {}
+
+
+def get_table(refrigerant, T_min, T_max, rtol=1e-6, cache_dir=None):
+    """
+    Return the saturation table of `refrigerant`, building it at most once.
+
+    Tables are kept in memory and persisted to `cache_dir` (see
+    `default_cache_dir`) as `sat_<name>_<key>.npz`, where the key hashes the
+    fluid parameters and the table settings. A table that cannot be written
+    to disk is still cached in memory.
+    """
+    key = table_key(refrigerant.params, T_min, T_max, rtol)
+    table = _tables.get(key)
+    if table is not None:
+        return table
+
+    cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+    path = os.path.join(cache_dir, f"sat_{refrigerant.name}_{key}.npz")
+    if os.path.exists(path):
+        with solver_trace.stage('saturation_table.load'):
+            table = SaturationTable.load(path)
+    else:
+        with solver_trace.stage('saturation_table.build'):
+            table = SaturationTable.build(refrigerant, T_min, T_max, rtol)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            table.save(path)
+        except OSError:
+            pass
+
+    _tables[key] = table
+    return table
@@ -0,0 +1,110 @@
+from collections import namedtuple
+
+import numpy as np
+
+from Enthalpy import if97_water
+from NRTL.Gammar import get_nrtl_table
+from PVT2 import Refrigerant
+from solution_enthalpy import split_pair
+from vector_solvers import safeguarded_newton
+
+SolubilityResult = namedtuple('SolubilityResult', ['x', 'converged', 'iterations'])
+
+X_MIN = 1e-12  # Lower end of the mole fraction bracket
+
+
+def refrigerant_saturation_pressure(refrigerant, T):
+    """
+    Saturation pressure of a pure refrigerant in kPa for temperature(s) in K.
+
+    Water ("H2O") uses IAPWS-IF97; the other refrigerants the Peng-Robinson
+    model of `PVT2.Refrigerant`. NaN where there is no saturation pressure.
+
+    Raises:
+        ValueError: If the refrigerant has no saturation model.
+    """
+    if refrigerant == 'H2O':
+        return if97_water.saturation_pressure(T)
+    P_sat, _, _ = Refrigerant(refrigerant).saturation_pressure_batch(T)
+    return P_sat[()]
+
+
+def _pair_saturation_pressure(pair_ids, T):
+    """Refrigerant saturation pressure for broadcast arrays of pair ids and T, grouped by refrigerant."""
+    pair_ids, T = np.broadcast_arrays(pair_ids, np.asarray(T, dtype=float))
+    nrtl_table = get_nrtl_table()
+    refrigerants = np.array([split_pair(name)[0] for name in nrtl_table.names])[pair_ids]
+    P_sat = np.empty(T.shape)
+    for refrigerant in np.unique(refrigerants):
+        mask = refrigerants == refrigerant
+        P_sat[mask] = refrigerant_saturation_pressure(str(refrigerant), T[mask])
+    return P_sat
+
+
+def bubble_pressure(pair, x, T):
+    """
+    Bubble-point pressure P = x * gamma1(x, T) * Psat(T) of refrigerant/IL solutions.
+
+    The ionic liquid is taken as non-volatile (modified Raoult's law).
+
+    Args:
+        pair (str, int or array-like): Working pair name(s) or id(s).
+        x (float or array-like): Refrigerant mole fraction.
+        T (float or array-like): Temperature in K.
+
+    Returns:
+        np.ndarray: Pressure in kPa with the broadcast shape of the inputs.
+    """
+    nrtl_table = get_nrtl_table()
+    pair_ids = nrtl_table.pair_ids(pair)
+    ln_gamma1, _ = nrtl_table.ln_activity_coefficients(pair_ids, x, T)
+    return (np.asarray(x, dtype=float) * np.exp(ln_gamma1) * _pair_saturation_pressure(pair_ids, T))[()]
+
+
+def solubility(pair, T, P, xtol=1e-12, maxiter=100):
+    """
+    Refrigerant mole fraction x in the IL at given T and P (inverse of `bubble_pressure`).
+
+    Solves ln(x) + ln(gamma1(x, T)) + ln(Psat(T) / P) = 0 for all points at
+    once with a bracketed Newton iteration on x in [1e-12, 1], using the
+    analytic d(ln gamma1)/dx of the NRTL model.
+
+    Args:
+        pair (str, int or array-like): Working pair name(s) or id(s).
+        T (float or array-like): Temperature in K.
+        P (float or array-like): Pressure in kPa.
+        xtol (float, optional): Tolerance on x. Defaults to 1e-12.
+        maxiter (int, optional): Maximum iterations per point. Defaults to 100.
+
+    Returns:
+        SolubilityResult: x (NaN where not converged), the `converged` mask and
+        the per-point iteration count, all with the broadcast shape of the
+        inputs. Points without a root in the bracket (e.g. P above Psat(T), or
+        a solubility below 1e-12) are reported as not converged.
+    """
+    nrtl_table = get_nrtl_table()
+    pair_ids, T, P = np.broadcast_arrays(nrtl_table.pair_ids(pair), np.asarray(T, dtype=float),
+                                         np.asarray(P, dtype=float))
+    shape = T.shape
+    pair_ids, T, P = pair_ids.ravel(), T.ravel(), P.ravel()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ln_P_ratio = np.log(_pair_saturation_pressure(pair_ids, T) / P)
+
+    def residual(x, idx):
+        d = nrtl_table.ln_activity_coefficients_derivatives(pair_ids[idx], x, T[idx])
+        return np.log(x) + d.ln_gamma1 + ln_P_ratio[idx], 1 / x + d.dln_gamma1_dx
+
+    # The residual at x = 1 is ln(Psat / P); only bracketed points are iterated
+    f_lo, _ = residual(np.full(T.size, X_MIN), np.arange(T.size))
+    lo = np.where((ln_P_ratio >= 0) & (f_lo <= 0), X_MIN, np.nan)
+    x, converged, iterations = safeguarded_newton(residual, lo, 1.0, increasing=True, xtol=xtol,
+                                                  maxiter=maxiter, label='solubility')
+    return SolubilityResult(x.reshape(shape)[()], converged.reshape(shape)[()], iterations.reshape(shape)[()])
+
+
+if __name__ == '__main__':
+    pairs = ['H2O [dmim][DMP]', 'R134a [hmim][Tf2N]']
+    T = 273.15 + np.array([[30.0], [60.0]])
+    x = solubility(np.array(pairs)[:, None, None], T, np.array([1.0, 200.0])[:, None, None])
+    print(x.x)
+    print(bubble_pressure(np.array(pairs)[:, None, None], x.x, T))
@@ -0,0 +1,121 @@
+import numpy as np
+
+from Enthalpy import if97_water
+from Enthalpy.il_registry import get_registry
+from NRTL.Gammar import get_nrtl_table
+from PVT2 import Refrigerant, get_components
+
+def split_pair(pair_name):
+    """
+    Split a working pair name such as "H2O [dmim][DMP]" into (refrigerant, ionic liquid).
+    """
+    refrigerant, _, ionic_liquid = str(pair_name).partition(' ')
+    if not ionic_liquid:
+        raise ValueError(f"Working pair '{pair_name}' is not of the form '<refrigerant> <ionic liquid>'.")
+    return refrigerant, ionic_liquid
+
+
+def molar_masses(pair_name):
+    """Molar masses (refrigerant, ionic liquid) of a working pair in g/mol."""
+    refrigerant, ionic_liquid = split_pair(pair_name)
+    components = get_components()
+    if refrigerant not in components:
+        raise ValueError(f"Molar mass of '{refrigerant}' is unknown.")
+    registry = get_registry()
+    M_il = registry.molar_mass[registry.ids(ionic_liquid)]
+    if np.isnan(M_il):
+        raise ValueError(f"Molar mass of '{ionic_liquid}' is unknown.")
+    return components[refrigerant]['M'], float(M_il)
+
+
+def mole_to_mass_fraction(pair_name, x):
+    """Refrigerant mass fraction from its mole fraction (array-like)."""
+    M1, M2 = molar_masses(pair_name)
+    x = np.asarray(x, dtype=float)
+    return (x * M1 / (x * M1 + (1 - x) * M2))[()]
+
+
+def mass_to_mole_fraction(pair_name, w):
+    """Refrigerant mole fraction from its mass fraction (array-like)."""
+    M1, M2 = molar_masses(pair_name)
+    w = np.asarray(w, dtype=float)
+    return ((w / M1) / (w / M1 + (1 - w) / M2))[()]
+
+
+def water_liquid_enthalpy(T):
+    """
+    Molar enthalpy of saturated liquid water in J/mol (IAPWS-IF97, T in K).
+
+    The reference state is the IF97 one (liquid at the triple point).
+    """
+    T = np.asarray(T, dtype=float)
+    valid = (T >= if97_water.T_MIN) & (T <= if97_water.T_13)
+    T_v = np.where(valid, T, if97_water.T_MIN)
+    h = if97_water.region1_hs(T_v, if97_water.saturation_pressure(T_v))[0]
+    return np.where(valid, h * get_components()['H2O']['M'], np.nan)[()]
+
+
+def refrigerant_liquid_enthalpy(refrigerant, T):
+    """
+    Molar enthalpy of the saturated liquid refrigerant in J/mol (T in K).
+
+    Water uses IAPWS-IF97 (`water_liquid_enthalpy`), the other refrigerants
+    the Peng-Robinson departure functions of `PVT2.Refrigerant` with the
+    reference state of the component table.
+    """
+    if refrigerant == 'H2O':
+        return water_liquid_enthalpy(T)
+    component = Refrigerant(refrigerant)
+    return component.enthalpy_entropy_tx(T, 0.0)[0] * component.params['M']
+
+
+def mixture_enthalpy(pair_name, x, T, h_refrigerant=None, basis='molar'):
+    """
+    Enthalpy of a liquid refrigerant/ionic liquid solution.
+
+    h = x1*h1(T) + x2*h_IL(T) + hE(x, T), where h_IL is the Cp integral of the
+    ionic liquid from 298.15 K (`il_registry`) and hE the NRTL excess
+    enthalpy from the analytic temperature derivatives of ln(gamma). x and T
+    are broadcast, so a whole composition/temperature grid is one call.
+
+    Args:
+        pair_name (str): Working pair, e.g. "H2O [dmim][DMP]".
+        x (float or array-like): Refrigerant mole fraction.
+        T (float or array-like): Temperature in K.
+        h_refrigerant (callable or array-like, optional): Molar enthalpy of the
+            pure liquid refrigerant in J/mol, as h(T) or as values broadcast
+            against T. Defaults to the saturated liquid of
+            `refrigerant_liquid_enthalpy`.
+        basis (str, optional): 'molar' for J/mol or 'mass' for kJ/kg. Defaults to 'molar'.
+
+    Returns:
+        np.ndarray: Solution enthalpy with the broadcast shape of x and T.
+    """
+    if basis not in ('molar', 'mass'):
+        raise ValueError(f"Unknown basis '{basis}', expected 'molar' or 'mass'.")
+    refrigerant, ionic_liquid = split_pair(pair_name)
+    x1 = np.asarray(x, dtype=float)
+    T = np.asarray(T, dtype=float)
+
+    if h_refrigerant is None:
+        h1 = refrigerant_liquid_enthalpy(refrigerant, T)
+    elif callable(h_refrigerant):
+        h1 = h_refrigerant(T)
+    else:
+        h1 = np.asarray(h_refrigerant, dtype=float)
+    h2 = get_registry().h_molar(ionic_liquid, T)
+    nrtl_table = get_nrtl_table()
+    hE = nrtl_table.excess_enthalpy(nrtl_table.pair_ids(pair_name), x1, T)
+
+    h = x1 * h1 + (1 - x1) * h2 + hE
+    if basis == 'mass':
+        M1, M2 = molar_masses(pair_name)
+        h = h / (x1 * M1 + (1 - x1) * M2)  # J/g = kJ/kg
+    return h[()]
+
+
+if __name__ == '__main__':
+    pair_name = 'H2O [dmim][DMP]'
+    x = np.linspace(0.5, 0.9, 5)
+    T = 273.15 + np.array([[30.0], [80.0]])
+    print(mixture_enthalpy(pair_name, x, T, basis='mass'))
@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+
+# The active tracer, or None. Instrumented code reads this attribute once per
+# solver call and skips all bookkeeping when it is None, so tracing costs
+# nothing when it is switched off.
+tracer = None
+
+_NULL_STAGE = nullcontext()
+
+
+class SolverTrace:
+    """
+    Counters, stage timings and structured events recorded by the solvers.
+
+    Counters are keyed "<solver>.<quantity>", e.g. "R134a.saturation_pressure.evaluations".
+    Events are dicts with at least `t` (seconds since the trace started),
+    `kind` and `solver`. Event kinds:
+
+        solve           one call of a vectorized solver (points, iterations
+                        (the largest per-point count), evaluations, unconverged,
+                        bracket_failures, nan_residuals, seconds)
+        no_real_root    a cubic EOS state without the requested roots
+        fallback        a result replaced by a fallback value
+        failure         a solver that raised
+
+    Args:
+        max_events (int, optional): Events kept in memory; older ones are
+            dropped (counters are always complete). Defaults to 10000.
+    """
+
+    def __init__(self, max_events=10000):
+        self.max_events = max_events
+        self.counters = Counter()
+        self.stages = {}  # name -> [calls, seconds]
+        self.events = deque(maxlen=max_events)
+        self.dropped_events = 0
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def event(self, kind, solver, **fields):
+        """Record a structured event and count it as "<solver>.<kind>"."""
+        record = {'t': time.perf_counter() - self.start, 'kind': kind, 'solver': solver}
+        record.update(fields)
+        with self._lock:
+            self.counters[f"{solver}.{kind}"] += 1
+            if len(self.events) == self.max_events:
+                self.dropped_events += 1
+            self.events.append(record)
+
+    def record_solve(self, solver, points, iterations, evaluations, unconverged,
+                     bracket_failures=0, nan_residuals=0, seconds=0.0):
+        """Record one call of a vectorized solver."""
+        with self._lock:
+            for name, value in (('points', points), ('iterations', iterations),
+                                ('evaluations', evaluations), ('unconverged', unconverged),
+                                ('bracket_failures', bracket_failures), ('nan_residuals', nan_residuals)):
+                self.counters[f"{solver}.{name}"] += value
+        self.event('solve', solver, points=int(points), iterations=int(iterations),
+                   evaluations=int(evaluations), unconverged=int(unconverged),
+                   bracket_failures=int(bracket_failures), nan_residuals=int(nan_residuals),
+                   seconds=seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code under `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                calls, seconds = self.stages.get(name, (0, 0.0))
+                self.stages[name] = [calls + 1, seconds + elapsed]
+
+    def summary(self):
+        """Counters and stage timings as a JSON-serialisable dict."""
+        with self._lock:
+            return {
+                'elapsed_s': time.perf_counter() - self.start,
+                'counters': dict(sorted(self.counters.items())),
+                'stages': {name: {'calls': calls, 'seconds': seconds}
+                           for name, (calls, seconds) in sorted(self.stages.items())},
+                'events': len(self.events),
+                'dropped_events': self.dropped_events,
+            }
+
+    def format_summary(self):
+        """Human-readable summary table."""
+        summary = self.summary()
+        lines = [f"Solver trace ({summary['elapsed_s']:.3f} s)"]
+        for name, value in summary['counters'].items():
+            lines.append(f"  {name:55s} {value:>12,}")
+        for name, stage in summary['stages'].items():
+            lines.append(f"  {name:43s} {stage['calls']:>6} calls {stage['seconds']:10.4f} s")
+        return '\n'.join(lines)
+
+    def write_jsonl(self, path):
+        """Write the events, one JSON object per line, followed by the summary."""
+        with open(path, 'w') as f:
+            for record in self.events:
+                f.write(json.dumps(record, default=float) + '\n')
+            f.write(json.dumps({'kind': 'summary', **self.summary()}, default=float) + '\n')
+
+
+def enable(max_events=10000):
+    """Start a new trace and make it the active one."""
+    global tracer
+    tracer = SolverTrace(max_events)
+    return tracer
+
+
+def disable():
+    """Switch tracing off; returns the trace that was active."""
+    global tracer
+    previous, tracer = tracer, None
+    return previous
+
+
+@contextmanager
+def tracing(max_events=10000):
+    """
+    Trace the solvers inside a `with` block.
+
+    Example:
+        with solver_trace.tracing() as trace:
+            Refrigerant('R134a').saturation_temperature_batch(P)
+        print(trace.format_summary())
+    """
+    global tracer
+    previous = tracer
+    trace = enable(max_events)
+    try:
+        yield trace
+    finally:
+        tracer = previous
+
+
+def stage(name):
+    """Time a block under `name` in the active trace (no-op when tracing is off)."""
+    return _NULL_STAGE if tracer is None else tracer.stage(name)
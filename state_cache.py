@@ -0,0 +1,215 @@
+import inspect
+import math
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from functools import update_wrapper
+from types import MethodType, SimpleNamespace
+
+import numpy as np
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'bypasses',
+                                     'currsize', 'maxsize', 'nbytes', 'max_bytes'])
+
+
+def _nbytes(value):
+    """Approximate memory held by a cached key or result."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(k) + _nbytes(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _private_copy(value):
+    """Copy of the mutable parts of a result (arrays, lists, dicts); immutable values are shared."""
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, tuple):
+        items = [_private_copy(item) for item in value]
+        if all(a is b for a, b in zip(items, value)):
+            return value
+        return type(value)(*items) if hasattr(value, '_fields') else tuple(items)
+    if isinstance(value, list):
+        return [_private_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {k: _private_copy(v) for k, v in value.items()}
+    return value
+
+
+class QuantizedLRUCache:
+    """
+    Bounded LRU cache for scalar state-point functions with quantized keys.
+
+    Numeric arguments listed in `tolerances` are rounded to a multiple of
+    their tolerance, so states closer than the tolerance share one entry.
+    With `snap=True` (the default) the function is evaluated at the rounded
+    state, which makes every result independent of the order of the calls.
+    Calls with array arguments, non-finite (NaN, inf) tolerance arguments or
+    unhashable arguments bypass the cache. Every caller gets its own copy of
+    array, list and dict results, so mutating a result never changes the
+    cached entry.
+
+    Args:
+        func (callable): Function to cache.
+        tolerances (dict): Argument name -> quantization step, e.g.
+            {'temperature': 0.01, 'pressure': 0.1}.
+        maxsize (int, optional): Maximum number of entries. Defaults to 4096.
+        max_bytes (int, optional): Memory cap for keys and results in bytes.
+            Defaults to None (no cap).
+        snap (bool, optional): Evaluate at the quantized state. Defaults to True.
+    """
+
+    def __init__(self, func, tolerances, maxsize=4096, max_bytes=None, snap=True):
+        self.func = func
+        self.tolerances = dict(tolerances)
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.snap = snap
+
+        parameters = list(inspect.signature(func).parameters.values())
+        if any(p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD, p.POSITIONAL_ONLY) for p in parameters):
+            raise ValueError(f"{func.__name__} must take named arguments only")
+        self._names = [p.name for p in parameters]
+        self._defaults = {p.name: p.default for p in parameters if p.default is not p.empty}
+        unknown = set(self.tolerances) - set(self._names)
+        if unknown:
+            raise ValueError(f"{func.__name__} has no argument(s) {sorted(unknown)}")
+
+        self._entries = OrderedDict()  # key -> (result, nbytes)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.bypasses = 0
+        self.nbytes = 0
+        update_wrapper(self, func)
+
+    def __get__(self, instance, owner=None):
+        # Support decorating methods: bind like a plain function would
+        return self if instance is None else MethodType(self, instance)
+
+    def _bind(self, args, kwargs):
+        values = dict(zip(self._names, args))
+        values.update(kwargs)
+        for name, default in self._defaults.items():
+            values.setdefault(name, default)
+        return values
+
+    def __call__(self, *args, **kwargs):
+        values = self._bind(args, kwargs)
+        key = []
+        for name in self._names:
+            value = values[name]
+            step = self.tolerances.get(name)
+            if step is not None:
+                if np.ndim(value) > 0:  # arrays, lists and tuples are not cached
+                    return self._bypass(args, kwargs)
+                value = float(value)
+                if not math.isfinite(value):  # NaN/inf states have no grid point
+                    return self._bypass(args, kwargs)
+                index = round(value / step)
+                if self.snap:
+                    values[name] = index * step
+                key.append(index)
+            else:
+                try:
+                    hash(value)
+                except TypeError:
+                    return self._bypass(args, kwargs)
+                key.append(value)
+        key = tuple(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _private_copy(entry[0])
+            self.misses += 1
+
+        result = self.func(**values) if self.snap else self.func(*args, **kwargs)
+        self._store(key, _private_copy(result))
+        return result
+
+    def _bypass(self, args, kwargs):
+        with self._lock:
+            self.bypasses += 1
+        return self.func(*args, **kwargs)
+
+    def _store(self, key, result):
+        size = _nbytes(key) + _nbytes(result)
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (result, size)
+            self.nbytes += size
+            while self._entries and (
+                    (self.maxsize is not None and len(self._entries) > self.maxsize)
+                    or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def cache_info(self):
+        """Hit/miss/eviction statistics and current size."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.bypasses,
+                             len(self._entries), self.maxsize, self.nbytes, self.max_bytes)
+
+    def cache_clear(self):
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.bypasses = 0
+            self.nbytes = 0
+
+
+def quantized_cache(maxsize=4096, max_bytes=None, snap=True, **tolerances):
+    """
+    Decorator form of `QuantizedLRUCache`.
+
+    Example:
+        @quantized_cache(maxsize=10000, temperature=0.01, pressure=0.1)
+        def calculate_enthalpy_tp(session, temperature, pressure):
+            ...
+    """
+    def decorator(func):
+        return QuantizedLRUCache(func, tolerances, maxsize=maxsize, max_bytes=max_bytes, snap=snap)
+    return decorator
+
+
+def cached_entry_points(T_tol=1e-3, P_tol=1e-3, x_tol=1e-6, maxsize=4096, max_bytes=None):
+    """
+    Opt-in cached versions of the repeatedly called state-point functions.
+
+    Each function gets its own cache; the originals are left untouched.
+
+    Args:
+        T_tol (float, optional): Temperature step (K or °C). Defaults to 1e-3.
+        P_tol (float, optional): Pressure step in kPa. Defaults to 1e-3.
+        x_tol (float, optional): Mole fraction step. Defaults to 1e-6.
+        maxsize (int, optional): Entries per cache. Defaults to 4096.
+        max_bytes (int, optional): Memory cap per cache. Defaults to None.
+
+    Returns:
+        SimpleNamespace: calculate_enthalpy_tp(session, temperature, pressure),
+        calculate_entropy_tp(session, temperature, pressure),
+        saturation_temperature(refrigerant, P) and
+        calculate_activity_coefficients(pair_name, x, T).
+    """
+    import h_water
+    import s_water
+    from NRTL import Gammar
+    from PVT2 import Refrigerant
+
+    options = dict(maxsize=maxsize, max_bytes=max_bytes)
+    return SimpleNamespace(
+        calculate_enthalpy_tp=QuantizedLRUCache(
+            h_water.calculate_enthalpy_tp, {'temperature': T_tol, 'pressure': P_tol}, **options),
+        calculate_entropy_tp=QuantizedLRUCache(
+            s_water.calculate_entropy_tp, {'temperature': T_tol, 'pressure': P_tol}, **options),
+        saturation_temperature=QuantizedLRUCache(
+            Refrigerant.saturation_temperature, {'P': P_tol}, **options),
+        calculate_activity_coefficients=QuantizedLRUCache(
+            Gammar.calculate_activity_coefficients, {'x': x_tol, 'T': T_tol}, **options),
+    )
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+SweepResult = namedtuple('SweepResult', ['outputs', 'shape', 'points', 'seconds', 'points_per_second',
+                                         'chunks_run', 'chunks_resumed'])
+
+
+# Ready-made property functions. They are module-level so that they can be
+# sent to worker processes, and import the models lazily inside the worker.
+
+def nrtl_gamma(pair, x, T):
+    """NRTL activity coefficients for arrays of pair (name or id), x and T (K)."""
+    from NRTL.Gammar import get_nrtl_table
+    gamma1, gamma2 = get_nrtl_table().activity_coefficients(pair, x, T)
+    return {'gamma1': gamma1, 'gamma2': gamma2}
+
+
+def pr_saturation_pressure(refrigerant, T):
+    """Peng-Robinson saturation pressure (kPa) for arrays of refrigerant name and T (K)."""
+    from PVT2 import Refrigerant
+    refrigerant = np.asarray(refrigerant)
+    T = np.asarray(T, dtype=float)
+    P = np.full(T.shape, np.nan)
+    converged = np.zeros(T.shape, dtype=bool)
+    for name in np.unique(refrigerant):
+        mask = refrigerant == name
+        P[mask], converged[mask], _ = Refrigerant(str(name)).saturation_pressure_batch(T[mask])
+    return {'P': P, 'converged': converged}
+
+
+def water_hs(T, P):
+    """
+    Water h (kJ/kg) and s (kJ/(kg*K)) for arrays of T (K) and P (kPa) from the IF97 water table.
+
+    The table file is memory-mapped, so the workers share one copy; call
+    `get_water_table()` once before the sweep so it is built only once.
+    """
+    from Enthalpy.water_tables import get_water_table
+    h, s = get_water_table().properties_tp(T, P)
+    return {'h': h, 's': s}
+
+
+def il_enthalpy(ionic_liquid, T):
+    """Ionic liquid enthalpy relative to 298.15 K in kJ/kg for arrays of name (or id) and T (K)."""
+    from Enthalpy.il_registry import get_registry
+    return {'h': get_registry().h(ionic_liquid, T)}
+
+
+def _as_columns(result):
+    """Normalise a function result to {name: array}."""
+    if isinstance(result, dict):
+        return result
+    if hasattr(result, '_asdict'):
+        return result._asdict()
+    if isinstance(result, tuple):
+        return {f"out{i}": value for i, value in enumerate(result)}
+    return {'result': result}
+
+
+def _run_chunk(func, axes, start, stop, fixed):
+    """Evaluate `func` on the flat grid points [start, stop)."""
+    names = list(axes)
+    shape = tuple(len(axes[name]) for name in names)
+    index = np.unravel_index(np.arange(start, stop), shape)
+    arguments = {name: axes[name][i] for name, i in zip(names, index)}
+    arguments.update(fixed)
+    columns = _as_columns(func(**arguments))
+    return {name: np.broadcast_to(np.asarray(value), (stop - start,)) for name, value in columns.items()}
+
+
+def _sweep_key(func, axes, fixed, chunk_size):
+    """Hash identifying a sweep, so checkpoints of a different sweep are not reused."""
+    digest = hashlib.sha1()
+    digest.update(f"{func.__module__}.{func.__qualname__}|{chunk_size}|{sorted(fixed.items())!r}".encode())
+    for name, values in axes.items():
+        digest.update(name.encode())
+        digest.update(str(values.dtype).encode())
+        digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+def run_sweep(func, grid, fixed=None, chunk_size=65536, n_workers=None, checkpoint_dir=None, progress=None):
+    """
+    Evaluate a property function over the full outer-product grid of its inputs.
+
+    The flattened grid is split into chunks of `chunk_size` points that are
+    evaluated in a process pool. Each worker rebuilds its points from the
+    grid axes, so only the axes (not the full grid) are sent between
+    processes. With `checkpoint_dir`, every finished chunk is saved as
+    chunk_<n>.npz and a rerun of the same sweep only evaluates the missing
+    chunks.
+
+    Args:
+        func (callable): Module-level function taking the grid axes and `fixed`
+            as keyword arrays (one value per point) and returning an array, a
+            tuple, a namedtuple or a dict of arrays, e.g. `nrtl_gamma`,
+            `pr_saturation_pressure` or `il_enthalpy`.
+        grid (dict): Argument name -> 1-D array of values; the grid is their
+            outer product in the given order.
+        fixed (dict, optional): Arguments passed unchanged to every call.
+        chunk_size (int, optional): Points per chunk. Defaults to 65536.
+        n_workers (int, optional): Worker processes. Defaults to os.cpu_count();
+            1 runs in the calling process.
+        checkpoint_dir (str, optional): Directory for resumable checkpoints.
+        progress (callable, optional): progress(done_points, total_points, elapsed_s)
+            called after each chunk.
+
+    Returns:
+        SweepResult: outputs ({name: array of the grid shape}), shape, points,
+        seconds, points_per_second (of the chunks evaluated in this run),
+        chunks_run and chunks_resumed.
+    """
+    axes = {name: np.asarray(values).ravel() for name, values in grid.items()}
+    fixed = dict(fixed or {})
+    shape = tuple(len(values) for values in axes.values())
+    n_points = int(np.prod(shape, dtype=np.int64))
+    bounds = [(start, min(start + chunk_size, n_points)) for start in range(0, n_points, chunk_size)]
+
+    done = {}
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        key = _sweep_key(func, axes, fixed, chunk_size)
+        manifest_path = os.path.join(checkpoint_dir, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                if json.load(f)['key'] != key:
+                    raise ValueError(f"'{checkpoint_dir}' holds checkpoints of a different sweep")
+        else:
+            with open(manifest_path, 'w') as f:
+                json.dump({'key': key, 'function': f"{func.__module__}.{func.__qualname__}",
+                           'shape': shape, 'chunk_size': chunk_size, 'chunks': len(bounds)}, f)
+        for n in range(len(bounds)):
+            path = os.path.join(checkpoint_dir, f"chunk_{n:06d}.npz")
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    done[n] = {name: data[name] for name in data.files}
+
+    outputs = {}
+
+    def store(n, columns):
+        start, stop = bounds[n]
+        for name, values in columns.items():
+            if name not in outputs:
+                outputs[name] = np.empty(n_points, dtype=values.dtype)
+            outputs[name][start:stop] = values
+
+    for n, columns in done.items():
+        store(n, columns)
+
+    def finished(n, columns):
+        if checkpoint_dir is not None:
+            path = os.path.join(checkpoint_dir, f"chunk_{n:06d}.npz")
+            np.savez(path + '.tmp.npz', **columns)
+            os.replace(path + '.tmp.npz', path)  # never leave a partial chunk behind
+        store(n, columns)
+        points_done[0] += bounds[n][1] - bounds[n][0]
+        if progress is not None:
+            progress(points_done[0], n_points, time.perf_counter() - start_time)
+
+    todo = [n for n in range(len(bounds)) if n not in done]
+    points_done = [sum(bounds[n][1] - bounds[n][0] for n in done)]
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    start_time = time.perf_counter()
+    if n_workers <= 1 or len(todo) <= 1:
+        for n in todo:
+            finished(n, _run_chunk(func, axes, *bounds[n], fixed))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(todo))) as pool:
+            futures = {pool.submit(_run_chunk, func, axes, *bounds[n], fixed): n for n in todo}
+            for future in as_completed(futures):
+                finished(futures[future], future.result())
+    seconds = time.perf_counter() - start_time
+
+    evaluated = sum(bounds[n][1] - bounds[n][0] for n in todo)
+    return SweepResult(
+        outputs={name: values.reshape(shape) for name, values in outputs.items()},
+        shape=shape, points=n_points, seconds=seconds,
+        points_per_second=evaluated / seconds if seconds > 0 else float('inf'),
+        chunks_run=len(todo), chunks_resumed=len(done))
+
+
+if __name__ == '__main__':
+    from NRTL.Gammar import nrtl_table
+
+    def report(done, total, elapsed):
+        print(f"\r{done}/{total} points, {done / elapsed:,.0f} points/s", end='', flush=True)
+
+    # Activity coefficients of every working pair over a composition/temperature grid
+    result = run_sweep(nrtl_gamma, {'pair': np.arange(len(nrtl_table)),
+                                    'x': np.linspace(0.01, 0.99, 500),
+                                    'T': np.linspace(273.15, 423.15, 500)},
+                       chunk_size=200000, progress=report)
+    print(f"\n{result.points} points in {result.seconds:.2f} s ({result.points_per_second:,.0f} points/s)")
@@ -0,0 +1,12 @@
+import pytest
+
+from Enthalpy import refprop_session
+from fake_refprop import fake_backend
+
+
+@pytest.fixture
+def fake_refprop():
+    """Route `refprop_session` to the fake REFPROP for one test; the cached sessions are dropped afterwards."""
+    refprop_session.set_backend(fake_backend)
+    yield
+    refprop_session.set_backend(None)
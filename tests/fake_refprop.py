@@ -0,0 +1,55 @@
+from collections import namedtuple
+
+from Enthalpy import if97_water
+
+M_WATER = 18.01528  # g/mol
+D_NOMINAL = 55.0  # mol/L, returned for every state (densities are not modelled)
+
+SetupResult = namedtuple('SetupResult', ['ierr', 'herr'])
+TPFlashResult = namedtuple('TPFlashResult', ['D', 'h', 's', 'q', 'ierr', 'herr'])
+TQFlashResult = namedtuple('TQFlashResult', ['P', 'D', 'h', 's', 'ierr', 'herr'])
+
+
+class FakeREFPROP:
+    """
+    Stand-in for the REFPROP library with the methods used by `RefpropSession`.
+
+    Water properties come from the IF97 backend and are returned in REFPROP
+    molar units, so tests and benchmarks of the REFPROP code paths run on
+    machines without REFPROP. Densities are not modelled (D is D_NOMINAL).
+    `setup_calls` and `flash_calls` count the calls, and `last_flash` keeps
+    the last flash result.
+    """
+
+    def __init__(self, prefix=None):
+        self.prefix = prefix
+        self.setup_calls = 0
+        self.flash_calls = 0
+        self.last_flash = None
+
+    def SETPATHdll(self, prefix):
+        self.prefix = prefix
+
+    def SETUPdll(self, n, fluid, mixture, reference):
+        self.setup_calls += 1
+        if fluid.upper() != 'WATER.FLD':
+            return SetupResult(1, f"Fake REFPROP only knows WATER.FLD, not {fluid}")
+        return SetupResult(0, '')
+
+    def TPFLSHdll(self, T, P, z):
+        h, s = if97_water.properties_tp(T, P)
+        return self._flash(TPFlashResult(D_NOMINAL, float(h) * M_WATER, float(s) * M_WATER, -998.0, 0, ''))
+
+    def TQFLSHdll(self, T, q, z, kq):
+        h, s, P = if97_water.properties_tx(T, q)
+        return self._flash(TQFlashResult(float(P), D_NOMINAL, float(h) * M_WATER, float(s) * M_WATER, 0, ''))
+
+    def _flash(self, result):
+        self.flash_calls += 1
+        self.last_flash = result
+        return result
+
+
+def fake_backend(prefix):
+    """Backend for `refprop_session.set_backend`."""
+    return FakeREFPROP(prefix)
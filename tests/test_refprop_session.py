@@ -0,0 +1,42 @@
+import pytest
+
+import h_water
+import s_water
+from Enthalpy import h_s_water, if97_water, refprop_session
+from fake_refprop import M_WATER
+
+
+def test_get_session_reuses_one_handle(fake_refprop):
+    session = refprop_session.get_session('WATER.FLD', prefix='fake')
+    for temperature in (20.0, 50.0, 80.0):
+        h_water.calculate_enthalpy_tp(refprop_session.get_session('WATER.FLD', prefix='fake'), temperature, 101.325)
+        s_water.calculate_entropy_tp(refprop_session.get_session('WATER.FLD', prefix='fake'), temperature, 101.325)
+    assert refprop_session.get_session('WATER.FLD', prefix='fake') is session
+    assert session.RP.setup_calls == 1
+
+
+def test_properties_tp_from_one_flash(fake_refprop):
+    session = refprop_session.get_session('WATER.FLD', prefix='fake')
+    props = h_s_water.calculate_properties_tp(session, 50.0, 101.325)
+    assert session.RP.flash_calls == 1
+    h, s = if97_water.properties_tp(323.15, 101.325)
+    assert props['h'] == pytest.approx(h)
+    assert props['s'] == pytest.approx(s)
+    assert props['density'] == pytest.approx(session.RP.last_flash.D * M_WATER)
+    assert props['quality'] == session.RP.last_flash.q
+
+
+def test_properties_tx_from_one_flash(fake_refprop):
+    session = refprop_session.get_session('WATER.FLD', prefix='fake')
+    props = h_s_water.calculate_properties_tx(session, 100.0, 0.5)
+    assert session.RP.flash_calls == 1
+    h, s, P = if97_water.properties_tx(373.15, 0.5)
+    assert props['h'] == pytest.approx(h)
+    assert props['s'] == pytest.approx(s)
+    assert props['density'] == pytest.approx(session.RP.last_flash.D * M_WATER)
+    assert props['pressure'] == pytest.approx(P)
+
+
+def test_unknown_fluid_raises(fake_refprop):
+    with pytest.raises(ValueError, match='NOPE.FLD'):
+        refprop_session.get_session('NOPE.FLD', prefix='fake')
@@ -0,0 +1,130 @@
+import time
+
+import numpy as np
+
+import solver_trace
+
+
+def safeguarded_newton(fun, lo, hi, x0=None, increasing=True, xtol=1e-10, ftol=0.0, maxiter=100,
+                       label='safeguarded_newton'):
+    """
+    Solve many independent scalar equations f(x) = 0 at once.
+
+    Every point keeps its own bracket [lo, hi]. A Newton step is taken when it
+    stays inside the bracket and shrinks the residual fast enough, otherwise
+    the point falls back to bisection, so each point converges as long as its
+    root is bracketed. Only the points that are still iterating are passed to
+    `fun`.
+
+    Args:
+        fun (callable): fun(x, idx) -> (f, dfdx) for the active points, where
+            `idx` are their flat indices into the broadcast input shape.
+            `dfdx` may be approximate or NaN. f may be +inf / -inf where the
+            equation is undefined but the side of the root is known.
+        lo, hi (float or array-like): Lower and upper bracket.
+        x0 (float or array-like, optional): Initial guess. Defaults to the
+            bracket midpoint.
+        increasing (bool, optional): Whether f increases with x. Defaults to True.
+        xtol (float, optional): Relative step tolerance. Defaults to 1e-10.
+        ftol (float, optional): Absolute residual tolerance. Defaults to 0.
+        maxiter (int, optional): Maximum number of iterations. Defaults to 100.
+        label (str, optional): Solver name in the `solver_trace` records.
+
+    Returns:
+        tuple: (x, converged, iterations). x is NaN where the point did not
+        converge; iterations is the per-point iteration count.
+    """
+    tracer = solver_trace.tracer
+    start = time.perf_counter() if tracer is not None else 0.0
+    if x0 is None:
+        x0 = 0.5 * (np.asarray(lo, dtype=float) + np.asarray(hi, dtype=float))
+    lo, hi, x0 = np.broadcast_arrays(np.asarray(lo, dtype=float), np.asarray(hi, dtype=float),
+                                     np.asarray(x0, dtype=float))
+    shape = x0.shape
+    lo = lo.ravel().copy()
+    hi = hi.ravel().copy()
+    x = np.where((x0.ravel() > lo) & (x0.ravel() < hi), x0.ravel(), 0.5 * (lo + hi))
+    n = x.size
+
+    converged = np.zeros(n, dtype=bool)
+    iterations = np.zeros(n, dtype=np.int64)
+    dx_old = hi - lo
+    sign = 1.0 if increasing else -1.0
+
+    active = np.flatnonzero(np.isfinite(x))
+    n_bracketed = active.size
+    evaluations = nan_residuals = 0
+    for _ in range(maxiter):
+        if active.size == 0:
+            break
+        xa = x[active]
+        f, df = fun(xa, active)
+        evaluations += active.size
+        f = sign * np.asarray(f, dtype=float)
+        df = sign * np.asarray(df, dtype=float)
+        iterations[active] += 1
+
+        # Undefined residuals (NaN) cannot be bracketed: give up on those points
+        valid = ~np.isnan(f)
+        nan_residuals += active.size - np.count_nonzero(valid)
+        done = valid & (np.abs(f) <= ftol)
+
+        # Shrink the bracket around the root
+        below = valid & (f < 0)
+        above = valid & (f > 0)
+        lo[active[below]] = xa[below]
+        hi[active[above]] = xa[above]
+        lo_a, hi_a = lo[active], hi[active]
+
+        # Newton step, replaced by bisection where it leaves the bracket or stalls.
+        # A step below the tolerance is always taken: it may round onto the
+        # bracket end that was just moved to xa, which is not a stall.
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            x_newton = xa - f / df
+            slow = np.abs(2 * f) > np.abs(dx_old[active] * df)
+        tiny = np.abs(x_newton - xa) <= xtol * (1 + np.abs(xa))
+        use_newton = np.isfinite(x_newton) & (tiny | ((x_newton > lo_a) & (x_newton < hi_a) & ~slow))
+        x_new = np.where(use_newton, x_newton, 0.5 * (lo_a + hi_a))
+
+        step = np.abs(x_new - xa)
+        dx_old[active] = step
+        done |= valid & (step <= xtol * (1 + np.abs(xa)))
+        done |= valid & (hi_a - lo_a <= xtol * (1 + np.abs(xa)))
+
+        x[active] = np.where(valid, x_new, np.nan)
+        converged[active[done]] = True
+        active = active[valid & ~done]
+
+    x = np.where(converged, x, np.nan)
+    if tracer is not None:
+        tracer.record_solve(label, points=n, iterations=int(iterations.max(initial=0)),
+                            evaluations=evaluations, unconverged=n - np.count_nonzero(converged),
+                            bracket_failures=n - n_bracketed, nan_residuals=nan_residuals,
+                            seconds=time.perf_counter() - start)
+    return x.reshape(shape), converged.reshape(shape), iterations.reshape(shape)
+
+
+def bracketed_newton(fun, lo, hi, f_lo, f_hi, xtol=1e-12, maxiter=100, label='bracketed_newton'):
+    """
+    `safeguarded_newton` for increasing equations with known values at the bracket ends.
+
+    Every point starts from the secant point of its bracket. Points whose
+    bracket does not contain a sign change (the root is outside [lo, hi]) are
+    not iterated: they come back as NaN and are counted as bracket failures.
+
+    Args:
+        fun (callable): fun(x, idx) -> (f, dfdx), as for `safeguarded_newton`.
+        lo, hi (array-like): Bracket.
+        f_lo, f_hi (array-like): f at lo and hi.
+        xtol (float, optional): Relative step tolerance. Defaults to 1e-12.
+        maxiter (int, optional): Maximum number of iterations. Defaults to 100.
+        label (str, optional): Solver name in the `solver_trace` records.
+
+    Returns:
+        tuple: (x, converged, iterations), as for `safeguarded_newton`.
+    """
+    lo, hi, f_lo, f_hi = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (lo, hi, f_lo, f_hi)))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x0 = lo - f_lo * (hi - lo) / (f_hi - f_lo)
+    lo = np.where((f_lo <= 0) & (f_hi >= 0), lo, np.nan)
+    return safeguarded_newton(fun, lo, hi, x0, increasing=True, xtol=xtol, maxiter=maxiter, label=label)